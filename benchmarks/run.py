@@ -0,0 +1,266 @@
+"""
+Loopback benchmark of Scanner against local fake services.
+
+    python -m benchmarks.run --ports 1000,10000 --concurrency 500,2000 --uvloop on,off -o bench.json
+
+Every case runs in a fresh spawned process, so peak RSS and open FDs
+are measured per case. The report is JSON, compare reports of two
+commits with --compare.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import (
+    asdict,
+    dataclass,
+)
+from typing import Any
+
+from benchmarks.services import (
+    KINDS,
+    ServiceLayout,
+    ipv6_available,
+    raise_fd_limit,
+    run_services,
+)
+
+
+FD_SAMPLE_INTERVAL = 0.01
+
+# compared fields, higher is better for rates, lower for the rest
+COMPARED = ("probes_per_second", "ports_per_second", "p50", "p99", "peak_rss_kb", "peak_fds")
+
+
+@dataclass
+class Case:
+    ports: int
+    hosts: int
+    concurrency: int
+    uvloop: bool
+    protocol: str | None
+    timeout: float
+    engine: str
+
+    @property
+    def name(self) -> str:
+        return (
+            f"ports={self.ports} hosts={self.hosts} concurrency={self.concurrency}"
+            f" uvloop={'on' if self.uvloop else 'off'} protocol={self.protocol or 'all'} engine={self.engine}"
+        )
+
+
+def _open_fds() -> int | None:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+async def _scan(case: Case, layout: ServiceLayout, targets: str) -> dict[str, Any]:
+    from portfinder.scanner import Scanner
+
+    scanner = Scanner(
+        target=targets,
+        ports=f"{layout.base}-{layout.base + case.ports - 1}",
+        protocol=case.protocol,
+        timeout=case.timeout,
+        concurrency=case.concurrency,
+        quiet=True,
+        uvloop_disable=True,
+        engine=case.engine,
+    )
+    peak_fds = _open_fds()
+
+    async def sample_fds() -> None:
+        nonlocal peak_fds
+        while peak_fds is not None:
+            await asyncio.sleep(FD_SAMPLE_INTERVAL)
+            peak_fds = max(peak_fds, _open_fds() or 0)
+
+    sampler = asyncio.create_task(sample_fds())
+    started = time.perf_counter()
+    try:
+        found = [result async for result in scanner.stream()]
+    finally:
+        sampler.cancel()
+    elapsed = time.perf_counter() - started
+
+    snapshot = scanner.metrics.snapshot()
+    return {
+        "elapsed": round(elapsed, 4),
+        "ports": snapshot["ports_done"],
+        "probes": snapshot["probes"],
+        "ports_per_second": round(snapshot["ports_done"] / elapsed, 1),
+        "probes_per_second": round(snapshot["probes"] / elapsed, 1),
+        "p50": snapshot["p50"],
+        "p99": snapshot["p99"],
+        "results": len(found),
+        "protocols": snapshot["protocols"],
+        "peak_fds": peak_fds,
+    }
+
+
+def _run_case(case: Case, layout: ServiceLayout, targets: str, report) -> None:
+    """
+    Case process entry: scan and put the measurements into report
+    """
+    raise_fd_limit()
+    try:
+        if case.uvloop:
+            import uvloop
+
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        measured = asyncio.run(_scan(case, layout, targets))
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        measured["peak_rss_kb"] = peak_rss // 1024 if sys.platform == "darwin" else peak_rss
+        report.put(measured)
+    except BaseException as exc:
+        report.put({"error": f"{type(exc).__name__}: {exc}"})
+
+
+def run_case(case: Case, layout: ServiceLayout, targets: str) -> dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    report = context.Queue()
+    process = context.Process(target=_run_case, args=(case, layout, targets, report))
+    process.start()
+    measured = report.get()
+    process.join()
+    return {"case": case.name, **asdict(case), **measured}
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path: str, new_path: str) -> None:
+    """
+    Print relative change of COMPARED fields between two reports, cases matched by name
+    """
+    with open(old_path) as f:
+        old = {case["case"]: case for case in json.load(f)["cases"]}
+    with open(new_path) as f:
+        new = json.load(f)["cases"]
+    for case in new:
+        if (before := old.get(case["case"])) is None:
+            continue
+        changes = []
+        for key in COMPARED:
+            if before.get(key) and case.get(key) is not None:
+                changes.append(f"{key} {100 * (case[key] - before[key]) / before[key]:+.1f}%")
+        print(f"{case['case']}: {', '.join(changes)}")
+
+
+def _numbers(value: str) -> list[int]:
+    return [int(item) for item in value.split(",")]
+
+
+def _switches(value: str) -> list[bool]:
+    return [item.strip().lower() in ("on", "1", "true", "yes") for item in value.split(",")]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scanner loopback benchmark")
+    parser.add_argument("--ports", type=_numbers, default=[1000], help="Port counts, comma separated (default: 1000)")
+    parser.add_argument("--hosts", type=_numbers, default=[1], help="127.0.0.0/8 host counts (default: 1)")
+    parser.add_argument("--concurrency", type=_numbers, default=[500], help="Concurrency values (default: 500)")
+    parser.add_argument("--uvloop", type=_switches, default=[True, False], help="uvloop on/off (default: on,off)")
+    parser.add_argument(
+        "--protocol", action="append", choices=["tcp", "udp", "http", "https"], help="Protocol, all if not set"
+    )
+    parser.add_argument("--engine", default="asyncio", help="Connect engines, comma separated (default: asyncio)")
+    parser.add_argument("--timeout", type=float, default=0.5, help="Probe timeout (default: 0.5)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Delay of slow services (default: 0.05)")
+    parser.add_argument("--base-port", type=int, default=20000, help="First port of the range (default: 20000)")
+    parser.add_argument("--no-ipv6", action="store_true", help="Do not scan ::1")
+    for kind in KINDS:
+        parser.add_argument(
+            f"--{kind.replace('_', '-')}",
+            type=int,
+            default=ServiceLayout().counts[kind],
+            help=f"Count of {kind} services (default: {ServiceLayout().counts[kind]})",
+        )
+    parser.add_argument("-o", "--output", help="Report file, stdout if not set")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two reports and exit")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    raise_fd_limit()
+    ipv6 = not args.no_ipv6 and ipv6_available()
+    layout = ServiceLayout(
+        base=args.base_port,
+        size=max(args.ports),
+        counts={kind: getattr(args, kind) for kind in KINDS},
+        latency=args.latency,
+    )
+    cases = [
+        Case(ports, hosts, concurrency, uvloop, protocol, args.timeout, engine)
+        for ports, hosts, concurrency, uvloop, protocol, engine in itertools.product(
+            args.ports, args.hosts, args.concurrency, args.uvloop, args.protocol or [None], args.engine.split(",")
+        )
+    ]
+
+    context = multiprocessing.get_context("spawn")
+    ready, stop = context.Event(), context.Event()
+    services = context.Process(
+        target=run_services, args=(layout, ["127.0.0.1", "::1"] if ipv6 else ["127.0.0.1"], ready, stop)
+    )
+    services.start()
+    try:
+        if not ready.wait(timeout=60):
+            raise RuntimeError("Fake services did not start")
+        results = []
+        for case in cases:
+            last = ipaddress.IPv4Address("127.0.0.1") + case.hosts - 1
+            targets = [f"127.0.0.1-{last}" if case.hosts > 1 else "127.0.0.1"]
+            if ipv6:
+                targets.append("::1")
+            results.append(run_case(case, layout, ",".join(targets)))
+            print(
+                f"{results[-1]['case']}: {results[-1].get('probes_per_second', results[-1].get('error'))} probes/s",
+                file=sys.stderr,
+            )
+    finally:
+        stop.set()
+        services.join()
+
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ipv6": ipv6,
+        "layout": {kind: len(ports) for kind, ports in layout.ports().items()},
+        "latency": layout.latency,
+        "cases": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import asyncio
+import socket
+import ssl
+import subprocess
+import tempfile
+from dataclasses import (
+    dataclass,
+    field,
+)
+from pathlib import Path
+
+
+HTTP_RESPONSE = b"HTTP/1.0 200 OK\r\nServer: portfinder-bench\r\nContent-Length: 2\r\n\r\nok"
+
+# service kinds in port layout order
+KINDS = ("tcp", "http", "tls", "udp_echo", "udp_silent", "slow_tls", "slow_udp")
+
+
+@dataclass
+class ServiceLayout:
+    """
+    Fake services spread evenly over base..base+size-1, every other port
+    of the range is closed. Kinds:
+    tcp - accept and close, http - minimal HTTP/1.0 server,
+    tls - self-signed TLS server, udp_echo - UDP echo,
+    udp_silent - bound UDP socket that never answers,
+    slow_tls / slow_udp - TLS handshake / UDP echo delayed by latency.
+    """
+
+    base: int = 20000
+    size: int = 1000
+    counts: dict[str, int] = field(
+        default_factory=lambda: {
+            "tcp": 100,
+            "http": 20,
+            "tls": 20,
+            "udp_echo": 20,
+            "udp_silent": 10,
+            "slow_tls": 10,
+            "slow_udp": 10,
+        }
+    )
+    latency: float = 0.05
+
+    def __post_init__(self):
+        if sum(self.counts.values()) > self.size:
+            raise ValueError(f"Layout of {sum(self.counts.values())} services does not fit {self.size} ports")
+        if self.base + self.size > 65536:
+            raise ValueError(f"Port range {self.base}-{self.base + self.size - 1} is out of bounds")
+
+    def ports(self) -> dict[str, list[int]]:
+        """
+        Service ports by kind, interleaved over the whole range
+        """
+        layout: dict[str, list[int]] = {kind: [] for kind in KINDS}
+        pending = {kind: self.counts.get(kind, 0) for kind in KINDS}
+        if not (total := sum(pending.values())):
+            return layout
+        step = self.size / total
+        # round robin over kinds so every part of the range has a mix of services
+        index = 0
+        while any(pending.values()):
+            for kind in KINDS:
+                if pending[kind]:
+                    layout[kind].append(self.base + int(index * step))
+                    pending[kind] -= 1
+                    index += 1
+        return layout
+
+    @property
+    def port_range(self) -> str:
+        return f"{self.base}-{self.base + self.size - 1}"
+
+
+def self_signed_context(directory: Path) -> ssl.SSLContext | None:
+    """
+    Server context with a throwaway self-signed certificate made by the
+    openssl binary, None if openssl is not available
+    """
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    try:
+        subprocess.run(
+            [
+                "openssl",
+                "req",
+                "-x509",
+                "-newkey",
+                "ec",
+                "-pkeyopt",
+                "ec_paramgen_curve:prime256v1",
+                "-nodes",
+                "-days",
+                "1",
+                "-subj",
+                "/CN=portfinder-bench",
+                "-keyout",
+                str(key),
+                "-out",
+                str(cert),
+            ],
+            check=True,
+            capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+class UdpEcho(asyncio.DatagramProtocol):
+    def __init__(self, delay: float = 0.0, silent: bool = False):
+        self.delay = delay
+        self.silent = silent
+        self.transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        if self.silent or self.transport is None:
+            return
+        if self.delay:
+            asyncio.get_running_loop().call_later(self.delay, self.transport.sendto, data, addr)
+        else:
+            self.transport.sendto(data, addr)
+
+
+async def _close(writer: asyncio.StreamWriter) -> None:
+    try:
+        writer.close()
+        await writer.wait_closed()
+    except (OSError, ssl.SSLError):
+        pass
+
+
+async def _handle_tcp(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    await _close(writer)
+
+
+async def _handle_http(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5)
+        writer.write(HTTP_RESPONSE)
+        await writer.drain()
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError, ssl.SSLError):
+        pass
+    finally:
+        await _close(writer)
+
+
+def _slow_tls(context: ssl.SSLContext, delay: float):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await asyncio.sleep(delay)
+            await writer.start_tls(context)
+        except (OSError, ssl.SSLError, ConnectionError):
+            await _close(writer)
+            return
+        await _handle_http(reader, writer)
+
+    return handle
+
+
+def ipv6_available() -> bool:
+    if not socket.has_ipv6:
+        return False
+    try:
+        with socket.socket(socket.AF_INET6, socket.SOCK_STREAM) as sock:
+            sock.bind(("::1", 0))
+    except OSError:
+        return False
+    return True
+
+
+async def serve(layout: ServiceLayout, hosts: list[str], directory: Path) -> list[object]:
+    """
+    Start every service of the layout on every host
+    :param layout: service ports
+    :param hosts: listen addresses, e.g. 127.0.0.1 and ::1
+    :param directory: temporary directory for the certificate
+    :return: started servers and transports
+    """
+    loop = asyncio.get_running_loop()
+    context = self_signed_context(directory)
+    ports = layout.ports()
+    handles: list[object] = []
+    for host in hosts:
+        for port in ports["tcp"]:
+            handles.append(await asyncio.start_server(_handle_tcp, host, port))
+        for port in ports["http"]:
+            handles.append(await asyncio.start_server(_handle_http, host, port))
+        if context is not None:
+            for port in ports["tls"]:
+                handles.append(await asyncio.start_server(_handle_http, host, port, ssl=context))
+            for port in ports["slow_tls"]:
+                handles.append(await asyncio.start_server(_slow_tls(context, layout.latency), host, port))
+        for kind, delay, silent in (
+            ("udp_echo", 0.0, False),
+            ("udp_silent", 0.0, True),
+            ("slow_udp", layout.latency, False),
+        ):
+            for port in ports[kind]:
+                transport, _ = await loop.create_datagram_endpoint(
+                    lambda delay=delay, silent=silent: UdpEcho(delay, silent), local_addr=(host, port)
+                )
+                handles.append(transport)
+    return handles
+
+
+def run_services(layout: ServiceLayout, hosts: list[str], ready, stop) -> None:
+    """
+    Services process entry: serve until stop is set
+    :param layout: service ports
+    :param hosts: listen addresses
+    :param ready: event set when every service listens
+    :param stop: event to stop serving
+    """
+
+    async def main() -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            handles = await serve(layout, hosts, Path(directory))
+            ready.set()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, stop.wait)
+            for handle in handles:
+                handle.close()
+
+    raise_fd_limit()
+    asyncio.run(main())
+
+
+def raise_fd_limit() -> None:
+    """
+    Raise soft open files limit to the hard one
+    """
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
@@ -0,0 +1,123 @@
+"""
+CLI startup benchmark with an import-time budget.
+
+    python -m benchmarks.startup --runs 20 --overhead-ms 65
+
+Measures `import portfinder.cli` with -X importtime and the wall time of a
+one-port quiet CLI scan in fresh interpreters, and checks that modules only
+some scans need are not imported by the entry point.
+The budget is measured on the running machine: import time of the standard
+library modules the CLI cannot avoid (BASELINE) plus the overhead allowed
+for portfinder itself, measured at 42-58 ms over the baseline.
+--budget-ms sets an absolute budget instead.
+Exits with 1 if the median import time is over budget or a deferred module
+was imported.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+# modules the CLI entry point must not import eagerly
+DEFERRED = (
+    "aiofiles",
+    "uvloop",
+    "structlog",
+    "portfinder.utils.tls",
+    "portfinder.utils.checkpoint",
+    "portfinder.utils.connect",
+    "portfinder.utils.discovery",
+    "portfinder.workers",
+)
+
+# standard library the CLI imports in any case, the budget baseline
+BASELINE = ("argparse", "asyncio", "datetime", "ipaddress", "json", "pathlib")
+
+SCAN = ["-m", "portfinder.cli", "-t", "127.0.0.1", "-p", "1", "-P", "tcp", "-T", "0.2", "-q", "-u"]
+
+
+def import_time_us(modules: tuple[str, ...] = ("portfinder.cli",)) -> int:
+    """
+    Cumulative microseconds of importing modules in a fresh interpreter
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    # top level entries only, modules imported by an earlier one are nested in its time
+    found = {
+        name.strip(): int(cumulative)
+        for _, cumulative, name in (line.split("|") for line in stderr.splitlines()[1:])
+        if not name.startswith("  ")
+    }
+    if "portfinder.cli" in modules and "portfinder.cli" not in found:
+        raise RuntimeError("portfinder.cli is missing in -X importtime output")
+    return sum(found.get(module, 0) for module in modules)
+
+
+def deferred_imported() -> list[str]:
+    code = f"import sys, portfinder.cli; print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    stdout = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return [name for name in stdout.strip().split(",") if name]
+
+
+def wall_time_ms(arguments: list[str]) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *arguments], capture_output=True, check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--runs", type=int, default=20, help="Fresh interpreters per measurement (default: 20)")
+    parser.add_argument(
+        "--overhead-ms",
+        type=float,
+        default=65.0,
+        help="Median import time allowed over the measured BASELINE (default: 65)",
+    )
+    parser.add_argument("--budget-ms", type=float, help="Absolute median import time budget, overrides --overhead-ms")
+    parser.add_argument("-o", "--output", help="Report file, stdout if not set")
+    args = parser.parse_args()
+
+    # interleaved, so machine load drifts alike for both
+    imports: list[float] = []
+    baselines: list[float] = []
+    for _ in range(args.runs):
+        imports.append(import_time_us() / 1000)
+        baselines.append(import_time_us(BASELINE) / 1000)
+    baseline = statistics.median(baselines)
+    budget = args.budget_ms if args.budget_ms is not None else baseline + args.overhead_ms
+    scans = [wall_time_ms(SCAN) for _ in range(args.runs)]
+    interpreter = [wall_time_ms(["-c", "pass"]) for _ in range(args.runs)]
+    eager = deferred_imported()
+    median_import = statistics.median(imports)
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "import_ms": {"median": round(median_import, 2), "min": round(min(imports), 2), "max": round(max(imports), 2)},
+        "quiet_scan_ms": {"median": round(statistics.median(scans), 2), "min": round(min(scans), 2)},
+        "interpreter_ms": {"median": round(statistics.median(interpreter), 2)},
+        "baseline_ms": round(baseline, 2),
+        "budget_ms": round(budget, 2),
+        "eager_imports": eager,
+        "ok": median_import <= budget and not eager,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
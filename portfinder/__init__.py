@@ -1,19 +1,55 @@
-from portfinder.dto import (
-    IpVersion,
-    Protocol,
-    Result,
-    ResultFileFormatEnum,
-)
-from portfinder.scanner import Scanner
-from portfinder.utils import (
-    check_http_port,
-    check_https_port,
-    check_tcp_port,
-    check_udp_port,
-    save_result,
+import importlib
+from typing import (
+    TYPE_CHECKING,
+    Any,
 )
 
 
+if TYPE_CHECKING:
+    from portfinder.dto import (
+        ChangeKind,
+        ConnectEngine,
+        IpVersion,
+        ProbeStatus,
+        Protocol,
+        Result,
+        ResultChange,
+        ResultFileFormatEnum,
+        ScanOrder,
+        TlsInfo,
+    )
+    from portfinder.scanner import Scanner
+    from portfinder.utils import (
+        check_http_port,
+        check_https_port,
+        check_tcp_port,
+        check_udp_port,
+        save_result,
+    )
+
+
+# public name -> module, imported on first access (PEP 562),
+# `import portfinder` itself loads nothing
+_EXPORTS = {
+    "Protocol": "portfinder.dto",
+    "IpVersion": "portfinder.dto",
+    "Result": "portfinder.dto",
+    "Scanner": "portfinder.scanner",
+    "check_tcp_port": "portfinder.utils",
+    "check_udp_port": "portfinder.utils",
+    "check_http_port": "portfinder.utils",
+    "check_https_port": "portfinder.utils",
+    "save_result": "portfinder.utils",
+    "ResultFileFormatEnum": "portfinder.dto",
+    "ScanOrder": "portfinder.dto",
+    "ChangeKind": "portfinder.dto",
+    "ResultChange": "portfinder.dto",
+    "ProbeStatus": "portfinder.dto",
+    "ConnectEngine": "portfinder.dto",
+    "TlsInfo": "portfinder.dto",
+}
+
+# literal list, so linters can check the names above
 __all__ = [
     "Protocol",
     "IpVersion",
@@ -25,4 +61,22 @@ __all__ = [
     "check_https_port",
     "save_result",
     "ResultFileFormatEnum",
+    "ScanOrder",
+    "ChangeKind",
+    "ResultChange",
+    "ProbeStatus",
+    "ConnectEngine",
+    "TlsInfo",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if (module := _EXPORTS.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_EXPORTS})
@@ -1,27 +1,277 @@
 import argparse
 import asyncio
+import json
 import sys
+import time
+from datetime import datetime
+from pathlib import Path
 
+from portfinder.dto import (
+    ConnectEngine,
+    ResultFileFormatEnum,
+    ScanOrder,
+)
 from portfinder.scanner import Scanner
+from portfinder.utils import (
+    merge_results,
+    save_result,
+)
 
 
-def parse_args():
-    parser = argparse.ArgumentParser(description="PORTFINDER - Advanced Port Scanner")
-    parser.add_argument("-t", "--target", help="Target IP/CIDR/domain (comma-separated)")
-    parser.add_argument("-f", "--file", help="Target IP/CIDR/domain txt file (new-line-separated)")
+def parse_args(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="PORTFINDER - Advanced Port Scanner",
+        epilog="Commands: 'portfinder merge --help', 'portfinder serve --help', 'portfinder query --help'",
+    )
+    parser.add_argument("-t", "--target", help="Target IP/CIDR/IP range/domain (comma-separated)")
+    parser.add_argument("-f", "--file", help="Target IP/CIDR/IP range/domain txt file (new-line-separated)")
     parser.add_argument("-p", "--ports", default="80,443,53", help="Ports to scan (e.g. '1-1000,3389')")
     parser.add_argument("-P", "--protocol", help="Protocol to check (tcp, udp, http, https)")
     parser.add_argument("-T", "--timeout", type=float, default=2.0, help="Timeout in seconds")
-    parser.add_argument("-c", "--concurrency", type=int, default=1000, help="Maximum concurrent connections per host")
+    parser.add_argument(
+        "--adaptive-timeout",
+        action="store_true",
+        help="Probe timeout from measured RTT per /24 network, --timeout is the initial value and the ceiling",
+    )
+    parser.add_argument(
+        "--min-timeout", type=float, default=0.1, help="Adaptive timeout floor in seconds (default: 0.1)"
+    )
+    parser.add_argument("--retries", type=int, default=0, help="Retries of timed out probes (default: 0)")
+    parser.add_argument(
+        "--engine",
+        choices=[engine.value for engine in ConnectEngine],
+        default=ConnectEngine.ASYNCIO.value,
+        help="TCP connect engine: asyncio streams or raw non-blocking sockets on epoll (Linux)",
+    )
+    parser.add_argument(
+        "--linger", action="store_true", help="Close epoll engine sockets by RST (SO_LINGER 0), no TIME_WAIT"
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=1000, help="Maximum concurrent connections in total")
+    parser.add_argument("--host-concurrency", type=int, help="Maximum concurrent connections per host")
+    parser.add_argument("-tps", "--rate", type=float, help="Maximum probes per second for all protocols")
+    parser.add_argument("--host-rate", type=float, help="Maximum probes per second per host")
+    parser.add_argument(
+        "--order",
+        choices=[order.value for order in ScanOrder],
+        default=ScanOrder.SEQUENTIAL.value,
+        help="Scan order over host x port space (random spreads probes over hosts and ports)",
+    )
+    parser.add_argument("--seed", type=int, help="Random order seed, the same seed repeats the same order")
+    parser.add_argument(
+        "--shard",
+        help="Scan only shard i of N (e.g. '1/4'), shards are disjoint and balanced, random order needs --seed",
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="Worker processes, each runs own event loop over a partition"
+    )
+    parser.add_argument("--checkpoint", help="Scan state file, progress and results are saved periodically")
+    parser.add_argument(
+        "--checkpoint-interval", type=float, default=10.0, help="Seconds between checkpoint saves (default: 10)"
+    )
+    parser.add_argument("--resume", action="store_true", help="Continue the scan from the --checkpoint state file")
+    parser.add_argument(
+        "--baseline", help="Previous JSONL (or JSON) result file: probe its ports first and report changes"
+    )
+    parser.add_argument("--sweep-rate", type=float, help="Maximum probes per second after the baseline ports")
+    parser.add_argument(
+        "--sweep-sample", type=float, help="Share of the remaining space swept after the baseline ports (0-1]"
+    )
+    parser.add_argument(
+        "--discovery", action="store_true", help="Sweep ports only on hosts answering ICMP echo or TCP connects"
+    )
+    parser.add_argument("--discovery-ports", help="Discovery TCP ports (default: 80,443,22,445,3389)")
+    parser.add_argument(
+        "--discovery-timeout", type=float, default=1.0, help="Discovery probe timeout in seconds (default: 1)"
+    )
+    parser.add_argument(
+        "--tls-info", action="store_true", help="Record TLS version, cipher, SNI and certificate of HTTPS ports"
+    )
+    parser.add_argument(
+        "--dns-ttl", type=float, default=300.0, help="Seconds domain addresses are cached (default: 300)"
+    )
+    parser.add_argument(
+        "--banners", action="store_true", help="Grab banners of open TCP ports and fingerprint the service"
+    )
+    parser.add_argument(
+        "--banner-concurrency", type=int, default=50, help="Maximum concurrent banner grabs (default: 50)"
+    )
+    parser.add_argument("--banner-size", type=int, default=1024, help="Maximum banner bytes read (default: 1024)")
+    parser.add_argument("--banner-timeout", type=float, default=2.0, help="Banner read timeout (default: 2)")
+    parser.add_argument(
+        "--progress",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Log a progress line every SECONDS (default: off)",
+    )
+    parser.add_argument("--stats", metavar="FILE", help="Write scan statistics JSON to FILE when the scan ends")
+    parser.add_argument(
+        "--metrics-port", type=int, metavar="PORT", help="Serve Prometheus metrics on 127.0.0.1:PORT during the scan"
+    )
     parser.add_argument("-o", "--outfile", help="Output file path (without extension)")
     parser.add_argument("-j", "--js", action="store_true", help="Output in JSON format")
     parser.add_argument("-jl", "--jsl", action="store_true", help="Output in JSON Lines format")
+    parser.add_argument(
+        "--sqlite", action="store_true", help="Output into SQLite database, every scan is added to the same file"
+    )
     parser.add_argument("-q", "--quiet", action="store_true", help="Disable all stdout output")
     parser.add_argument("-u", "--uvloop_disable", action="store_true", help="Disable uvloop")
-    return parser.parse_args()  # uvloop_enabled
+    parser.add_argument(
+        "--udp-payloads", help="UDP payloads file ('<ports> <name> <hex payload> [<hex response prefix>]' per line)"
+    )
+    return parser.parse_args(argv)  # uvloop_enabled
+
+
+def parse_merge_args(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="portfinder merge", description="Merge per-shard result files into one deduplicated result set"
+    )
+    parser.add_argument("files", nargs="+", help="JSONL (or JSON) result files")
+    parser.add_argument("-o", "--outfile", required=True, help="Output file path (without extension)")
+    parser.add_argument("-j", "--js", action="store_true", help="Output in JSON format")
+    parser.add_argument("-jl", "--jsl", action="store_true", help="Output in JSON Lines format")
+    parser.add_argument("--sqlite", action="store_true", help="Add results to SQLite database as one scan")
+    return parser.parse_args(argv)
+
+
+async def merge(argv: list[str]):
+    args = parse_merge_args(argv)
+    results = await merge_results([Path(file) for file in args.files])
+    if args.js:
+        fformat = ResultFileFormatEnum.JSON
+    elif args.jsl:
+        fformat = ResultFileFormatEnum.JSONL
+    elif args.sqlite:
+        fformat = ResultFileFormatEnum.SQLITE
+    else:
+        fformat = ResultFileFormatEnum.TXT
+    await save_result(Path(args.outfile), fformat, results)
+
+
+def parse_serve_args(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="portfinder serve",
+        description="Run scan jobs from a local HTTP API: POST /jobs, GET /jobs, DELETE /jobs/<id>",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Listen port (default: 8765)")
+    parser.add_argument("--unix", help="Listen on a Unix socket path instead of TCP")
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=500, help="Global concurrency shared by all jobs (default: 500)"
+    )
+    parser.add_argument("--rate", type=float, help="Global probes per second shared by all jobs")
+    parser.add_argument("--dns-ttl", type=float, default=300.0, help="Resolved domain cache seconds (default: 300)")
+    parser.add_argument(
+        "--engine",
+        choices=[engine.value for engine in ConnectEngine],
+        default=ConnectEngine.ASYNCIO.value,
+        help="TCP connect engine (default: asyncio)",
+    )
+    parser.add_argument("--linger", action="store_true", help="Reset connections (SO_LINGER 0) with epoll engine")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not log jobs")
+    return parser.parse_args(argv)
+
+
+async def serve(argv: list[str]):
+    from portfinder.server import ScanServer
+
+    server = ScanServer(**vars(parse_serve_args(argv)))
+    await server.serve_forever()
+
+
+def _since(value: str) -> float:
+    """
+    ISO date or time, or relative '<N>d' / '<N>h' to timestamp
+    """
+    if value[:-1].isdigit() and value[-1] in "dh":
+        return time.time() - int(value[:-1]) * (86400 if value[-1] == "d" else 3600)
+    return datetime.fromisoformat(value).timestamp()
+
+
+def parse_query_args(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="portfinder query",
+        description="Filtered lookups and aggregates over a SQLite result database (see --sqlite)",
+    )
+    parser.add_argument("database", help="SQLite result database")
+    parser.add_argument("--scan", type=int, action="append", help="Scan id, repeatable (default: all scans)")
+    parser.add_argument("--last", action="store_true", help="Only the last scan")
+    parser.add_argument("--since", type=_since, help="Scans started since ISO date/time or '7d', '12h'")
+    parser.add_argument("--host", help="IP/CIDR/domain filter (comma-separated)")
+    parser.add_argument("--port", help="Ports filter (e.g. '443' or '1-1024,3389')")
+    parser.add_argument("--without-port", help="Only hosts without these ports open in the same scan")
+    parser.add_argument("-P", "--protocol", help="Protocol filter (tcp, udp, http, https)")
+    parser.add_argument("--by", choices=["host", "port"], help="Aggregate per host or per port")
+    parser.add_argument("--diff", type=int, nargs=2, metavar=("OLD", "NEW"), help="Changes between two scans")
+    parser.add_argument("--scans", action="store_true", help="List scans")
+    parser.add_argument("-jl", "--jsl", action="store_true", help="Output in JSON Lines format")
+    return parser.parse_args(argv)
+
+
+async def query(argv: list[str]):
+    from portfinder.utils.database import ResultQuery
+
+    args = parse_query_args(argv)
+    results = ResultQuery(Path(args.database))
+    try:
+        if args.scans:
+            for scan in results.scan_list():
+                if args.jsl:
+                    print(json.dumps(scan))
+                else:
+                    started = datetime.fromtimestamp(scan["started"]).isoformat(timespec="seconds")
+                    print(f"#{scan['id']} {started} {scan['results']} results {scan['options'].get('target') or ''}")
+            return
+
+        scans = args.scan or []
+        if args.last and (last := results.last_scan()) is not None:
+            scans.append(last)
+        results.scans(scans, args.since)
+        if args.host:
+            results.hosts(args.host.split(","))
+        if args.port:
+            results.ports(args.port)
+        if args.without_port:
+            results.without_ports(args.without_port)
+        if args.protocol:
+            results.protocol(args.protocol)
+
+        if args.diff:
+            for change in results.changes(*args.diff):
+                print(json.dumps(change.to_dict()) if args.jsl else change)
+        elif args.by == "host":
+            for row in results.by_host():
+                if args.jsl:
+                    print(json.dumps(row))
+                else:
+                    ports = ",".join(map(str, row["port_list"]))
+                    print(f"{row['host']} [{row['ip_version']}] {row['ports']} ports: {ports} (scans: {row['scans']})")
+        elif args.by == "port":
+            for row in results.by_port():
+                if args.jsl:
+                    print(json.dumps(row))
+                else:
+                    protocols = ",".join(row["protocols"])
+                    print(f"{row['port']}: {row['hosts']} hosts ({protocols}) (scans: {row['scans']})")
+        else:
+            for scan_id, result in results.results():
+                print(json.dumps({"scan": scan_id, **result.to_dict()}) if args.jsl else f"#{scan_id} {result}")
+    finally:
+        results.close()
+
+
+COMMANDS = {
+    "merge": merge,
+    "serve": serve,
+    "query": query,
+}
 
 
 async def main():
+    if len(sys.argv) > 1 and (command := COMMANDS.get(sys.argv[1])):
+        await command(sys.argv[2:])
+        return
+
     args = parse_args()
     scanner = Scanner(**vars(args))
     await scanner.cmd_run()
@@ -1,4 +1,9 @@
-from dataclasses import dataclass
+import ipaddress
+from collections.abc import Iterable
+from dataclasses import (
+    asdict,
+    dataclass,
+)
 from enum import StrEnum
 
 
@@ -14,24 +19,264 @@ class Protocol(StrEnum):
     HTTPS = "https"
 
 
+class ScanOrder(StrEnum):
+    SEQUENTIAL = "sequential"
+    RANDOM = "random"
+
+
+class ConnectEngine(StrEnum):
+    ASYNCIO = "asyncio"
+    EPOLL = "epoll"
+
+
+class ProbeStatus(StrEnum):
+    OPEN = "open"
+    REFUSED = "refused"
+    TIMEOUT = "timeout"
+    ERROR = "error"
+
+
+class ChangeKind(StrEnum):
+    OPENED = "opened"
+    CLOSED = "closed"
+    CHANGED = "changed"
+
+
 class ResultFileFormatEnum(StrEnum):
     TXT = "txt"
     JSON = "js"
     JSONL = "jsl"
+    SQLITE = "sqlite"
 
 
 @dataclass
+class TlsInfo:
+    """
+    Negotiated TLS parameters and server certificate summary
+    """
+
+    version: str | None = None
+    cipher: str | None = None
+    sni: str | None = None
+    subject: str | None = None
+    issuer: str | None = None
+    not_after: str | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TlsInfo":
+        return cls(**{key: data.get(key) for key in cls.__dataclass_fields__})
+
+    def to_dict(self):
+        return asdict(self)
+
+    def __str__(self):
+        return f"{self.version} {self.cipher} CN={self.subject} until {self.not_after}"
+
+
+PROTOCOL_FLAGS: dict[Protocol, int] = {proto: 1 << index for index, proto in enumerate(Protocol)}
+_PROTOCOLS_MASK = (1 << len(PROTOCOL_FLAGS)) - 1
+_PACKED_IPV6 = 1 << 6
+_IP_VERSION_IPV6 = 1 << 7
+
+
+def pack_host(host: str) -> tuple[int | str, bool]:
+    """
+    IP address host as int, other hosts unchanged
+    :return: packed host, packed as IPv6
+    """
+    if "%" not in host:
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            pass
+        else:
+            return int(address), address.version == 6
+    return host, False
+
+
+def unpack_host(packed: int | str, ipv6: bool) -> str:
+    if isinstance(packed, str):
+        return packed
+    return str(ipaddress.IPv6Address(packed) if ipv6 else ipaddress.IPv4Address(packed))
+
+
+def pack_protocols(protocols: Iterable[Protocol | str]) -> int:
+    flags = 0
+    for proto in protocols:
+        flags |= PROTOCOL_FLAGS[Protocol(proto)]
+    return flags
+
+
+def unpack_protocols(flags: int) -> list[Protocol]:
+    return [proto for proto, flag in PROTOCOL_FLAGS.items() if flags & flag]
+
+
 class Result:
+    """
+    Found open port. Slotted and compact: IP hosts are packed into int,
+    protocols and IP version into one flags int. Protocols are kept in
+    Protocol order.
+    """
+
+    __slots__ = ("_host", "port", "_flags", "tls", "hostname", "service", "banner")
+    __hash__ = None  # type: ignore[assignment]
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        ip_version: IpVersion,
+        protocols: Iterable[Protocol],
+        tls: TlsInfo | None = None,
+        hostname: str | None = None,
+        service: str | None = None,
+        banner: str | None = None,
+    ):
+        self._flags = 0
+        self.host = host
+        self.port = port
+        self.ip_version = ip_version
+        self.protocols = protocols
+        self.tls = tls
+        self.hostname = hostname
+        self.service = service
+        self.banner = banner
+
+    @classmethod
+    def packed(cls, host: int | str, port: int, flags: int) -> "Result":
+        """
+        Result from packed host and flags, see ResultStore
+        """
+        result = cls.__new__(cls)
+        result._host, result.port, result._flags = host, port, flags
+        result.tls = result.hostname = result.service = result.banner = None
+        return result
+
+    @property
+    def host(self) -> str:
+        return unpack_host(self._host, bool(self._flags & _PACKED_IPV6))
+
+    @host.setter
+    def host(self, value: str) -> None:
+        self._host, ipv6 = pack_host(value)
+        self._flags = self._flags | _PACKED_IPV6 if ipv6 else self._flags & ~_PACKED_IPV6
+
+    @property
+    def ip_version(self) -> IpVersion:
+        return IpVersion.IPV6 if self._flags & _IP_VERSION_IPV6 else IpVersion.IPV4
+
+    @ip_version.setter
+    def ip_version(self, value: IpVersion) -> None:
+        if IpVersion(value) == IpVersion.IPV6:
+            self._flags |= _IP_VERSION_IPV6
+        else:
+            self._flags &= ~_IP_VERSION_IPV6
+
+    @property
+    def protocols(self) -> list[Protocol]:
+        return unpack_protocols(self._flags)
+
+    @protocols.setter
+    def protocols(self, value: Iterable[Protocol]) -> None:
+        self._flags = self._flags & ~_PROTOCOLS_MASK | pack_protocols(value)
+
+    @property
+    def flags(self) -> int:
+        """
+        Protocols and IP version flags
+        """
+        return self._flags
+
+    @property
+    def packed_host(self) -> int | str:
+        return self._host
+
+    @property
+    def packed_ipv6(self) -> bool:
+        """
+        packed_host is an IPv6 address, the same int may be an IPv4 one
+        """
+        return bool(self._flags & _PACKED_IPV6)
+
+    def _key(self) -> tuple:
+        return self._host, self.port, self._flags, self.tls, self.hostname, self.service, self.banner
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Result):
+            return NotImplemented
+        return self._key() == other._key()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Result":
+        """
+        Result from to_dict output, nested protocols lists are flattened
+        """
+        protocols: list[Protocol] = []
+        for item in data.get("protocols", []):
+            for proto in item if isinstance(item, list) else [item]:
+                if Protocol(proto) not in protocols:
+                    protocols.append(Protocol(proto))
+        return cls(
+            host=data["host"],
+            port=int(data["port"]),
+            ip_version=IpVersion(data["ip_version"]),
+            protocols=protocols,
+            tls=TlsInfo.from_dict(data["tls"]) if data.get("tls") else None,
+            hostname=data.get("hostname"),
+            service=data.get("service"),
+            banner=data.get("banner"),
+        )
+
+    def to_dict(self):
+        data = {"host": self.host, "port": self.port, "ip_version": self.ip_version, "protocols": [self.protocols]}
+        if self.tls is not None:
+            data["tls"] = self.tls.to_dict()
+        for key in ("hostname", "service", "banner"):
+            if (value := getattr(self, key)) is not None:
+                data[key] = value
+        return data
+
+    def __str__(self):
+        host = f"{self.hostname}={self.host}" if self.hostname is not None else self.host
+        text = f"{host}:{self.port} [{self.ip_version}] ({','.join(self.protocols)})"
+        if self.service is not None:
+            text = f"{text} {self.service}"
+        if self.banner is not None:
+            text = f'{text} "{self.banner}"'
+        return f"{text} {{{self.tls}}}" if self.tls is not None else text
+
+    def __repr__(self):
+        return self.__str__()
+
+
+@dataclass
+class ResultChange:
+    """
+    Difference of one (host, port) between baseline and current scan
+    """
+
+    kind: ChangeKind
     host: str
     port: int
     ip_version: IpVersion
     protocols: list[Protocol]
+    previous: list[Protocol]
 
     def to_dict(self):
-        return {"host": self.host, "port": self.port, "ip_version": self.ip_version, "protocols": [self.protocols]}
+        return {
+            "change": self.kind,
+            "host": self.host,
+            "port": self.port,
+            "ip_version": self.ip_version,
+            "protocols": self.protocols,
+            "previous": self.previous,
+        }
 
     def __str__(self):
-        return f"{self.host}:{self.port} [{self.ip_version}] ({','.join(self.protocols)})"
+        return (
+            f"{self.kind} {self.host}:{self.port} [{self.ip_version}] "
+            f"({','.join(self.previous)}) -> ({','.join(self.protocols)})"
+        )
 
     def __repr__(self):
         return self.__str__()
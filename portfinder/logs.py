@@ -0,0 +1,22 @@
+from typing import Any
+
+
+class LazyLogger:
+    """
+    structlog logger imported on first use:
+    quiet scans that log nothing never import structlog
+    """
+
+    def __init__(self):
+        self._logger = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._logger is None:
+            import structlog
+
+            self._logger = structlog.get_logger()
+        return getattr(self._logger, name)
+
+
+def get_logger() -> LazyLogger:
+    return LazyLogger()
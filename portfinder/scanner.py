@@ -1,37 +1,96 @@
 import asyncio
-import ipaddress
+import contextvars
+import json
+import math
+import random
 import sys
 from collections.abc import (
     AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
     Coroutine,
 )
-from contextlib import suppress
+from contextlib import (
+    AbstractAsyncContextManager,
+    asynccontextmanager,
+    nullcontext,
+    suppress,
+)
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 from typing import (
+    TYPE_CHECKING,
     Any,
     Callable,
     Optional,
+    TypeVar,
 )
 
-import structlog
-
 from portfinder.dto import (
+    ConnectEngine,
     IpVersion,
+    ProbeStatus,
     Protocol,
     Result,
+    ResultChange,
     ResultFileFormatEnum,
+    ScanOrder,
 )
+from portfinder.logs import get_logger
 from portfinder.utils import (
+    SINGLE_SHARD,
+    STREAM_PROTOCOLS,
+    BannerGrabber,
+    HostRateLimiter,
+    IndexPermutation,
+    PayloadRegistry,
+    ProbeObserver,
+    Resolver,
+    ResultDiff,
+    ResultSink,
+    ResultStore,
+    RttTable,
+    ScanMetrics,
+    Shard,
+    TargetSet,
+    TokenBucket,
+    UdpEngine,
+    WorkSpace,
     check_http_port,
     check_https_port,
+    check_stream_protocols,
     check_tcp_port,
     check_udp_port,
+    current_metrics,
+    load_baseline,
+    open_sink,
+    pair_in_shard,
     read_file,
-    save_result,
+    save_changes,
+    serve_metrics,
 )
 
 
-logger = structlog.get_logger()
+if TYPE_CHECKING:
+    from portfinder.utils.checkpoint import (
+        ScanProgress,
+        ScanState,
+    )
+    from portfinder.utils.connect import EpollConnectEngine
+    from portfinder.utils.discovery import DiscoveryStats
+    from portfinder.utils.tls import TlsProber
+
+
+logger = get_logger()
+
+T = TypeVar("T")
+
+
+@dataclass
+class HostSlot:
+    semaphore: asyncio.Semaphore
+    users: int = 0
 
 
 class Scanner:
@@ -57,9 +116,42 @@ class Scanner:
         file: str | None = None,
         js: bool = False,
         jsl: bool = False,
+        sqlite: bool = False,
         quiet: bool = False,
         uvloop_disable: bool = False,
+        udp_payloads: str | None = None,
+        rate: float | None = None,
+        host_rate: float | None = None,
+        host_concurrency: int | None = None,
+        order: ScanOrder | str = ScanOrder.SEQUENTIAL,
+        seed: int | None = None,
+        shard: Shard | str | None = None,
+        workers: int = 1,
+        checkpoint: str | None = None,
+        resume: bool = False,
+        checkpoint_interval: float = 10.0,
+        baseline: str | None = None,
+        sweep_rate: float | None = None,
+        sweep_sample: float | None = None,
+        discovery: bool = False,
+        discovery_ports: str | None = None,
+        discovery_timeout: float = 1.0,
+        adaptive_timeout: bool = False,
+        min_timeout: float = 0.1,
+        retries: int = 0,
+        engine: ConnectEngine | str = ConnectEngine.ASYNCIO,
+        linger: bool = False,
+        tls_info: bool = False,
+        dns_ttl: float = 300.0,
+        banners: bool = False,
+        banner_concurrency: int = 50,
+        banner_size: int = 1024,
+        banner_timeout: float = 2.0,
+        progress: float = 0.0,
+        stats: str | None = None,
+        metrics_port: int | None = None,
     ):
+        self.options = {key: value for key, value in locals().items() if key != "self"}
         if not any([target, file]):
             raise ValueError("target or file are required")
         self.target = target
@@ -72,14 +164,91 @@ class Scanner:
         self.input_file = file
         self.js = js
         self.jsl = jsl
+        self.sqlite = sqlite
         self.ports = self._parse_ports()
+        self._port_set = frozenset(self.ports)
+        self._targets: TargetSet | None = None
         self.concurrency = concurrency
-        self.semaphore = asyncio.Semaphore(concurrency)
+        self.semaphore: AbstractAsyncContextManager[None] = asyncio.Semaphore(concurrency)
+        self.host_concurrency = host_concurrency
+        self._host_slots: dict[str, HostSlot] = {}
+        self.order = ScanOrder(order)
+        self.shard = Shard.parse(shard) if isinstance(shard, str) else shard or SINGLE_SHARD
+        if self.order == ScanOrder.RANDOM and self.shard.total > 1 and seed is None:
+            raise ValueError("seed is required for random order with shard, every shard must use the same seed")
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.engine = ConnectEngine(engine)
+        self.tls_info = tls_info
+        self._create_engines(linger, dns_ttl)
+        self.hostnames: dict[str, str] = {}
+        self.banner_grabber = BannerGrabber(banner_concurrency, banner_size, banner_timeout) if banners else None
+        self.progress = progress
+        self.stats = stats
+        self.metrics_port = metrics_port
+        self.metrics = ScanMetrics()
+        self.udp_payloads_file = udp_payloads
+        self.udp_payloads = PayloadRegistry()
+        self.rate = rate
+        self.host_rate = host_rate
+        self.rate_limiter = TokenBucket(rate) if rate else None
+        self.host_rate_limiter = HostRateLimiter(host_rate) if host_rate else None
+        self.workers = max(1, workers)
+        if resume and checkpoint is None:
+            raise ValueError("checkpoint file is required to resume")
+        if checkpoint is not None and self.workers > 1:
+            raise ValueError("checkpoint is not supported with multiple workers, use shards per process")
+        self.checkpoint = Path(checkpoint) if checkpoint is not None else None
+        self.resume = resume
+        self.checkpoint_interval = checkpoint_interval
+        if baseline is None and (sweep_rate or sweep_sample is not None):
+            raise ValueError("sweep rate and sample are options of the baseline rescan")
+        if baseline is not None and checkpoint is not None:
+            raise ValueError("checkpoint is not supported with baseline rescan")
+        if sweep_sample is not None and not 0 < sweep_sample <= 1:
+            raise ValueError("sweep sample must be in (0, 1]")
+        self.baseline = Path(baseline) if baseline is not None else None
+        self.sweep_rate = sweep_rate
+        self.sweep_sample = sweep_sample
+        self._baseline: dict[tuple[str, int], Result] | None = None
+        if discovery and checkpoint is not None:
+            raise ValueError("checkpoint is not supported with host discovery, alive hosts may change on resume")
+        self.discovery = discovery
+        self.discovery_ports: list[int] = []
+        if discovery:
+            from portfinder.utils.discovery import DISCOVERY_PORTS
+
+            self.discovery_ports = self._parse_ports(discovery_ports or DISCOVERY_PORTS)
+        self.discovery_timeout = discovery_timeout
+        self.discovery_stats: "DiscoveryStats | None" = None
+        self.retries = max(0, retries)
+        self.rtt = RttTable(timeout, min(min_timeout, timeout), timeout) if adaptive_timeout else None
+        self._seed_given = seed is not None
         self.quiet = quiet
         self.uvloop_disable = uvloop_disable
 
         self._print_banner()
 
+    def _create_engines(self, linger: bool, dns_ttl: float) -> None:
+        """
+        UDP and connect engines, TLS prober and resolver of the scan,
+        only the ones its engine and protocols use are imported
+        :param linger: close epoll engine sockets by RST
+        :param dns_ttl: resolver cache TTL
+        :return:
+        """
+        self.udp_engine = UdpEngine()
+        self.connect_engine: "EpollConnectEngine | None" = None
+        if self.engine == ConnectEngine.EPOLL:
+            from portfinder.utils.connect import EpollConnectEngine
+
+            self.connect_engine = EpollConnectEngine(linger)
+        self.tls: "TlsProber | None" = None
+        if Protocol.HTTPS in self.protocols:
+            from portfinder.utils.tls import TlsProber
+
+            self.tls = TlsProber(capture=self.tls_info)
+        self.resolver = Resolver(dns_ttl, concurrency=min(self.concurrency, 256))
+
     async def _ensure_uvloop(self):
         """
         Init uvloop for Darwin or Linux if needed
@@ -101,6 +270,8 @@ class Scanner:
             return ResultFileFormatEnum.JSON
         elif self.jsl:
             return ResultFileFormatEnum.JSONL
+        elif self.sqlite:
+            return ResultFileFormatEnum.SQLITE
 
         return ResultFileFormatEnum.TXT
 
@@ -108,7 +279,7 @@ class Scanner:
     def proto_call_mapping(self) -> dict[Protocol, Callable[..., Coroutine[Any, Any, bool]]]:
         return {
             Protocol.TCP: check_tcp_port,
-            Protocol.UDP: check_udp_port,
+            Protocol.UDP: partial(check_udp_port, engine=self.udp_engine, payloads=self.udp_payloads),
             Protocol.HTTP: check_http_port,
             Protocol.HTTPS: check_https_port,
         }
@@ -117,82 +288,229 @@ class Scanner:
         if not self.quiet:
             logger.info(self.__BANNER)
             logger.info(
-                "\nTarget: %s \nPorts: %s\nProtocols: %s\nConcurrency: %s\n %s",
+                "\nTarget: %s \nPorts: %s\nProtocols: %s\nConcurrency: %s (per host: %s)\nRate: %s\nOrder: %s\nShard: %s\nTimeout: %s\nEngine: %s\nWorkers: %s\nBaseline: %s\nDiscovery: %s\n %s",
                 self.target or self.input_file,
                 self._ports,
                 [i.value for i in self.protocols],
                 self.concurrency,
+                self.host_concurrency or "unlimited",
+                f"{self.rate}/s" if self.rate else "unlimited",
+                self.order if self.order == ScanOrder.SEQUENTIAL else f"{self.order} (seed {self.seed})",
+                self.shard,
+                (
+                    f"adaptive {self.rtt.floor}-{self.timeout}s, retries {self.retries}"
+                    if self.rtt is not None
+                    else f"{self.timeout}s, retries {self.retries}"
+                ),
+                (
+                    f"{self.engine} (linger)"
+                    if self.connect_engine is not None and self.connect_engine.linger
+                    else self.engine
+                ),
+                self.workers,
+                self.baseline or "-",
+                f"ports {self.discovery_ports}, timeout {self.discovery_timeout}s" if self.discovery else "off",
                 "=" * 70,
             )
 
-    def _parse_ports(self) -> list[int]:
+    def _parse_ports(self, value: str | None = None) -> list[int]:
         """
         Prepare ports from command parameters
+        :param value: ports string, self._ports if None
         :return:
         """
         ports: set[int] = set()
-        for port in self._ports.split(","):
+        for port in (value or self._ports).split(","):
             if "-" in port:
                 start, end = map(int, port.split("-"))
                 ports.update(range(start, end + 1))
             else:
                 ports.add(int(port))
-        return sorted(ports)
+        return sorted(port for port in ports if port <= 65535)
 
-    async def _process_target(self, target: str) -> AsyncGenerator[str, None]:
+    async def load_targets(self) -> TargetSet:
         """
-        Internal generator for one target processing (IP or CIDR)
-        return AsyncGenerator string
+        Collect targets from the input file and target parameter
+        into one merged and deduplicated TargetSet.
+        return TargetSet
         """
-        if "/" in target:
-            try:
-                network = ipaddress.ip_network(target, strict=False)
-                for ip in network.hosts():
-                    yield str(ip)
-                    await asyncio.sleep(0.1)
-            except ValueError:
-                return
-        else:
-            yield target
-            await asyncio.sleep(0.1)
+        items: list[str] = []
+        if self.input_file is not None:
+            async for line in read_file(Path(self.input_file)):
+                items.extend(line.split(","))
+
+        if self.target is not None:
+            items.extend(self.target.replace(" ", "").split(","))
+
+        return TargetSet.from_targets(items)
+
+    async def resolve_targets(self, targets: TargetSet) -> TargetSet:
+        """
+        Replace domains by all their A and AAAA addresses, resolved once
+        and concurrently, so probes receive only literal IPs.
+        The domain of every address is kept in self.hostnames.
+        :param targets: loaded targets
+        :return: TargetSet without domains
+        """
+        if not targets.domains:
+            return targets
+
+        resolved = await self.resolver.resolve_all(targets.domains)
+        addresses: list[str] = []
+        for name, items in resolved.items():
+            for address in items:
+                self.hostnames.setdefault(address, name)
+            addresses.extend(items)
+        failed = [name for name, items in resolved.items() if not items]
+        if not self.quiet:
+            await logger.ainfo(
+                "DNS: %s names resolved to %s addresses, %s failed %s",
+                len(resolved) - len(failed),
+                len(set(addresses)),
+                len(failed),
+                failed[:10],
+            )
+        return TargetSet([*targets.ranges, *TargetSet.from_targets(addresses).ranges])
+
+    async def scan_targets(self) -> TargetSet:
+        """
+        Targets of the port sweep: loaded targets with resolved domains,
+        only alive ones with the discovery pre-pass
+        return TargetSet
+        """
+        targets = await self.resolve_targets(await self.load_targets())
+        if self.discovery:
+            from portfinder.utils.discovery import HostDiscovery
+
+            discovery = HostDiscovery(
+                self.discovery_ports, self.discovery_timeout, self.concurrency, throttle=self._throttle
+            )
+            targets = await discovery.discover(targets)
+            self.discovery_stats = discovery.stats
+            if not self.quiet:
+                await logger.ainfo("Discovery: %s", discovery.stats)
+        self._targets = targets
+        return targets
+
+    def covers(self, host: str, port: int) -> bool:
+        """
+        (host, port) is in the scope of this scan: scan targets and ports,
+        valid once targets are loaded
+        """
+        return self._targets is not None and port in self._port_set and host in self._targets
 
     async def get_targets(self) -> AsyncGenerator[str, None]:
         """
-        Prepare targets IPs by subnet CIDR or simple ip return.
-        return AsyncGenerator IP from _process_target wrapper function
+        Prepare targets IPs by subnet CIDR, IP range or simple ip return.
+        Hosts are expanded lazily from integer ranges, the consumer
+        provides backpressure.
+        return AsyncGenerator IP or domain
         """
-        if self.input_file is not None:
-            async for line in read_file(Path(self.input_file)):
-                for target in line.strip().split(","):
-                    async for ip in self._process_target(target):
-                        yield ip
+        for host in await self.load_targets():
+            yield host
 
-        if self.target is not None:
-            for target in self.target.replace(" ", "").split(","):
-                async for ip in self._process_target(target):
-                    yield ip
+    async def _throttle(self, host: str) -> None:
+        """
+        Wait for global and per-host rate limit tokens before one probe
+        :param host: probe target host
+        :return:
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        if self.host_rate_limiter is not None:
+            await self.host_rate_limiter.acquire(host)
 
     async def scan_service(
         self, host: str, port: int, protocols: list[Protocol], ip_version: IpVersion = IpVersion.IPV4
     ) -> Optional[Result]:
         """
         Call scan request by special or every protocol item
-        and log if self.quiet.
+        and log if not self.quiet. TCP, HTTP and HTTPS share one
+        probe pipeline, other protocols use proto_call_mapping.
         :param host: port string item
         :param port: port integer item
         :param protocols: any from Protocol
         :param ip_version: any from IpVersion
         :return:
         """
-        result = Result(host=host, port=port, ip_version=ip_version, protocols=[])
+        found: list[Protocol] = []
+        if not STREAM_PROTOCOLS.isdisjoint(protocols):
+            found.extend(
+                await self._probe(
+                    host,
+                    lambda timeout, observe: check_stream_protocols(
+                        host,
+                        port,
+                        protocols,
+                        self.timeout,
+                        connect_timeout=timeout,
+                        observe=observe,
+                        engine=self.connect_engine,
+                        tls=self.tls,
+                        server_hostname=self.hostnames.get(host),
+                    ),
+                )
+            )
+
         for proto in protocols:
+            if proto in STREAM_PROTOCOLS:
+                continue
             if call := self.proto_call_mapping.get(proto):
-                if await call(host, port, self.timeout):
-                    result.protocols.append(proto)
-                    if not self.quiet:
-                        await logger.ainfo(result)
+                if await self._probe(host, lambda timeout, observe: call(host, port, timeout, observe=observe)):
+                    found.append(proto)
+
+        if not found:
+            return None
 
-        return result if result.protocols else None
+        result = Result(
+            host=host,
+            port=port,
+            ip_version=ip_version,
+            protocols=[proto for proto in protocols if proto in found],
+            tls=(
+                self.tls.info(host, port)
+                if self.tls is not None and self.tls_info and Protocol.HTTPS in found
+                else None
+            ),
+            hostname=self.hostnames.get(host),
+        )
+        if not self.quiet and not self._wants_banner(result):
+            await logger.ainfo(result)
+        return result
+
+    def probe_timeout(self, host: str, attempt: int = 0) -> float:
+        """
+        Probe timeout: static timeout or the host network RTT estimate,
+        doubled for every retry and capped by timeout
+        :param host: probe target host
+        :param attempt: zero-based attempt number
+        :return:
+        """
+        if self.rtt is None:
+            return self.timeout
+        return min(self.timeout, self.rtt.timeout(host) * 2**attempt)
+
+    async def _probe(self, host: str, probe: Callable[[float, ProbeObserver], Awaitable[T]]) -> T:
+        """
+        Run one throttled probe, retry while it times out.
+        Answered probes (open or refused) feed the RTT estimator.
+        :param host: probe target host
+        :param probe: coroutine function of (timeout, observer)
+        :return: last probe outcome
+        """
+        for attempt in range(self.retries + 1):
+            statuses: list[ProbeStatus] = []
+
+            def observe(status: ProbeStatus, elapsed: float, statuses: list[ProbeStatus] = statuses) -> None:
+                statuses.append(status)
+                if self.rtt is not None and status in (ProbeStatus.OPEN, ProbeStatus.REFUSED):
+                    self.rtt.observe(host, elapsed)
+
+            await self._throttle(host)
+            outcome = await probe(self.probe_timeout(host, attempt), observe)
+            if outcome or ProbeStatus.TIMEOUT not in statuses:
+                break
+        return outcome
 
     async def scan_port(self, host: str, port: int) -> Optional[Result]:
         """
@@ -200,65 +518,442 @@ class Scanner:
         with semaphore.
         """
         ip_version = IpVersion.IPV6 if ":" in host else IpVersion.IPV4
+        async with self._host_slot(host), self.semaphore:
+            self.metrics.port_started()
+            try:
+                result = await self.scan_service(host, port, self.protocols, ip_version)
+            except BaseException:
+                self.metrics.port_stopped()
+                raise
+            self.metrics.port_done(result is not None)
+        return result
+
+    def _wants_banner(self, result: Result) -> bool:
+        """
+        Banners are enabled and the result is open on a plaintext protocol
+        """
+        return self.banner_grabber is not None and self.banner_grabber.wants(result.protocols)
+
+    async def grab_banner(self, result: Result) -> None:
+        """
+        Fill service and banner of a found result, bounded
+        by the grabber concurrency
+        :param result: found Result
+        :return:
+        """
+        if self.banner_grabber is not None:
+            result.service, result.banner = await self.banner_grabber.grab(result.host, result.port)
+        if not self.quiet:
+            await logger.ainfo(result)
+
+    async def _grab_and_put(self, result: Result, results: asyncio.Queue[Result | None]) -> None:
+        """
+        Grab task of one result, the result is pushed once its banner is known
+        """
+        await self.grab_banner(result)
+        await results.put(result)
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str) -> AsyncIterator[None]:
+        """
+        Per-host concurrency limit, taken before the global semaphore
+        so a saturated host never holds global slots.
+        Host semaphores live only while the host has probes.
+        :param host: probe target host
+        :return:
+        """
+        if self.host_concurrency is None:
+            yield
+            return
+
+        if (slot := self._host_slots.get(host)) is None:
+            slot = self._host_slots[host] = HostSlot(asyncio.Semaphore(self.host_concurrency))
+        slot.users += 1
         try:
-            async with self.semaphore:
-                return await self.scan_service(host, port, self.protocols, ip_version)
-        except asyncio.CancelledError:
-            pass
+            async with slot.semaphore:
+                yield
+        finally:
+            slot.users -= 1
+            if not slot.users:
+                del self._host_slots[host]
 
-        return None
+    @property
+    def interleave_width(self) -> int:
+        """
+        Hosts scanned side by side, enough to fill the global
+        concurrency when every host is capped by host_concurrency
+        """
+        if self.host_concurrency is None:
+            return 1
+        return max(1, math.ceil(self.concurrency / self.host_concurrency))
 
-    async def run(self) -> list[Result]:
+    def _fingerprint(self) -> str:
+        """
+        Fingerprint of parameters defining the scan sequence,
+        a checkpoint is resumable only with the same one
         """
-        Run asynchronously scan port scan as completed and return result
+        input_file = None
+        if self.input_file is not None and (path := Path(self.input_file)).exists():
+            stat = path.stat()
+            input_file = [str(path.resolve()), stat.st_size, stat.st_mtime_ns]
+        from portfinder.utils.checkpoint import scan_fingerprint
+
+        return scan_fingerprint(
+            target=self.target,
+            input_file=input_file,
+            ports=self.ports,
+            protocols=self.protocols,
+            order=self.order,
+            seed=self.seed,
+            shard=list(self.shard),
+            width=self.interleave_width,
+        )
+
+    async def _load_progress(self) -> "ScanProgress":
+        """
+        Fresh progress or progress restored from the checkpoint on resume
+        """
+        from portfinder.utils.checkpoint import (
+            ScanProgress,
+            ScanState,
+        )
+
+        if self.resume and self.checkpoint is not None and self.checkpoint.exists():
+            state = await ScanState.load(self.checkpoint)
+            if not self._seed_given:
+                self.seed = state.seed
+            if state.fingerprint != self._fingerprint():
+                raise ValueError(f"Checkpoint {self.checkpoint} does not match scan parameters")
+        else:
+            state = ScanState(self._fingerprint(), self.seed)
+        return ScanProgress(state, self.shard.total, keep_results=self.checkpoint is not None)
+
+    async def _load_baseline(self) -> dict[tuple[str, int], Result]:
+        """
+        Baseline results of the whole scan, loaded once.
+        The sweep of every shard skips all of them, see _owned_baseline.
+        """
+        if self._baseline is None:
+            self._baseline = await load_baseline(self.baseline) if self.baseline is not None else {}
+        return self._baseline
+
+    async def _owned_baseline(self) -> dict[tuple[str, int], Result]:
+        """
+        Baseline results the shard probes first and compares,
+        each baseline pair is owned by one shard, see pair_in_shard
+        """
+        baseline = await self._load_baseline()
+        return {key: result for key, result in baseline.items() if pair_in_shard(*key, self.shard)}
+
+    def _sampled(self, size: int) -> Callable[[int], bool]:
+        """
+        Stable sweep sample: a position is kept if its seeded permutation
+        index falls below the sampled share of the space
+        :param size: scan space size
+        :return: predicate by position
+        """
+        if self.sweep_sample is None or self.sweep_sample >= 1:
+            return lambda position: True
+        permutation = IndexPermutation(size, self.seed ^ 0x5A5A5A5A)
+        limit = math.ceil(size * self.sweep_sample)
+        return lambda position: permutation[position] < limit
+
+    def _remaining(self, workspace: WorkSpace, state: "ScanState") -> int:
+        """
+        Sweep items left in the shard, for progress and ETA:
+        sampled share of the shard minus positions done before resume
+        """
+        number, total = workspace.shard
+        done = max(0, -(-(state.position - number) // total)) + len(state.done)
+        return max(0, math.ceil(workspace.shard_size * (self.sweep_sample or 1)) - done)
+
+    async def _produce(
+        self, queue: asyncio.Queue[tuple[int, str, int] | None], workers: int, progress: "ScanProgress"
+    ) -> None:
+        """
+        Feed (position, host, port) items into the bounded work queue.
+        Targets are expanded lazily, so the producer blocks on a full queue
+        instead of materializing the whole host x port space.
+        The sequence is interleaved by host_concurrency or randomized
+        by order, see WorkSpace. Positions done before resume are skipped.
+        With baseline the pairs of the shard inside the scan targets and
+        ports are probed first, then the rest of the space is swept at
+        sweep_rate (capped by rate), optionally sampled. The sweep skips
+        baseline pairs of other shards too, they are probed by their owner.
+        :param queue: bounded work queue shared with workers
+        :param workers: number of workers to stop when targets are exhausted
+        :param progress: scan progress
+        :return:
+        """
+        try:
+            workspace = WorkSpace(
+                await self.scan_targets(), self.ports, self.interleave_width, self.order, self.seed, self.shard
+            )
+            baseline = await self._load_baseline()
+            # baseline pairs outside of the targets and ports of this scan are not probed
+            pairs = [(host, port) for host, port in await self._owned_baseline() if self.covers(host, port)]
+            if pairs:
+                for host, port in pairs:
+                    await queue.put((-1, host, port))
+                await queue.join()
+                if self.sweep_rate:
+                    # --rate stays the global ceiling of the sweep
+                    self.rate_limiter = TokenBucket(min(self.rate, self.sweep_rate) if self.rate else self.sweep_rate)
+
+            self.metrics.total = len(pairs) + self._remaining(workspace, progress.state)
+            sampled = self._sampled(workspace.size)
+            for item in workspace.walk(progress.state.position):
+                position, host, port = item
+                if (host, port) in baseline or not sampled(position):
+                    continue
+                if progress.dispatch(position):
+                    await queue.put(item)
+        finally:
+            for _ in range(workers):
+                await queue.put(None)
+
+    async def _work(
+        self,
+        queue: asyncio.Queue[tuple[int, str, int] | None],
+        results: asyncio.Queue[Result | None],
+        progress: "ScanProgress",
+        grabs: set[asyncio.Task],
+    ) -> None:
+        """
+        Worker loop: pull items from the work queue until the stop marker
+        and push every found Result to the results queue.
+        Banner grabs run as separate tasks, so the worker goes on
+        to the next item while the grab waits for the port to talk.
+        :param queue: bounded work queue
+        :param results: found results queue
+        :param progress: scan progress
+        :param grabs: running banner grab tasks
+        :return:
+        """
+        while (item := await queue.get()) is not None:
+            position, host, port = item
+            result = await self.scan_port(host, port)
+            progress.complete(position, result)
+            queue.task_done()
+            if result is None:
+                continue
+            if self._wants_banner(result):
+                grab = asyncio.create_task(self._grab_and_put(result, results))
+                grabs.add(grab)
+                grab.add_done_callback(grabs.discard)
+            else:
+                await results.put(result)
+
+    async def _supervise(
+        self, tasks: list[asyncio.Task], results: asyncio.Queue[Result | None], grabs: set[asyncio.Task]
+    ) -> None:
+        """
+        Wait for producer, workers and then banner grabs they started,
+        then close the results queue.
+        The first failure cancels the remaining tasks and is re-raised.
+        """
+        try:
+            await asyncio.gather(*tasks)
+            await asyncio.gather(*grabs)
+        except BaseException:
+            for task in (*tasks, *grabs):
+                task.cancel()
+            raise
+        finally:
+            await results.put(None)
+
+    async def stream(self) -> AsyncGenerator[Result, None]:
+        """
+        Run scan with a bounded producer/worker pool and yield every
+        Result as soon as it is found.
+        Memory usage is O(concurrency) regardless of the targets size.
+        With workers > 1 the scan is partitioned over worker processes.
+        Metrics monitors (progress line, stats file, Prometheus endpoint)
+        run for the whole scan.
+        return AsyncGenerator Result
         """
         await self._ensure_uvloop()
-        results: list[Result] = []
-        for future in asyncio.as_completed(
-            [self.scan_port(host, port) async for host in self.get_targets() for port in self.ports if port <= 65535]
-        ):
-            if result := await future:
-                results.append(result)
+        self.metrics = ScanMetrics()
+        monitors = await self._start_monitors()
+        try:
+            if self.workers > 1:
+                from portfinder.workers import stream_workers
+
+                async for result in stream_workers(self, await self.scan_targets()):
+                    if not self.quiet:
+                        await logger.ainfo(result)
+                    yield result
+            else:
+                async for result in self._stream_pool():
+                    yield result
+        finally:
+            await self._stop_monitors(monitors)
 
-        return results
+    async def _stream_pool(self) -> AsyncGenerator[Result, None]:
+        """
+        Scan in this process, pool tasks record probes into self.metrics
+        """
+        if self.udp_payloads_file is not None:
+            await self.udp_payloads.load_file(Path(self.udp_payloads_file))
+        progress = await self._load_progress()
+        for restored in progress.restored:
+            yield restored
+
+        context = contextvars.copy_context()
+        context.run(current_metrics.set, self.metrics)
+        pool_size = max(1, self.concurrency)
+        queue: asyncio.Queue[tuple[int, str, int] | None] = asyncio.Queue(maxsize=pool_size * 2)
+        results: asyncio.Queue[Result | None] = asyncio.Queue()
+        grabs: set[asyncio.Task] = set()
+        tasks = [asyncio.create_task(self._produce(queue, pool_size, progress), context=context)]
+        tasks.extend(
+            asyncio.create_task(self._work(queue, results, progress, grabs), context=context) for _ in range(pool_size)
+        )
+        supervisor = asyncio.create_task(self._supervise(tasks, results, grabs))
+        if self.checkpoint is not None:
+            from portfinder.utils.checkpoint import write_checkpoints
+
+            checkpoints = asyncio.create_task(write_checkpoints(progress, self.checkpoint, self.checkpoint_interval))
+            supervisor.add_done_callback(lambda _: checkpoints.cancel())
+        completed = False
+        try:
+            while (result := await results.get()) is not None:
+                yield result
+            await supervisor
+            completed = True
+        finally:
+            for task in (*tasks, *grabs, supervisor):
+                task.cancel()
+            self.close()
+            if self.checkpoint is not None:
+                await self._finish_checkpoint(progress, completed)
+
+    def close(self) -> None:
+        """
+        Close UDP and connect engines, called when the scan ends
+        """
+        self.udp_engine.close()
+        if self.connect_engine is not None:
+            self.connect_engine.close()
+
+    async def _report_progress(self) -> None:
+        """
+        Log progress line every self.progress seconds until cancelled
+        """
+        while True:
+            await asyncio.sleep(self.progress)
+            await logger.ainfo("Progress: %s", self.metrics.progress_line())
+
+    async def _start_monitors(self) -> tuple[asyncio.Task | None, asyncio.Server | None]:
+        reporter = None
+        if self.progress and not self.quiet:
+            reporter = asyncio.create_task(self._report_progress())
+        server = None
+        if self.metrics_port is not None:
+            server = await serve_metrics(lambda: self.metrics, self.metrics_port)
+        return reporter, server
+
+    async def _stop_monitors(self, monitors: tuple[asyncio.Task | None, asyncio.Server | None]) -> None:
+        """
+        Stop monitors, log the last progress line and save the stats report
+        """
+        reporter, server = monitors
+        if reporter is not None:
+            reporter.cancel()
+            await logger.ainfo("Progress: %s", self.metrics.progress_line())
+        if server is not None:
+            server.close()
+        if self.stats is not None:
+            import aiofiles
+
+            async with aiofiles.open(self.stats, "w") as f:
+                await f.write(json.dumps(self.metrics.snapshot(), indent=2))
+
+    async def _finish_checkpoint(self, progress: "ScanProgress", completed: bool) -> None:
+        """
+        Remove checkpoint of a completed scan, save final state otherwise
+        """
+        if self.checkpoint is None:
+            return
+        if completed:
+            self.checkpoint.unlink(missing_ok=True)
+        else:
+            await progress.snapshot().save(self.checkpoint)
+
+    async def run(self) -> list[Result]:
+        """
+        Run asynchronously port scan and return all found results
+        """
+        return [result async for result in self.stream()]
 
     async def cmd_run(self):
         """
         Wrapper for run scan with result saving and
         suppress exceptions for cancellation, KeyboardInterrupt and any Runtime
-        from cli command running
+        from cli command running.
+        Results are appended to the output file as soon as they are found.
+        With baseline the changes are reported after the scan, closed
+        ports only if the scan completed.
+        Results found before a worker failure are still reported.
         :return:
+        :raises WorkerError: worker process failed
         """
-        with suppress(asyncio.CancelledError, KeyboardInterrupt, RuntimeError):
-            results = await self.run()
-            if self.outfile:
-                await self._save_results(results)
+        results = ResultStore()
+        changes: list[ResultChange] = []
+        diff = (
+            ResultDiff(await self._owned_baseline(), self.protocols, self.covers) if self.baseline is not None else None
+        )
+        completed = False
+        try:
+            with suppress(asyncio.CancelledError, KeyboardInterrupt, RuntimeError):
+                async with self._open_sink() as sink:
+                    async for result in self.stream():
+                        if sink is not None:
+                            await sink.write(result)
+                        if not self.quiet:
+                            results.append(result)
+                        if diff is not None and (change := diff.observe(result)):
+                            changes.append(change)
+                completed = True
+        finally:
             if not self.quiet:
                 await self._print_results(results)
+            if diff is not None:
+                if completed:
+                    changes.extend(diff.closed())
+                await self._report_changes(changes)
 
-    async def _print_results(self, results: list[Result]) -> None:
+    async def _report_changes(self, changes: list[ResultChange]) -> None:
         """
-        Return result in stdout
-        :param results: list of Result
+        Save changes next to the output file and print them
+        :param changes: list of ResultChange
         :return:
         """
-        hosts: dict[str, list[Result]] = dict()
-        for res in results:
-            if res.host not in hosts:
-                hosts[res.host] = []
-            hosts[res.host].append(res)
+        if self.outfile is not None:
+            await save_changes(Path(self.outfile), changes)
+        if not self.quiet:
+            await logger.ainfo("\nChanges since %s | %s found", self.baseline, len(changes))
+            for change in changes:
+                await logger.ainfo(str(change))
 
-        for host, host_results in hosts.items():
-            await logger.ainfo("\nResults for %s | %s ports found", host, len(host_results))
-            for res in host_results:
-                await logger.ainfo(str(res))
+    def _open_sink(self) -> AbstractAsyncContextManager[ResultSink | None]:
+        """
+        Result sink for the output file or no-op context without outfile
+        """
+        if self.outfile is None:
+            return nullcontext()
+        if self.result_format == ResultFileFormatEnum.SQLITE:
+            scan = {key: value for key, value in self.options.items() if value is not None and value is not False}
+            return open_sink(Path(self.outfile), self.result_format, scan={**scan, "seed": self.seed})
+        return open_sink(Path(self.outfile), self.result_format)
 
-    async def _save_results(self, results: list[Result]) -> None:
+    async def _print_results(self, results: ResultStore) -> None:
         """
-        Saves results to a TXT, JSON or JSONL file.
-        :param results: list of Result
+        Return result in stdout
+        :param results: ResultStore
         :return:
         """
-        if self.outfile is not None:
-            output_path: Path = Path(self.outfile)
-            await save_result(output_path, self.result_format, results)
+        for host, host_results in results.group_by_host():
+            await logger.ainfo("\nResults for %s | %s ports found", host, len(host_results))
+            for res in host_results:
+                await logger.ainfo(str(res))
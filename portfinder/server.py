@@ -0,0 +1,357 @@
+import asyncio
+import itertools
+import json
+import time
+from contextlib import aclosing
+from dataclasses import (
+    dataclass,
+    field,
+)
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+)
+
+from portfinder.dto import (
+    ConnectEngine,
+    Protocol,
+)
+from portfinder.logs import get_logger
+from portfinder.scanner import Scanner
+from portfinder.utils import (
+    EpollConnectEngine,
+    FairScheduler,
+    Resolver,
+    Shard,
+    TokenBucket,
+    UdpEngine,
+)
+
+
+if TYPE_CHECKING:
+    from portfinder.utils.tls import TlsProber
+
+
+logger = get_logger()
+
+_NUMBER = (int, float)
+
+# Scanner options a job may set with their JSON types, global budgets and files belong to the server
+JOB_OPTIONS: dict[str, tuple[type, ...]] = {
+    "target": (str,),
+    "ports": (str,),
+    "protocol": (str, type(None)),
+    "timeout": _NUMBER,
+    "concurrency": (int,),
+    "host_concurrency": (int, type(None)),
+    "host_rate": (*_NUMBER, type(None)),
+    "order": (str,),
+    "seed": (int, type(None)),
+    "shard": (str, type(None)),
+    "adaptive_timeout": (bool,),
+    "min_timeout": _NUMBER,
+    "retries": (int,),
+    "discovery": (bool,),
+    "discovery_ports": (str, type(None)),
+    "discovery_timeout": _NUMBER,
+    "tls_info": (bool,),
+    "banners": (bool,),
+    "banner_concurrency": (int,),
+    "banner_size": (int,),
+    "banner_timeout": _NUMBER,
+}
+
+MAX_BODY = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+def check_job_options(options: dict[str, Any]) -> None:
+    """
+    Check names and JSON types of job options, a bool is not a number
+    :raises ValueError: unsupported option or wrong type
+    """
+    if unknown := set(options) - set(JOB_OPTIONS):
+        raise ValueError(f"Unsupported job options: {', '.join(sorted(unknown))}")
+    for name, value in options.items():
+        types = JOB_OPTIONS[name]
+        if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+            expected = " or ".join("null" if kind is type(None) else kind.__name__ for kind in types)
+            raise ValueError(f"Invalid job option {name}: expected {expected}, got {json.dumps(value)}")
+    if isinstance(shard := options.get("shard"), str):
+        Shard.parse(shard)
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class JobScanner(Scanner):
+    """
+    Scanner of one server job: probes take slots of the shared fair
+    scheduler and rate budget and use the warm resolver, TLS sessions,
+    UDP and connect engines of the server, which outlive the job.
+    """
+
+    def __init__(self, server: "ScanServer", job: int, **options: Any):
+        options.setdefault("concurrency", server.concurrency)
+        self.server = server
+        super().__init__(**options, quiet=True, uvloop_disable=True, engine=server.engine)
+        self.semaphore = server.scheduler.share(job)
+        self.rate_limiter = server.rate_limiter
+
+    def _create_engines(self, linger: bool, dns_ttl: float) -> None:
+        """
+        Shared engines of the server, none are created per job
+        """
+        self.udp_engine = self.server.udp_engine
+        self.connect_engine = self.server.connect_engine
+        self.tls = self.server.tls if Protocol.HTTPS in self.protocols else None
+        self.resolver = self.server.resolver
+
+    def close(self) -> None:
+        """
+        Shared engines are closed by the server
+        """
+
+
+@dataclass
+class Job:
+    id: int
+    options: dict[str, Any]
+    scanner: JobScanner
+    state: str = "running"
+    results: int = 0
+    started: float = field(default_factory=time.time)
+    task: asyncio.Task | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job": self.id,
+            "state": self.state,
+            "options": self.options,
+            "results": self.results,
+            "started": self.started,
+            "stats": self.scanner.metrics.snapshot(),
+        }
+
+
+class ScanServer:
+    """
+    Long-running scan service: one event loop and warm shared state
+    (DNS cache, TLS context and sessions, UDP and connect engines) for
+    every job. Jobs share global concurrency, granted round-robin
+    between jobs, and the global rate budget.
+    JSON over HTTP/1.1 on TCP or a Unix socket:
+        POST /jobs          run a job, results are streamed back as JSON Lines
+        GET /jobs           running jobs with their stats
+        DELETE /jobs/<id>   cancel a job
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        unix: str | None = None,
+        concurrency: int = 500,
+        rate: float | None = None,
+        dns_ttl: float = 300.0,
+        engine: ConnectEngine | str = ConnectEngine.ASYNCIO,
+        linger: bool = False,
+        quiet: bool = False,
+    ):
+        self.host = host
+        self.port = port
+        self.unix = unix
+        self.concurrency = concurrency
+        self.engine = ConnectEngine(engine)
+        self.quiet = quiet
+        self.scheduler = FairScheduler(concurrency)
+        self.rate_limiter = TokenBucket(rate) if rate else None
+        self.resolver = Resolver(dns_ttl, concurrency=min(concurrency, 256))
+        self.udp_engine = UdpEngine()
+        self.connect_engine = EpollConnectEngine(linger) if self.engine == ConnectEngine.EPOLL else None
+        self._tls: "TlsProber | None" = None
+        self.jobs: dict[int, Job] = {}
+        self._ids = itertools.count(1)
+
+    @property
+    def tls(self) -> "TlsProber":
+        """
+        Shared TLS prober, created by the first HTTPS job
+        """
+        if self._tls is None:
+            from portfinder.utils.tls import TlsProber
+
+            self._tls = TlsProber(capture=True)
+        return self._tls
+
+    def create_job(self, options: dict[str, Any]) -> Job:
+        """
+        Validate job options and build its scanner
+        :param options: subset of JOB_OPTIONS
+        :return: registered Job
+        :raises ValueError: unsupported or invalid options
+        """
+        check_job_options(options)
+        job_id = next(self._ids)
+        try:
+            scanner = JobScanner(self, job_id, **options)
+        except TypeError as exc:
+            raise ValueError(str(exc)) from exc
+        job = Job(job_id, options, scanner)
+        self.jobs[job_id] = job
+        return job
+
+    async def run_job(self, job: Job, writer: asyncio.StreamWriter) -> None:
+        """
+        Stream job results to writer as JSON Lines
+        """
+        async with aclosing(job.scanner.stream()) as results:
+            async for result in results:
+                job.results += 1
+                writer.write(json.dumps(result.to_dict()).encode() + b"\n")
+                await writer.drain()
+
+    async def _job_request(self, options: Any, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Run a job for the lifetime of its request, the job is cancelled
+        when the client disconnects
+        """
+        if not isinstance(options, dict):
+            raise HttpError(400, "Job must be a JSON object")
+        try:
+            job = self.create_job(options)
+        except ValueError as exc:
+            raise HttpError(400, str(exc)) from exc
+
+        self._head(writer, 200, "application/x-ndjson")
+        writer.write(json.dumps({"job": job.id, "state": "started"}).encode() + b"\n")
+        if not self.quiet:
+            await logger.ainfo("Job %s started: %s", job.id, options)
+        job.task = asyncio.create_task(self.run_job(job, writer))
+        # the request is complete, so EOF from the client means it is gone
+        watcher = asyncio.create_task(reader.read(1))
+        watcher.add_done_callback(lambda _: self._disconnected(job))
+        try:
+            await job.task
+            job.state = "done"
+        except asyncio.CancelledError:
+            if (task := asyncio.current_task()) is not None and task.cancelling():
+                raise
+            if job.state == "running":
+                job.state = "cancelled"
+        except OSError:
+            job.state = "disconnected"
+        except Exception as exc:
+            job.state = "failed"
+            await logger.aerror("Job %s failed: %s", job.id, exc)
+        finally:
+            watcher.cancel()
+            del self.jobs[job.id]
+        if not self.quiet:
+            await logger.ainfo("Job %s %s, %s results", job.id, job.state, job.results)
+        if job.state != "disconnected":
+            writer.write(json.dumps(job.to_dict()).encode() + b"\n")
+
+    @staticmethod
+    def _disconnected(job: Job) -> None:
+        if job.task is not None and not job.task.done():
+            job.state = "disconnected"
+            job.task.cancel()
+
+    @staticmethod
+    def _head(writer: asyncio.StreamWriter, status: int, content_type: str = "application/json") -> None:
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\nConnection: close\r\n\r\n".encode()
+        )
+
+    def _respond(self, writer: asyncio.StreamWriter, status: int, body: Any) -> None:
+        self._head(writer, status)
+        writer.write(json.dumps(body).encode() + b"\n")
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple[str, str, Any]:
+        """
+        :return: method, path, JSON body or None
+        """
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10)
+        request_line, *header_lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, _ = request_line.split(" ", 2)
+        except ValueError as exc:
+            raise HttpError(400, "Malformed request line") from exc
+        headers = {}
+        for line in header_lines:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError as exc:
+            raise HttpError(400, "Invalid Content-Length") from exc
+        if length > MAX_BODY:
+            raise HttpError(413, "Request body is too large")
+        if not length:
+            return method, path, None
+        try:
+            return method, path, json.loads(await reader.readexactly(length))
+        except json.JSONDecodeError as exc:
+            raise HttpError(400, f"Invalid JSON: {exc}") from exc
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, body = await self._read_request(reader)
+            parts = path.split("?", 1)[0].strip("/").split("/")
+            if parts[0] != "jobs" or len(parts) > 2:
+                raise HttpError(404, f"Not found: {path}")
+            if method == "POST" and len(parts) == 1:
+                await self._job_request(body, reader, writer)
+            elif method == "GET" and len(parts) == 1:
+                self._respond(writer, 200, [job.to_dict() for job in self.jobs.values()])
+            elif method == "DELETE" and len(parts) == 2:
+                job = self.jobs.get(int(parts[1])) if parts[1].isdigit() else None
+                if job is None or job.task is None:
+                    raise HttpError(404, f"Job not found: {parts[1]}")
+                job.task.cancel()
+                self._respond(writer, 200, {"job": job.id, "state": "cancelling"})
+            else:
+                raise HttpError(405, f"{method} is not allowed for {path}")
+            await writer.drain()
+        except HttpError as exc:
+            self._respond(writer, exc.status, {"error": str(exc)})
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError):
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def serve_forever(self) -> None:
+        if self.unix is not None:
+            Path(self.unix).unlink(missing_ok=True)
+            server = await asyncio.start_unix_server(self.handle, self.unix)
+        else:
+            server = await asyncio.start_server(self.handle, self.host, self.port)
+        if not self.quiet:
+            await logger.ainfo(
+                "Serving scan jobs on %s, concurrency %s, rate %s",
+                self.unix or f"{self.host}:{self.port}",
+                self.concurrency,
+                f"{self.rate_limiter.rate}/s" if self.rate_limiter else "unlimited",
+            )
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for job in list(self.jobs.values()):
+                if job.task is not None:
+                    job.task.cancel()
+            self.udp_engine.close()
+            if self.connect_engine is not None:
+                self.connect_engine.close()
+            if self.unix is not None:
+                Path(self.unix).unlink(missing_ok=True)
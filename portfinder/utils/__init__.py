@@ -1,13 +1,254 @@
-from portfinder.utils.file import (
-    read_file,
-    save_result,
-)
-from portfinder.utils.request import (
-    check_http_port,
-    check_https_port,
-    check_tcp_port,
-    check_udp_port,
+import importlib
+from typing import (
+    TYPE_CHECKING,
+    Any,
 )
 
 
-__all__ = ["check_http_port", "check_https_port", "check_tcp_port", "check_udp_port", "save_result", "read_file"]
+if TYPE_CHECKING:
+    from portfinder.utils.banner import (
+        SIGNATURES,
+        BannerGrabber,
+        match_service,
+    )
+    from portfinder.utils.checkpoint import (
+        ScanProgress,
+        ScanState,
+        scan_fingerprint,
+        write_checkpoints,
+    )
+    from portfinder.utils.connect import EpollConnectEngine
+    from portfinder.utils.database import (
+        ResultQuery,
+        SqliteSink,
+    )
+    from portfinder.utils.diff import (
+        ResultDiff,
+        load_baseline,
+        pair_in_shard,
+        save_changes,
+    )
+    from portfinder.utils.discovery import (
+        DISCOVERY_PORTS,
+        DiscoveryStats,
+        HostDiscovery,
+        IcmpPinger,
+        tcp_alive,
+    )
+    from portfinder.utils.file import (
+        SINKS,
+        FileSink,
+        JsonArraySink,
+        JsonlSink,
+        ResultSink,
+        TxtSink,
+        merge_results,
+        open_sink,
+        read_file,
+        read_results,
+        save_result,
+    )
+    from portfinder.utils.metrics import (
+        BUCKETS,
+        ScanMetrics,
+        current_metrics,
+        record_probe,
+        serve_metrics,
+    )
+    from portfinder.utils.payloads import (
+        PayloadRegistry,
+        UdpPayload,
+    )
+    from portfinder.utils.permutation import IndexPermutation
+    from portfinder.utils.ratelimit import (
+        HostRateLimiter,
+        TokenBucket,
+    )
+    from portfinder.utils.request import (
+        STREAM_PROTOCOLS,
+        ProbeObserver,
+        check_http_port,
+        check_https_port,
+        check_stream_protocols,
+        check_tcp_port,
+        check_udp_port,
+    )
+    from portfinder.utils.resolver import Resolver
+    from portfinder.utils.rtt import (
+        RttEstimator,
+        RttTable,
+    )
+    from portfinder.utils.scheduler import (
+        FairScheduler,
+        JobSlots,
+    )
+    from portfinder.utils.store import ResultStore
+    from portfinder.utils.targets import (
+        AddressRange,
+        TargetSet,
+    )
+    from portfinder.utils.tls import (
+        SessionContext,
+        TlsProber,
+        default_context,
+        parse_certificate,
+    )
+    from portfinder.utils.udp import (
+        UdpEngine,
+        get_udp_engine,
+    )
+    from portfinder.utils.workspace import (
+        SINGLE_SHARD,
+        Shard,
+        WorkSpace,
+    )
+
+
+# public name -> submodule, imported on first access (PEP 562),
+# so e.g. ssl and aiofiles are loaded only by scans that need them
+_EXPORTS = {
+    "check_http_port": "request",
+    "check_https_port": "request",
+    "check_tcp_port": "request",
+    "check_udp_port": "request",
+    "check_stream_protocols": "request",
+    "STREAM_PROTOCOLS": "request",
+    "save_result": "file",
+    "read_file": "file",
+    "AddressRange": "targets",
+    "TargetSet": "targets",
+    "UdpEngine": "udp",
+    "get_udp_engine": "udp",
+    "PayloadRegistry": "payloads",
+    "UdpPayload": "payloads",
+    "TokenBucket": "ratelimit",
+    "HostRateLimiter": "ratelimit",
+    "WorkSpace": "workspace",
+    "IndexPermutation": "permutation",
+    "Shard": "workspace",
+    "SINGLE_SHARD": "workspace",
+    "read_results": "file",
+    "merge_results": "file",
+    "ResultSink": "file",
+    "FileSink": "file",
+    "TxtSink": "file",
+    "JsonlSink": "file",
+    "JsonArraySink": "file",
+    "SINKS": "file",
+    "open_sink": "file",
+    "ScanState": "checkpoint",
+    "ScanProgress": "checkpoint",
+    "scan_fingerprint": "checkpoint",
+    "write_checkpoints": "checkpoint",
+    "ResultDiff": "diff",
+    "load_baseline": "diff",
+    "pair_in_shard": "diff",
+    "save_changes": "diff",
+    "DISCOVERY_PORTS": "discovery",
+    "DiscoveryStats": "discovery",
+    "HostDiscovery": "discovery",
+    "IcmpPinger": "discovery",
+    "tcp_alive": "discovery",
+    "ProbeObserver": "request",
+    "RttEstimator": "rtt",
+    "RttTable": "rtt",
+    "EpollConnectEngine": "connect",
+    "SessionContext": "tls",
+    "TlsProber": "tls",
+    "default_context": "tls",
+    "parse_certificate": "tls",
+    "Resolver": "resolver",
+    "SIGNATURES": "banner",
+    "BannerGrabber": "banner",
+    "match_service": "banner",
+    "ResultStore": "store",
+    "BUCKETS": "metrics",
+    "ScanMetrics": "metrics",
+    "current_metrics": "metrics",
+    "record_probe": "metrics",
+    "serve_metrics": "metrics",
+    "FairScheduler": "scheduler",
+    "JobSlots": "scheduler",
+    "SqliteSink": "database",
+    "ResultQuery": "database",
+}
+
+# literal list, so linters can check the names above
+__all__ = [
+    "check_http_port",
+    "check_https_port",
+    "check_tcp_port",
+    "check_udp_port",
+    "check_stream_protocols",
+    "STREAM_PROTOCOLS",
+    "save_result",
+    "read_file",
+    "AddressRange",
+    "TargetSet",
+    "UdpEngine",
+    "get_udp_engine",
+    "PayloadRegistry",
+    "UdpPayload",
+    "TokenBucket",
+    "HostRateLimiter",
+    "WorkSpace",
+    "IndexPermutation",
+    "Shard",
+    "SINGLE_SHARD",
+    "read_results",
+    "merge_results",
+    "ResultSink",
+    "FileSink",
+    "TxtSink",
+    "JsonlSink",
+    "JsonArraySink",
+    "SINKS",
+    "open_sink",
+    "ScanState",
+    "ScanProgress",
+    "scan_fingerprint",
+    "write_checkpoints",
+    "ResultDiff",
+    "load_baseline",
+    "pair_in_shard",
+    "save_changes",
+    "DISCOVERY_PORTS",
+    "DiscoveryStats",
+    "HostDiscovery",
+    "IcmpPinger",
+    "tcp_alive",
+    "ProbeObserver",
+    "RttEstimator",
+    "RttTable",
+    "EpollConnectEngine",
+    "SessionContext",
+    "TlsProber",
+    "default_context",
+    "parse_certificate",
+    "Resolver",
+    "SIGNATURES",
+    "BannerGrabber",
+    "match_service",
+    "ResultStore",
+    "BUCKETS",
+    "ScanMetrics",
+    "current_metrics",
+    "record_probe",
+    "serve_metrics",
+    "FairScheduler",
+    "JobSlots",
+    "SqliteSink",
+    "ResultQuery",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if (module := _EXPORTS.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_EXPORTS})
@@ -0,0 +1,106 @@
+import asyncio
+import re
+from collections.abc import Iterable
+
+from portfinder.dto import Protocol
+from portfinder.utils.request import _close_writer
+
+
+BANNER_PROBE = b"HEAD / HTTP/1.0\r\n\r\n"
+
+# plaintext protocols worth a grab, a TLS-only port says nothing readable
+BANNER_PROTOCOLS = frozenset({Protocol.TCP, Protocol.HTTP})
+
+# (service, pattern) in match order, group 1 is the product or version if any
+SIGNATURES: list[tuple[str, re.Pattern[bytes]]] = [
+    ("ssh", re.compile(rb"^SSH-[\d.]+-(\S+)")),
+    ("http", re.compile(rb"^HTTP/\d(?:\.\d)? \d{3}(?:.*?\r?\nServer: *([^\r\n]+))?", re.S | re.I)),
+    ("smtp", re.compile(rb"^220[ -](?:\S+ )?(.*?E?SMTP.*|.*(?:Postfix|Exim|Sendmail).*)", re.I)),
+    ("ftp", re.compile(rb"^220[ -](.*FTP.*|.*FileZilla.*)", re.I)),
+    ("pop3", re.compile(rb"^\+OK(.*)")),
+    ("imap", re.compile(rb"^\* OK(.*)")),
+    ("redis", re.compile(rb"^(?:-ERR|-NOAUTH|-DENIED|\+PONG)")),
+    ("mysql", re.compile(rb"^.{4}\x0a(\d[\w.-]*)\x00", re.S)),
+    ("postgresql", re.compile(rb"^E\x00\x00\x00.{1,4}S(?:FATAL|ERROR)", re.S)),
+    ("vnc", re.compile(rb"^RFB (\d{3}\.\d{3})")),
+    ("memcached", re.compile(rb"^(?:ERROR|CLIENT_ERROR)\r\n")),
+    ("telnet", re.compile(rb"^\xff[\xfb-\xfe]")),
+    ("ftp", re.compile(rb"^220[ -]")),
+]
+
+
+def match_service(data: bytes) -> tuple[str | None, str | None]:
+    """
+    Service name and product by SIGNATURES
+    :param data: first bytes read from the port
+    :return: service or None, product or None
+    """
+    for service, pattern in SIGNATURES:
+        if match := pattern.search(data):
+            product = match.group(1) if pattern.groups else None
+            return service, product.decode("utf-8", "replace").strip() if product else None
+    return None, None
+
+
+def banner_text(data: bytes, size: int = 256) -> str | None:
+    """
+    First line of data as printable text
+    """
+    line = data.split(b"\n", 1)[0].strip()
+    text = "".join(char if char.isprintable() else "." for char in line[:size].decode("utf-8", "replace"))
+    return text or None
+
+
+class BannerGrabber:
+    """
+    Read what an open TCP port says first, or its answer to a minimal HTTP
+    request if it waits for the client, and fingerprint it by SIGNATURES.
+    Grabs have own concurrency, read size cap and timeout.
+    """
+
+    def __init__(self, concurrency: int = 50, size: int = 1024, timeout: float = 2.0):
+        self.size = size
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    @staticmethod
+    def wants(protocols: Iterable[Protocol]) -> bool:
+        """
+        Whether a port open on protocols is grabbed, see BANNER_PROTOCOLS
+        """
+        return not BANNER_PROTOCOLS.isdisjoint(protocols)
+
+    async def _read(self, reader: asyncio.StreamReader) -> bytes:
+        try:
+            return await asyncio.wait_for(reader.read(self.size), timeout=self.timeout)
+        except (asyncio.TimeoutError, OSError):
+            return b""
+
+    async def grab(self, host: str, port: int) -> tuple[str | None, str | None]:
+        """
+        Grab banner of an open port
+        :param host:
+        :param port:
+        :return: service (with product if known) and banner, Nones if the port said nothing
+        """
+        async with self.semaphore:
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=self.timeout)
+            except (asyncio.TimeoutError, OSError):
+                return None, None
+
+            try:
+                if not (data := await self._read(reader)):
+                    writer.write(BANNER_PROBE)
+                    data = await self._read(reader)
+            except (ConnectionResetError, OSError):
+                data = b""
+            finally:
+                await _close_writer(writer)
+
+        if not data:
+            return None, None
+        service, product = match_service(data)
+        if service is not None and product:
+            service = f"{service} ({product})"
+        return service, banner_text(data)
@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import (
+    asdict,
+    dataclass,
+    field,
+)
+from pathlib import Path
+from typing import Any
+
+from portfinder.dto import Result
+
+
+@dataclass
+class ScanState:
+    """
+    Scan checkpoint: every position of the shard sequence below `position`
+    is done, `done` holds completed positions above it.
+    """
+
+    fingerprint: str
+    seed: int
+    position: int = 0
+    done: list[int] = field(default_factory=list)
+    results: list[dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    async def load(cls, path: Path) -> "ScanState":
+        import aiofiles
+
+        try:
+            async with aiofiles.open(path, "r") as f:
+                return cls(**json.loads(await f.read()))
+        except FileNotFoundError as exc:
+            raise ValueError(f"Checkpoint not found: {path}") from exc
+        except (TypeError, json.JSONDecodeError) as exc:
+            raise ValueError(f"Invalid checkpoint: {path}") from exc
+
+    async def save(self, path: Path) -> None:
+        """
+        Write state atomically: temporary file replaced in one rename
+        """
+        import aiofiles
+
+        temporary = path.with_name(path.name + ".tmp")
+        async with aiofiles.open(temporary, "w") as f:
+            await f.write(json.dumps(asdict(self)))
+        os.replace(temporary, path)
+
+
+def scan_fingerprint(**params: Any) -> str:
+    """
+    Stable hash of the parameters defining the scan sequence
+    """
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ScanProgress:
+    """
+    Track dispatched and completed positions of the scan sequence
+    to know the contiguous done watermark at any moment.
+    Memory is O(in-flight positions) plus kept results.
+    """
+
+    def __init__(self, state: ScanState, stride: int, keep_results: bool = False):
+        self.state = state
+        self.stride = stride
+        self.keep_results = keep_results
+        self.skip = set(state.done)
+        self.restored = [Result.from_dict(item) for item in state.results]
+        self.completed = 0
+        self._results = list(state.results) if keep_results else []
+        self._pending: dict[int, None] = {}
+        self._next = state.position
+
+    def dispatch(self, position: int) -> bool:
+        """
+        Register position before probing
+        :param position: sequence position
+        :return: False if the position was already done in the resumed scan
+        """
+        self._next = position + self.stride
+        if position in self.skip:
+            self.skip.discard(position)
+            return False
+        self._pending[position] = None
+        return True
+
+    def complete(self, position: int, result: Result | None) -> None:
+        self._pending.pop(position, None)
+        self.completed += 1
+        if result is not None and self.keep_results:
+            self._results.append(result.to_dict())
+
+    @property
+    def watermark(self) -> int:
+        return next(iter(self._pending), self._next)
+
+    def snapshot(self) -> ScanState:
+        """
+        Current progress as ScanState
+        """
+        watermark = self.watermark
+        done = [position for position in range(watermark, self._next, self.stride) if position not in self._pending]
+        done.extend(sorted(self.skip))
+        return ScanState(
+            fingerprint=self.state.fingerprint,
+            seed=self.state.seed,
+            position=watermark,
+            done=done,
+            results=list(self._results),
+        )
+
+
+async def write_checkpoints(progress: ScanProgress, path: Path, interval: float) -> None:
+    """
+    Save progress every interval seconds until cancelled
+    """
+    while True:
+        await asyncio.sleep(interval)
+        await progress.snapshot().save(path)
@@ -0,0 +1,351 @@
+import asyncio
+import ipaddress
+import itertools
+import json
+import sqlite3
+import time
+from collections.abc import (
+    Callable,
+    Iterator,
+)
+from pathlib import Path
+from typing import Any
+
+from portfinder.dto import (
+    IpVersion,
+    Protocol,
+    Result,
+    ResultChange,
+    TlsInfo,
+)
+from portfinder.utils.diff import ResultDiff
+from portfinder.utils.file import ResultSink
+from portfinder.utils.targets import TargetSet
+from portfinder.utils.workspace import Shard
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL,
+    options TEXT,
+    results INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS results (
+    scan_id INTEGER NOT NULL REFERENCES scans (id),
+    host TEXT NOT NULL,
+    address BLOB,
+    ip_version TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    protocol TEXT NOT NULL,
+    hostname TEXT,
+    service TEXT,
+    banner TEXT,
+    tls TEXT
+);
+CREATE INDEX IF NOT EXISTS results_host ON results (address, port);
+CREATE INDEX IF NOT EXISTS results_name ON results (host, port);
+CREATE INDEX IF NOT EXISTS results_port ON results (port, protocol);
+CREATE INDEX IF NOT EXISTS results_protocol ON results (protocol);
+CREATE INDEX IF NOT EXISTS results_scan ON results (scan_id, address);
+"""
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """
+    Open or create result database in WAL mode:
+    readers (portfinder query) do not block a running scan
+    """
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def packed_address(host: str) -> bytes | None:
+    """
+    Big-endian address bytes, ordered like addresses, so a CIDR is a BETWEEN range
+    """
+    try:
+        return ipaddress.ip_address(host).packed
+    except ValueError:
+        return None
+
+
+class SqliteSink(ResultSink[list[tuple]]):
+    """
+    Results of one scan appended to an SQLite database shared by many scans:
+    one row per (host, port, protocol), written with executemany in one
+    transaction per batch, off the event loop.
+    """
+
+    suffix = ".sqlite"
+
+    def __init__(
+        self,
+        output_path: Path,
+        buffer_size: int = 1000,
+        flush_interval: float = 1.0,
+        scan: dict[str, Any] | None = None,
+    ):
+        super().__init__(output_path, buffer_size, flush_interval)
+        self.scan = scan or {}
+        self.scan_id: int | None = None
+        self._connection: sqlite3.Connection | None = None
+
+    def _connect(self) -> None:
+        self._connection = connect(self.path)
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO scans (started, options) VALUES (?, ?)",
+                (time.time(), json.dumps(self.scan, default=str)),
+            )
+        self.scan_id = cursor.lastrowid
+
+    async def _open(self) -> None:
+        await asyncio.to_thread(self._connect)
+
+    def format(self, result: Result) -> list[tuple]:
+        address = packed_address(result.host)
+        tls = json.dumps(result.tls.to_dict()) if result.tls is not None else None
+        return [
+            (
+                self.scan_id,
+                result.host,
+                address,
+                result.ip_version,
+                result.port,
+                proto,
+                result.hostname,
+                result.service,
+                result.banner,
+                tls,
+            )
+            for proto in result.protocols
+        ]
+
+    def _insert(self, connection: sqlite3.Connection, rows: list[tuple]) -> None:
+        with connection:
+            connection.executemany(
+                "INSERT INTO results (scan_id, host, address, ip_version, port, protocol, hostname, service, banner, tls)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    async def _write_items(self, items: list[list[tuple]]) -> None:
+        if self._connection is not None:
+            await asyncio.to_thread(self._insert, self._connection, [row for batch in items for row in batch])
+
+    def _finish(self, connection: sqlite3.Connection) -> None:
+        with connection:
+            connection.execute(
+                "UPDATE scans SET finished = ?, results = ? WHERE id = ?", (time.time(), self.count, self.scan_id)
+            )
+        connection.close()
+
+    async def _close(self) -> None:
+        if self._connection is not None:
+            await asyncio.to_thread(self._finish, self._connection)
+            self._connection = None
+
+
+def _port_ranges(ports: str) -> list[tuple[int, int]]:
+    ranges = []
+    for item in ports.split(","):
+        start, _, end = item.partition("-")
+        ranges.append((int(start), int(end or start)))
+    return ranges
+
+
+class ResultQuery:
+    """
+    Filtered lookups and aggregates over a result database.
+    Filters are combined with AND, every one is served by an index:
+    scans, hosts as IPs, CIDRs or names, ports, protocol, and ports the
+    host must not have open in the same scan.
+    The database is opened read-only, queries never write to it.
+    """
+
+    def __init__(self, path: Path):
+        if not path.exists():
+            raise ValueError(f"Database not found: {path}")
+        self.connection = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        self.connection.row_factory = sqlite3.Row
+        self._where: list[str] = []
+        self._params: list[Any] = []
+
+    def last_scan(self) -> int | None:
+        return self.connection.execute("SELECT max(id) FROM scans").fetchone()[0]
+
+    def scans(self, scan_ids: list[int] | None = None, since: float | None = None) -> "ResultQuery":
+        if scan_ids:
+            self._where.append(f"r.scan_id IN ({', '.join('?' * len(scan_ids))})")
+            self._params.extend(scan_ids)
+        if since is not None:
+            self._where.append("r.scan_id IN (SELECT id FROM scans WHERE started >= ?)")
+            self._params.append(since)
+        return self
+
+    def hosts(self, hosts: list[str]) -> "ResultQuery":
+        """
+        :param hosts: IP addresses, CIDRs or domain names
+        """
+        conditions = []
+        for host in hosts:
+            try:
+                network = ipaddress.ip_network(host, strict=False)
+            except ValueError:
+                conditions.append("r.host = ?")
+                self._params.append(host)
+                continue
+            conditions.append("(length(r.address) = ? AND r.address BETWEEN ? AND ?)")
+            self._params.extend(
+                [len(network.network_address.packed), network.network_address.packed, network.broadcast_address.packed]
+            )
+        if conditions:
+            self._where.append(f"({' OR '.join(conditions)})")
+        return self
+
+    def ports(self, ports: str) -> "ResultQuery":
+        """
+        :param ports: e.g. '443' or '1-1024,3389'
+        """
+        ranges = _port_ranges(ports)
+        self._where.append(f"({' OR '.join(['r.port BETWEEN ? AND ?'] * len(ranges))})")
+        self._params.extend(bound for port_range in ranges for bound in port_range)
+        return self
+
+    def without_ports(self, ports: str) -> "ResultQuery":
+        """
+        Only hosts that have none of ports open in the same scan
+        """
+        ranges = _port_ranges(ports)
+        self._where.append(
+            "NOT EXISTS (SELECT 1 FROM results o WHERE o.address IS r.address AND o.host = r.host AND o.scan_id = r.scan_id"
+            f" AND ({' OR '.join(['o.port BETWEEN ? AND ?'] * len(ranges))}))"
+        )
+        self._params.extend(bound for port_range in ranges for bound in port_range)
+        return self
+
+    def protocol(self, protocol: Protocol | str) -> "ResultQuery":
+        self._where.append("r.protocol = ?")
+        self._params.append(Protocol(protocol).value)
+        return self
+
+    def _execute(self, sql: str, *extra: tuple[str, Any]) -> sqlite3.Cursor:
+        """
+        :param sql: query with {where} placeholder
+        :param extra: (condition, parameter) pairs added to the filters
+        """
+        conditions = [*self._where, *(condition for condition, _ in extra)]
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.connection.execute(sql.format(where=where), [*self._params, *(param for _, param in extra)])
+
+    def results(self, scan_id: int | None = None) -> Iterator[tuple[int, Result]]:
+        """
+        Matching results, protocol rows of one port merged into one Result
+        :param scan_id: only this scan if set
+        :return: Iterator (scan id, Result)
+        """
+        cursor = self._execute(
+            "SELECT r.scan_id, r.host, r.ip_version, r.port, r.protocol, r.hostname, r.service, r.banner, r.tls"
+            " FROM results r{where} ORDER BY r.scan_id, r.address, r.host, r.port",
+            *([("r.scan_id = ?", scan_id)] if scan_id is not None else []),
+        )
+        for (scan, _, _), group in itertools.groupby(cursor, key=lambda row: (row[0], row[1], row[3])):
+            rows = list(group)
+            row = rows[0]
+            yield scan, Result(
+                host=row["host"],
+                port=row["port"],
+                ip_version=IpVersion(row["ip_version"]),
+                protocols=[Protocol(item["protocol"]) for item in rows],
+                tls=TlsInfo.from_dict(json.loads(row["tls"])) if row["tls"] else None,
+                hostname=row["hostname"],
+                service=row["service"],
+                banner=row["banner"],
+            )
+
+    def by_host(self) -> list[dict[str, Any]]:
+        """
+        Per host: open ports count, ports, scans seen in, first and last scan
+        """
+        cursor = self._execute(
+            "SELECT r.host, r.ip_version, count(DISTINCT r.port) AS ports, group_concat(DISTINCT r.port) AS port_list,"
+            " count(DISTINCT r.scan_id) AS scans, min(r.scan_id) AS first_scan, max(r.scan_id) AS last_scan"
+            " FROM results r{where} GROUP BY r.address, r.host ORDER BY r.address, r.host"
+        )
+        return [{**dict(row), "port_list": sorted(int(port) for port in row["port_list"].split(","))} for row in cursor]
+
+    def by_port(self) -> list[dict[str, Any]]:
+        """
+        Per port: hosts with it open, protocols, scans seen in
+        """
+        cursor = self._execute(
+            "SELECT r.port, count(DISTINCT r.address) AS hosts, group_concat(DISTINCT r.protocol) AS protocols,"
+            " count(DISTINCT r.scan_id) AS scans FROM results r{where} GROUP BY r.port ORDER BY hosts DESC, r.port"
+        )
+        return [{**dict(row), "protocols": row["protocols"].split(",")} for row in cursor]
+
+    def _scope(
+        self, scan_id: int, baseline: dict[tuple[str, int], Result]
+    ) -> tuple[list[Protocol], Callable[[str, int], bool]]:
+        """
+        Protocols and (host, port) pairs a scan covered, by its saved options.
+        Domain targets cover results with that hostname. Pairs of a scan
+        sharded into several parts are never covered: the shard of a sweep
+        pair depends on its position in the scan sequence.
+        :param scan_id: scan id
+        :param baseline: previous results, for hostnames of closed pairs
+        :return: scanned protocols, predicate by (host, port)
+        :raises ValueError: unknown scan
+        """
+        if (row := self.connection.execute("SELECT options FROM scans WHERE id = ?", (scan_id,)).fetchone()) is None:
+            raise ValueError(f"Scan not found: {scan_id}")
+        options = json.loads(row["options"]) if row["options"] else {}
+        protocols = [Protocol(options["protocol"])] if options.get("protocol") else list(Protocol)
+        ranges = _port_ranges(options["ports"]) if options.get("ports") else None
+        shard = options.get("shard")
+        if shard is not None and (Shard.parse(shard) if isinstance(shard, str) else Shard(*shard)).total > 1:
+            return protocols, lambda host, port: False
+
+        items = options["target"].replace(" ", "").split(",") if options.get("target") else []
+        if options.get("file"):
+            try:
+                items.extend(Path(options["file"]).read_text().replace(" ", "").replace("\n", ",").split(","))
+            except OSError:
+                # targets of the file are unknown now, only the target option is in scope
+                pass
+        targets = TargetSet.from_targets(item for item in items if item) if items else None
+
+        def covered(host: str, port: int) -> bool:
+            if ranges is not None and not any(start <= port <= end for start, end in ranges):
+                return False
+            if targets is None or host in targets:
+                return True
+            previous = baseline.get((host, port))
+            return previous is not None and previous.hostname is not None and previous.hostname in targets
+
+        return protocols, covered
+
+    def changes(self, old_scan: int, new_scan: int) -> list[ResultChange]:
+        """
+        Opened, changed and closed ports of new_scan against old_scan
+        within the other filters, see ResultDiff. Only protocols, targets
+        and ports new_scan covered are compared, see _scope.
+        """
+        baseline = {(result.host, result.port): result for _, result in self.results(old_scan)}
+        diff = ResultDiff(baseline, *self._scope(new_scan, baseline))
+        changes = [change for _, result in self.results(new_scan) if (change := diff.observe(result))]
+        return changes + diff.closed()
+
+    def scan_list(self) -> list[dict[str, Any]]:
+        return [
+            {**dict(row), "options": json.loads(row["options"]) if row["options"] else {}}
+            for row in self.connection.execute("SELECT * FROM scans ORDER BY id")
+        ]
+
+    def close(self) -> None:
+        self.connection.close()
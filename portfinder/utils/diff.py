@@ -0,0 +1,116 @@
+import json
+import zlib
+from collections.abc import (
+    Callable,
+    Iterable,
+)
+from pathlib import Path
+
+from portfinder.dto import (
+    ChangeKind,
+    Protocol,
+    Result,
+    ResultChange,
+)
+from portfinder.utils.file import read_results
+from portfinder.utils.workspace import (
+    SINGLE_SHARD,
+    Shard,
+)
+
+
+def pair_in_shard(host: str, port: int, shard: Shard) -> bool:
+    """
+    Stable (host, port) to shard assignment for pairs outside of the
+    scan sequence, e.g. baseline pairs probed before the sweep.
+    Sub-shards of a shard keep its pairs, see worker_options.
+    """
+    return zlib.crc32(f"{host}:{port}".encode()) % shard.total == shard.number
+
+
+async def load_baseline(input_file: Path, shard: Shard = SINGLE_SHARD) -> dict[tuple[str, int], Result]:
+    """
+    Previous scan results by (host, port) owned by shard
+    :param input_file: JSONL (or JSON) result file
+    :param shard: current scan shard
+    :return:
+    """
+    baseline: dict[tuple[str, int], Result] = {}
+    async for result in read_results(input_file):
+        if pair_in_shard(result.host, result.port, shard):
+            baseline[(result.host, result.port)] = result
+    return baseline
+
+
+class ResultDiff:
+    """
+    Compare current results with the baseline while they are streamed.
+    Only the scope of the current scan is compared: baseline protocols
+    it did not probe are ignored, and pairs of the baseline it covered
+    but did not see by the end of the scan are closed.
+    """
+
+    def __init__(
+        self,
+        baseline: dict[tuple[str, int], Result],
+        protocols: Iterable[Protocol] | None = None,
+        covered: Callable[[str, int], bool] | None = None,
+    ):
+        """
+        :param baseline: previous results by (host, port)
+        :param protocols: protocols of the current scan, all if None
+        :param covered: (host, port) predicate of pairs the current scan probes, all if None
+        """
+        self.baseline = baseline
+        self.protocols = set(Protocol) if protocols is None else {Protocol(proto) for proto in protocols}
+        self.covered = covered
+        self._seen: set[tuple[str, int]] = set()
+
+    def _previous(self, result: Result) -> list[Protocol]:
+        return [proto for proto in result.protocols if proto in self.protocols]
+
+    def observe(self, result: Result) -> ResultChange | None:
+        """
+        Register current result
+        :param result: found Result
+        :return: ResultChange if it differs from the baseline
+        """
+        key = (result.host, result.port)
+        self._seen.add(key)
+        previous = self.baseline.get(key)
+        if previous is None or not (protocols := self._previous(previous)):
+            return ResultChange(ChangeKind.OPENED, result.host, result.port, result.ip_version, result.protocols, [])
+        if set(protocols) != set(result.protocols):
+            return ResultChange(
+                ChangeKind.CHANGED, result.host, result.port, result.ip_version, result.protocols, protocols
+            )
+        return None
+
+    def closed(self) -> list[ResultChange]:
+        """
+        Covered baseline results not found again, valid after the scan completed
+        """
+        changes = []
+        for key, previous in self.baseline.items():
+            if key in self._seen or (self.covered is not None and not self.covered(*key)):
+                continue
+            if protocols := self._previous(previous):
+                changes.append(
+                    ResultChange(ChangeKind.CLOSED, previous.host, previous.port, previous.ip_version, [], protocols)
+                )
+        return changes
+
+
+async def save_changes(output_path: Path, changes: list[ResultChange]) -> Path:
+    """
+    Write changes as JSON Lines next to the results file
+    :param output_path: output file path without extension
+    :param changes: list of ResultChange
+    :return: diff file path
+    """
+    import aiofiles
+
+    path = output_path.with_name(output_path.name + ".diff.jsonl")
+    async with aiofiles.open(path, "w") as f:
+        await f.write("".join(json.dumps(change.to_dict()) + "\n" for change in changes))
+    return path
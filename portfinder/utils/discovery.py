@@ -0,0 +1,283 @@
+import asyncio
+import errno
+import ipaddress
+import os
+import socket
+import struct
+import time
+from collections.abc import (
+    Awaitable,
+    Callable,
+)
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+from portfinder.utils.request import _close_writer
+from portfinder.utils.targets import TargetSet
+from portfinder.utils.timers import TimerWheel
+
+
+DISCOVERY_PORTS = "80,443,22,445,3389"
+
+# local resource exhaustion, says nothing about the probed host
+RESOURCE_ERRORS = frozenset({errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM})
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+_ICMP_HEADER = struct.Struct("!BBHHH")
+
+
+def _checksum(data: bytes) -> int:
+    """
+    Internet checksum (RFC 1071)
+    """
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _is_ipv4(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host).version == 4
+    except ValueError:
+        return False
+
+
+class IcmpPinger:
+    """
+    ICMP echo over one shared socket, IPv4 only: a raw socket when
+    privileged, otherwise the Linux unprivileged ping socket if allowed
+    by net.ipv4.ping_group_range. Replies are matched to pending pings
+    by (address, sequence).
+    """
+
+    PAYLOAD = b"portfinder"
+
+    def __init__(self, resolution: float = 0.05):
+        self._socket: socket.socket | None = None
+        self._raw = False
+        self._identifier = os.getpid() & 0xFFFF
+        self._sequence = 0
+        self._pending: dict[tuple[str, int], asyncio.Future[None]] = {}
+        self._wheel = TimerWheel(resolution)
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def start(self) -> None:
+        """
+        Open the ICMP socket in the running loop
+        :raises OSError: no permission for raw or ping sockets
+        """
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+            self._raw = True
+        except OSError:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        sock.setblocking(False)
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._on_readable, sock)
+        self._socket = sock
+
+    def _on_readable(self, sock: socket.socket) -> None:
+        while True:
+            try:
+                data, addr = sock.recvfrom(65535)
+            except OSError:
+                break
+            if self._raw:
+                # raw sockets receive the IPv4 header too
+                data = data[(data[0] & 0x0F) * 4 :]
+            if len(data) < _ICMP_HEADER.size:
+                continue
+            kind, _, _, identifier, sequence = _ICMP_HEADER.unpack_from(data)
+            # ping sockets rewrite the identifier, the kernel filters replies for them
+            if kind != ICMP_ECHO_REPLY or (self._raw and identifier != self._identifier):
+                continue
+            future = self._pending.pop((addr[0], sequence), None)
+            if future is not None and not future.done():
+                future.set_result(None)
+
+    def _expire(self, key: tuple[str, int], future: asyncio.Future[None]) -> None:
+        if self._pending.get(key) is future:
+            del self._pending[key]
+        if not future.done():
+            future.set_exception(asyncio.TimeoutError())
+
+    def _packet(self, sequence: int) -> bytes:
+        header = _ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, self._identifier, sequence)
+        checksum = _checksum(header + self.PAYLOAD)
+        return _ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, checksum, self._identifier, sequence) + self.PAYLOAD
+
+    async def ping(self, address: str, timeout: float = 1.0) -> bool:
+        """
+        Send one echo request and wait for the reply
+        :param address: IPv4 address
+        :param timeout: seconds to wait for reply
+        :return: True if the host replied
+        """
+        if self._socket is None:
+            raise RuntimeError("IcmpPinger is not started")
+        self._sequence = (self._sequence + 1) & 0xFFFF
+        key = (address, self._sequence)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            self._socket.sendto(self._packet(self._sequence), (address, 0))
+            self._wheel.schedule(timeout, lambda: self._expire(key, future))
+            await future
+            return True
+        except (asyncio.TimeoutError, OSError):
+            return False
+        finally:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if not future.done():
+                future.cancel()
+
+    def close(self) -> None:
+        self._wheel.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        if self._socket is not None:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(self._socket.fileno())
+            self._socket.close()
+            self._socket = None
+
+
+async def tcp_alive(host: str, ports: list[int], timeout: float = 1.0, slots: asyncio.Semaphore | None = None) -> bool:
+    """
+    Host is alive if any port accepts or actively refuses a connection,
+    connects to all ports run concurrently and stop at the first answer
+    :param host: IP address or hostname
+    :param ports: probe ports
+    :param timeout: connect timeout
+    :param slots: connects in flight shared with other hosts, unbounded if None
+    :return:
+    :raises OSError: local resource exhaustion, e.g. EMFILE
+    """
+
+    async def knock(port: int) -> bool:
+        async with slots or nullcontext():
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout)
+            except ConnectionRefusedError:
+                return True
+            except OSError as exc:
+                if exc.errno in RESOURCE_ERRORS:
+                    raise
+                return False
+            await _close_writer(writer)
+            return True
+
+    tasks = [asyncio.create_task(knock(port)) for port in ports]
+    try:
+        for knocked in asyncio.as_completed(tasks):
+            if await knocked:
+                return True
+        return False
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@dataclass
+class DiscoveryStats:
+    probed: int = 0
+    alive: int = 0
+    icmp: int = 0
+    tcp: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self):
+        return f"{self.alive}/{self.probed} hosts alive (icmp: {self.icmp}, tcp: {self.tcp}) in {self.elapsed:.2f}s"
+
+
+class HostDiscovery:
+    """
+    Pre-pass keeping only responding hosts: ICMP echo when the process
+    may open ICMP sockets, then TCP connects to a few common ports.
+    `concurrency` bounds TCP connects in flight over all hosts.
+    """
+
+    def __init__(
+        self,
+        ports: list[int],
+        timeout: float = 1.0,
+        concurrency: int = 500,
+        icmp: bool = True,
+        throttle: Callable[[str], Awaitable[None]] | None = None,
+    ):
+        self.ports = ports
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.icmp = icmp
+        self.throttle = throttle
+        self.stats = DiscoveryStats()
+        self._pinger: IcmpPinger | None = None
+        self._connects = asyncio.Semaphore(self.concurrency)
+
+    async def _throttle(self, host: str) -> None:
+        if self.throttle is not None:
+            await self.throttle(host)
+
+    async def alive(self, host: str) -> bool:
+        """
+        Check one host, ICMP first as the cheapest probe
+        :param host: IP address or hostname
+        :return:
+        """
+        self.stats.probed += 1
+        if self._pinger is not None and _is_ipv4(host):
+            await self._throttle(host)
+            if await self._pinger.ping(host, self.timeout):
+                self.stats.alive += 1
+                self.stats.icmp += 1
+                return True
+
+        for _ in self.ports:
+            await self._throttle(host)
+        if await tcp_alive(host, self.ports, self.timeout, self._connects):
+            self.stats.alive += 1
+            self.stats.tcp += 1
+            return True
+        return False
+
+    async def discover(self, targets: TargetSet) -> TargetSet:
+        """
+        Alive hosts of targets, `concurrency` hosts are checked at once
+        :param targets: TargetSet to check
+        :return: TargetSet of alive hosts
+        :raises OSError: local resource exhaustion, e.g. EMFILE
+        """
+        started = time.monotonic()
+        if self.icmp:
+            self._pinger = IcmpPinger()
+            try:
+                self._pinger.start()
+            except OSError:
+                self._pinger = None
+
+        hosts = iter(targets)
+        alive: set[str] = set()
+
+        async def work() -> None:
+            for host in hosts:
+                if await self.alive(host):
+                    alive.add(host)
+
+        workers = [asyncio.create_task(work()) for _ in range(min(self.concurrency, targets.size))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            if self._pinger is not None:
+                self._pinger.close()
+                self._pinger = None
+            self.stats.elapsed = time.monotonic() - started
+        return TargetSet.from_targets(host for host in targets if host in alive)
@@ -1,31 +1,195 @@
+import asyncio
 import json
+from abc import (
+    ABC,
+    abstractmethod,
+)
 from pathlib import Path
-
-import aiofiles
+from typing import (
+    Any,
+    Generic,
+    TypeVar,
+)
 
 from portfinder.dto import (
+    Protocol,
     Result,
     ResultFileFormatEnum,
 )
 
 
-async def write_txt(output_path: Path, results: list[Result]):
-    async with aiofiles.open(output_path.with_suffix(".txt"), "w") as f:
-        for res in results:
-            if res:
-                await f.write(str(res))
+T = TypeVar("T")
 
 
-async def write_jsonl(output_path: Path, results: list[Result]):
-    async with aiofiles.open(output_path.with_suffix(".jsonl"), "w") as f:
-        for res in results:
-            if res:
-                await f.write(json.dumps(res.to_dict()) + "\n")
+class ResultSink(ABC, Generic[T]):
+    """
+    Incremental result writer: every result is formatted as soon as it is
+    found, items are buffered and written in batches when the buffer is
+    full or flush_interval seconds passed. Subclasses define the item
+    format and the storage: _open, _write_items and _close.
+    A write error of the periodic flush is raised by close().
+    """
+
+    suffix = ""
+
+    def __init__(self, output_path: Path, buffer_size: int = 256, flush_interval: float = 1.0):
+        self.path = output_path.with_suffix(self.suffix) if self.suffix else output_path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._buffer: list[T] = []
+        self._opened = False
+        self._lock = asyncio.Lock()
+        self._flusher: asyncio.Task | None = None
+
+    @abstractmethod
+    def format(self, result: Result) -> T: ...
+
+    @abstractmethod
+    async def _open(self) -> None: ...
+
+    @abstractmethod
+    async def _write_items(self, items: list[T]) -> None: ...
+
+    @abstractmethod
+    async def _close(self) -> None: ...
+
+    async def open(self) -> None:
+        await self._open()
+        self._opened = True
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def write(self, result: Result) -> None:
+        self._buffer.append(self.format(result))
+        self.count += 1
+        if len(self._buffer) >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._buffer or not self._opened:
+                return
+            items, self._buffer = self._buffer, []
+            await self._write_items(items)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self) -> None:
+        """
+        Flush the buffer and close the storage
+        :raises Exception: write error of the periodic flush, the storage is closed anyway
+        """
+        error: BaseException | None = None
+        if self._flusher is not None:
+            if self._flusher.done() and not self._flusher.cancelled():
+                error = self._flusher.exception()
+            self._flusher.cancel()
+            self._flusher = None
+        if not self._opened:
+            return
+        try:
+            if error is not None:
+                raise error
+            await self.flush()
+        finally:
+            await self._close()
+            self._opened = False
+
+    async def __aenter__(self) -> "ResultSink[T]":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+
+class FileSink(ResultSink[str]):
+    """
+    Text file sink, batches are joined into one write
+    """
+
+    def __init__(self, output_path: Path, buffer_size: int = 256, flush_interval: float = 1.0):
+        super().__init__(output_path, buffer_size, flush_interval)
+        self._file: Any = None
+
+    def header(self) -> str:
+        return ""
+
+    def footer(self) -> str:
+        return ""
+
+    async def _open(self) -> None:
+        import aiofiles
+
+        self._file = await aiofiles.open(self.path, "w")
+        if header := self.header():
+            self._buffer.append(header)
+
+    async def _write_items(self, items: list[str]) -> None:
+        await self._file.write("".join(items))
+        await self._file.flush()
+
+    async def _close(self) -> None:
+        if footer := self.footer():
+            await self._write_items([footer])
+        await self._file.close()
+        self._file = None
+
 
+class TxtSink(FileSink):
+    suffix = ".txt"
 
-async def write_json(output_path: Path, results: list[Result]):
-    async with aiofiles.open(output_path.with_suffix(".json"), "w") as f:
-        await f.write(json.dumps([r.to_dict() for r in results if r], indent=2))
+    def format(self, result: Result) -> str:
+        return f"{result}\n"
+
+
+class JsonlSink(FileSink):
+    suffix = ".jsonl"
+
+    def format(self, result: Result) -> str:
+        return json.dumps(result.to_dict()) + "\n"
+
+
+class JsonArraySink(FileSink):
+    """
+    Streaming JSON array, the file is a valid JSON document after close
+    """
+
+    suffix = ".json"
+
+    def header(self) -> str:
+        return "["
+
+    def footer(self) -> str:
+        return "\n]\n" if self.count else "]\n"
+
+    def format(self, result: Result) -> str:
+        return ("," if self.count else "") + "\n  " + json.dumps(result.to_dict())
+
+
+SINKS: dict[ResultFileFormatEnum, type[FileSink]] = {
+    ResultFileFormatEnum.TXT: TxtSink,
+    ResultFileFormatEnum.JSON: JsonArraySink,
+    ResultFileFormatEnum.JSONL: JsonlSink,
+}
+
+
+def open_sink(output_path: Path, fformat: ResultFileFormatEnum, **kwargs: Any) -> ResultSink:
+    """
+    Result sink by file format, use as async context manager
+    :param output_path: output file path without extension
+    :param fformat: any from SINKS or SQLITE
+    :param kwargs: ResultSink options
+    :return:
+    """
+    if fformat == ResultFileFormatEnum.SQLITE:
+        from portfinder.utils.database import SqliteSink
+
+        return SqliteSink(output_path, **kwargs)
+    return SINKS[fformat](output_path, **kwargs)
 
 
 async def save_result(
@@ -33,25 +197,86 @@ async def save_result(
     fformat: ResultFileFormatEnum,
     results: list[Result],
 ) -> None:
-    match fformat:
-        case ResultFileFormatEnum.TXT:
-            await write_txt(output_path, results)
-
-        case ResultFileFormatEnum.JSON:
-            await write_json(output_path, results)
-
-        case ResultFileFormatEnum.JSONL:
-            await write_jsonl(output_path, results)
+    async with open_sink(output_path, fformat) as sink:
+        for res in results:
+            if res:
+                await sink.write(res)
 
 
 async def read_file(
     input_file: Path,
+    strip_spaces: bool = True,
 ):
+    import aiofiles
+
     try:
         async with aiofiles.open(input_file, "r") as f:
             async for line in f:
-                yield line.strip().replace(" ", "")
+                yield line.strip().replace(" ", "") if strip_spaces else line.strip()
     except FileNotFoundError:
         raise ValueError(f"File not found: {input_file}")
     except PermissionError:
         raise ValueError(f"Permission denied for file: {input_file}")
+
+
+def _parse_result(item: Any, source: str) -> Result:
+    """
+    Result from one decoded JSON item
+    :param source: file and line or item number for the error message
+    :raises ValueError: not a result object
+    """
+    try:
+        return Result.from_dict(item)
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid result at {source}: {exc!r}") from exc
+
+
+async def read_results(input_file: Path):
+    """
+    Read results from JSONL (or JSON array) file saved by save_result
+    :param input_file: result file path
+    :return: AsyncGenerator Result
+    :raises ValueError: malformed file, line or result
+    """
+    if input_file.suffix == ".json":
+        import aiofiles
+
+        async with aiofiles.open(input_file, "r") as f:
+            try:
+                items = json.loads(await f.read())
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"Invalid JSON in {input_file}: {exc}") from exc
+        if not isinstance(items, list):
+            raise ValueError(f"Invalid result file {input_file}: JSON array expected")
+        for number, item in enumerate(items, 1):
+            yield _parse_result(item, f"{input_file} item {number}")
+        return
+
+    number = 0
+    async for line in read_file(input_file, strip_spaces=False):
+        number += 1
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid JSON at {input_file}:{number}: {exc}") from exc
+        yield _parse_result(item, f"{input_file}:{number}")
+
+
+async def merge_results(input_files: list[Path]) -> list[Result]:
+    """
+    Merge result files (e.g. per-shard JSONL outputs) into one result set
+    deduplicated by (host, port) with protocols united
+    :param input_files: result files paths
+    :return: list of Result
+    """
+    merged: dict[tuple[str, int], Result] = {}
+    for input_file in input_files:
+        async for result in read_results(input_file):
+            key = (result.host, result.port)
+            if (current := merged.get(key)) is None:
+                merged[key] = result
+                continue
+            current.protocols = [proto for proto in Protocol if proto in current.protocols or proto in result.protocols]
+    return list(merged.values())
@@ -0,0 +1,244 @@
+import asyncio
+import bisect
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any
+
+from portfinder.dto import (
+    ProbeStatus,
+    Protocol,
+)
+
+
+# latency histogram upper bounds, seconds
+BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    float("inf"),
+)
+
+current_metrics: ContextVar["ScanMetrics | None"] = ContextVar("current_metrics", default=None)
+
+
+def record_probe(protocol: Protocol, status: ProbeStatus, elapsed: float) -> None:
+    """
+    Record one probe outcome into the metrics of the running scan, no-op outside of a scan
+    :param protocol: probed protocol
+    :param status: probe outcome
+    :param elapsed: probe seconds
+    :return:
+    """
+    if (metrics := current_metrics.get()) is not None:
+        metrics.observe(protocol, status, elapsed)
+
+
+class ScanMetrics:
+    """
+    Scan counters and latency histograms per (protocol, outcome).
+    Every row is [count, seconds sum, *bucket counts], so recording is
+    one dict lookup and a bisect, and states of worker processes are
+    merged by summing.
+    """
+
+    def __init__(self, total: int = 0):
+        self.started = time.monotonic()
+        self.total = total
+        self.ports = 0
+        self.found = 0
+        self.in_flight = 0
+        self.outcomes: dict[tuple[str, str], list[float]] = {}
+
+    def observe(self, protocol: Protocol, status: ProbeStatus, elapsed: float) -> None:
+        if (row := self.outcomes.get((protocol, status))) is None:
+            row = self.outcomes[(protocol, status)] = [0, 0.0, *([0] * len(BUCKETS))]
+        row[0] += 1
+        row[1] += elapsed
+        row[2 + bisect.bisect_left(BUCKETS, elapsed)] += 1
+
+    def port_started(self) -> None:
+        self.in_flight += 1
+
+    def port_done(self, found: bool) -> None:
+        self.in_flight -= 1
+        self.ports += 1
+        if found:
+            self.found += 1
+
+    def port_stopped(self) -> None:
+        """
+        Port probe cancelled or failed before it finished, not counted as done
+        """
+        self.in_flight -= 1
+
+    @property
+    def probes(self) -> int:
+        return int(sum(row[0] for row in self.outcomes.values()))
+
+    def state(self) -> dict[str, Any]:
+        """
+        Raw counters, e.g. to send from a worker process
+        """
+        return {
+            "total": self.total,
+            "ports": self.ports,
+            "found": self.found,
+            "in_flight": self.in_flight,
+            "outcomes": [[protocol, status, row] for (protocol, status), row in self.outcomes.items()],
+        }
+
+    @classmethod
+    def combined(cls, states: list[dict[str, Any]], started: float | None = None) -> "ScanMetrics":
+        """
+        Sum of worker states
+        """
+        metrics = cls()
+        if started is not None:
+            metrics.started = started
+        for state in states:
+            metrics.total += state["total"]
+            metrics.ports += state["ports"]
+            metrics.found += state["found"]
+            metrics.in_flight += state["in_flight"]
+            for protocol, status, row in state["outcomes"]:
+                if (current := metrics.outcomes.get((protocol, status))) is None:
+                    metrics.outcomes[(protocol, status)] = list(row)
+                else:
+                    for index, value in enumerate(row):
+                        current[index] += value
+        return metrics
+
+    def quantile(self, quantile: float) -> float | None:
+        """
+        Probe latency quantile over every protocol and outcome
+        :param quantile: e.g. 0.99
+        :return: bucket upper bound, None before the first probe
+        """
+        rows = list(self.outcomes.values())
+        if not rows:
+            return None
+        return self._quantile([sum(values) for values in zip(*rows, strict=True)], quantile)
+
+    @staticmethod
+    def _quantile(row: list[float], quantile: float) -> float | None:
+        """
+        Bucket upper bound of the quantile, None for an empty row
+        """
+        if not row[0]:
+            return None
+        rank = quantile * row[0]
+        seen = 0.0
+        for bound, count in zip(BUCKETS, row[2:], strict=True):
+            seen += count
+            if seen >= rank:
+                return bound
+        return BUCKETS[-1]
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        JSON-ready stats report
+        """
+        elapsed = time.monotonic() - self.started
+        protocols: dict[str, dict[str, Any]] = {}
+        for (protocol, status), row in sorted(self.outcomes.items()):
+            protocols.setdefault(protocol, {})[status] = {
+                "count": int(row[0]),
+                "mean": row[1] / row[0] if row[0] else None,
+                "p50": self._quantile(row, 0.5),
+                "p99": self._quantile(row, 0.99),
+            }
+        return {
+            "elapsed": round(elapsed, 3),
+            "ports_total": self.total,
+            "ports_done": self.ports,
+            "ports_per_second": round(self.ports / elapsed, 1) if elapsed else 0.0,
+            "probes": self.probes,
+            "probes_per_second": round(self.probes / elapsed, 1) if elapsed else 0.0,
+            "in_flight": self.in_flight,
+            "results": self.found,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "protocols": protocols,
+        }
+
+    def progress_line(self) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.ports / elapsed if elapsed else 0.0
+        probes = self.probes
+        timeouts = sum(row[0] for (_, status), row in self.outcomes.items() if status == ProbeStatus.TIMEOUT)
+        line = (
+            f"{self.ports}/{self.total or '?'} ports, {rate:.1f} ports/s, {probes / elapsed if elapsed else 0:.1f}"
+            f" probes/s, in flight {self.in_flight}, found {self.found},"
+            f" timeouts {100 * timeouts / probes if probes else 0:.1f}%"
+        )
+        if self.total and rate:
+            remaining = max(0, self.total - self.ports) / rate
+            line = f"{100 * self.ports / self.total:.1f}% {line}, ETA {timedelta(seconds=round(remaining))}"
+        return line
+
+    def prometheus(self) -> str:
+        """
+        Prometheus text exposition format
+        """
+        lines = [
+            "# TYPE portfinder_ports_planned gauge",
+            f"portfinder_ports_planned {self.total}",
+            "# TYPE portfinder_ports_done_total counter",
+            f"portfinder_ports_done_total {self.ports}",
+            "# TYPE portfinder_ports_in_flight gauge",
+            f"portfinder_ports_in_flight {self.in_flight}",
+            "# TYPE portfinder_results_total counter",
+            f"portfinder_results_total {self.found}",
+            "# TYPE portfinder_probe_seconds histogram",
+        ]
+        for (protocol, status), row in sorted(self.outcomes.items()):
+            labels = f'protocol="{protocol}",outcome="{status}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, row[2:], strict=True):
+                cumulative += int(count)
+                le = "+Inf" if bound == float("inf") else bound
+                lines.append(f'portfinder_probe_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"portfinder_probe_seconds_sum{{{labels}}} {row[1]}")
+            lines.append(f"portfinder_probe_seconds_count{{{labels}}} {int(row[0])}")
+        return "\n".join(lines) + "\n"
+
+
+async def serve_metrics(metrics: Callable[[], ScanMetrics], port: int, host: str = "127.0.0.1") -> asyncio.Server:
+    """
+    Local HTTP endpoint answering every request with Prometheus text
+    :param metrics: current ScanMetrics getter
+    :param port: listen port
+    :param host: listen address
+    :return: started server, close it when the scan ends
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5)
+            body = metrics().prometheus().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(body), body)
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,186 @@
+from collections.abc import Callable
+from dataclasses import (
+    dataclass,
+    field,
+)
+from pathlib import Path
+
+from portfinder.utils.file import read_file
+
+
+Validator = Callable[[bytes, bytes], bool]
+
+
+def any_response(request: bytes, response: bytes) -> bool:
+    return True
+
+
+def _dns_response(request: bytes, response: bytes) -> bool:
+    """
+    Same transaction id and QR flag set
+    """
+    return len(response) >= 12 and response[:2] == request[:2] and bool(response[2] & 0x80)
+
+
+def _ntp_response(request: bytes, response: bytes) -> bool:
+    """
+    NTP server mode packet
+    """
+    return len(response) >= 48 and response[0] & 0x07 == 4
+
+
+def _snmp_response(request: bytes, response: bytes) -> bool:
+    """
+    BER sequence with GetResponse PDU
+    """
+    return len(response) > 2 and response[0] == 0x30 and b"\xa2" in response[:64]
+
+
+def _ssdp_response(request: bytes, response: bytes) -> bool:
+    return response.startswith(b"HTTP/1.1")
+
+
+def _memcached_response(request: bytes, response: bytes) -> bool:
+    """
+    Same request id in UDP frame header and text protocol reply
+    """
+    return len(response) > 8 and response[:2] == request[:2] and response[8:].startswith((b"STAT", b"ERROR", b"END"))
+
+
+def _tftp_response(request: bytes, response: bytes) -> bool:
+    """
+    DATA or ERROR opcode
+    """
+    return response[:2] in (b"\x00\x03", b"\x00\x05")
+
+
+def _prefix_validator(prefix: bytes) -> Validator:
+    def validate(request: bytes, response: bytes) -> bool:
+        return response.startswith(prefix)
+
+    return validate
+
+
+@dataclass(frozen=True)
+class UdpPayload:
+    """
+    Probe datagram with response validator
+    """
+
+    name: str
+    data: bytes
+    validator: Validator = field(default=any_response, compare=False)
+
+    def matches(self, response: bytes) -> bool:
+        return self.validator(self.data, response)
+
+
+GENERIC_PAYLOAD = UdpPayload("generic", b"\x00")
+
+DNS_PAYLOAD = UdpPayload(
+    "dns",
+    # id 0x5046, recursion desired, one question: ". IN NS"
+    b"\x50\x46\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x01",
+    _dns_response,
+)
+
+MDNS_PAYLOAD = UdpPayload(
+    "mdns",
+    # "_services._dns-sd._udp.local IN PTR"
+    b"\x50\x46\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00"
+    b"\x09_services\x07_dns-sd\x04_udp\x05local\x00\x00\x0c\x00\x01",
+    _dns_response,
+)
+
+NTP_PAYLOAD = UdpPayload("ntp", b"\x1b" + b"\x00" * 47, _ntp_response)
+
+SNMP_PAYLOAD = UdpPayload(
+    "snmp",
+    # SNMPv1 GetRequest community "public" sysDescr.0
+    b"\x30\x26\x02\x01\x00\x04\x06public\xa0\x19\x02\x01\x01\x02\x01\x00\x02\x01\x00"
+    b"\x30\x0e\x30\x0c\x06\x08\x2b\x06\x01\x02\x01\x01\x01\x00\x05\x00",
+    _snmp_response,
+)
+
+NETBIOS_PAYLOAD = UdpPayload(
+    "netbios-ns",
+    # NBSTAT node status request for "*"
+    b"\x50\x46\x00\x10\x00\x01\x00\x00\x00\x00\x00\x00\x20CKAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA\x00\x00\x21\x00\x01",
+    _dns_response,
+)
+
+SSDP_PAYLOAD = UdpPayload(
+    "ssdp",
+    b'M-SEARCH * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nMAN: "ssdp:discover"\r\nMX: 1\r\nST: ssdp:all\r\n\r\n',
+    _ssdp_response,
+)
+
+MEMCACHED_PAYLOAD = UdpPayload("memcached", b"\x50\x46\x00\x00\x00\x01\x00\x00stats\r\n", _memcached_response)
+
+TFTP_PAYLOAD = UdpPayload("tftp", b"\x00\x01portfinder\x00octet\x00", _tftp_response)
+
+
+DEFAULT_PAYLOADS: dict[int, UdpPayload] = {
+    53: DNS_PAYLOAD,
+    69: TFTP_PAYLOAD,
+    123: NTP_PAYLOAD,
+    137: NETBIOS_PAYLOAD,
+    161: SNMP_PAYLOAD,
+    1900: SSDP_PAYLOAD,
+    5353: MDNS_PAYLOAD,
+    11211: MEMCACHED_PAYLOAD,
+}
+
+
+def _parse_ports(value: str) -> list[int]:
+    ports: list[int] = []
+    for item in value.split(","):
+        if "-" in item:
+            start, end = map(int, item.split("-"))
+            ports.extend(range(start, end + 1))
+        else:
+            ports.append(int(item))
+    return ports
+
+
+class PayloadRegistry:
+    """
+    UDP probe payloads by port, GENERIC_PAYLOAD for unknown ports
+    """
+
+    def __init__(self, payloads: dict[int, UdpPayload] | None = None, default: UdpPayload = GENERIC_PAYLOAD):
+        self._payloads = dict(DEFAULT_PAYLOADS if payloads is None else payloads)
+        self.default = default
+
+    def get(self, port: int) -> UdpPayload:
+        return self._payloads.get(port, self.default)
+
+    def register(self, port: int, payload: UdpPayload) -> None:
+        self._payloads[port] = payload
+
+    def __contains__(self, port: int) -> bool:
+        return port in self._payloads
+
+    async def load_file(self, input_file: Path) -> None:
+        """
+        Register user payloads from file, one per line:
+            <ports> <name> <hex payload> [<hex response prefix>]
+        e.g. '27015 source-engine ffffffff54536f7572636520456e67696e6520517565727900 ffffffff49'
+        Empty lines and lines starting with '#' are skipped.
+        :param input_file: payloads file path
+        :return:
+        """
+        async for line in read_file(input_file, strip_spaces=False):
+            if not line or line.startswith("#"):
+                continue
+            try:
+                ports, name, data, *expected = line.split()
+                payload = UdpPayload(
+                    name,
+                    bytes.fromhex(data),
+                    _prefix_validator(bytes.fromhex(expected[0])) if expected else any_response,
+                )
+                for port in _parse_ports(ports):
+                    self.register(port, payload)
+            except ValueError as exc:
+                raise ValueError(f"Invalid UDP payload line: {line}") from exc
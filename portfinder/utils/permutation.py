@@ -0,0 +1,42 @@
+import random
+
+
+class IndexPermutation:
+    """
+    Stateless pseudo-random permutation of range(size).
+    A keyed Feistel network permutes the smallest even-bit power-of-two
+    domain covering size, values outside range(size) are cycle-walked.
+    Any position maps to its index in O(1) memory, so resume and sharding
+    are just offsets in the sequence.
+    """
+
+    ROUNDS = 4
+    _MULTIPLIER = 0x9E3779B97F4A7C15
+    _MASK64 = (1 << 64) - 1
+
+    def __init__(self, size: int, seed: int | None = None):
+        self.size = size
+        self.seed = random.getrandbits(32) if seed is None else seed
+        bits = max(2, (size - 1).bit_length())
+        self._half = (bits + 1) // 2
+        self._half_mask = (1 << self._half) - 1
+        rnd = random.Random(self.seed)
+        self._keys = [rnd.getrandbits(64) for _ in range(self.ROUNDS)]
+
+    def _round(self, value: int, key: int) -> int:
+        mixed = ((value ^ key) * self._MULTIPLIER) & self._MASK64
+        return (mixed ^ (mixed >> 29)) & self._half_mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self._half, value & self._half_mask
+        for key in self._keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << self._half) | right
+
+    def __getitem__(self, position: int) -> int:
+        if not 0 <= position < self.size:
+            raise IndexError(position)
+        value = self._encrypt(position)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
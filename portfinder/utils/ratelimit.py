@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter. Every acquire reserves one token,
+    so the cost is O(1) and waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate / 20)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        Take one token, possibly borrowing from the future
+        :return: seconds to wait before the token may be used
+        """
+        self._refill(time.monotonic())
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    @property
+    def idle(self) -> bool:
+        """
+        Bucket is full again, dropping it loses no state
+        """
+        self._refill(time.monotonic())
+        return self._tokens >= self.burst
+
+    async def acquire(self) -> None:
+        if delay := self.reserve():
+            await asyncio.sleep(delay)
+
+
+class HostRateLimiter:
+    """
+    Per-host token buckets created on demand,
+    idle buckets are pruned periodically to keep memory bounded.
+    """
+
+    PRUNE_EVERY = 4096
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+        self._acquired = 0
+
+    def reserve(self, host: str) -> float:
+        """
+        Take one token from host bucket
+        :param host: target host
+        :return: seconds to wait
+        """
+        self._acquired += 1
+        if self._acquired % self.PRUNE_EVERY == 0:
+            self._buckets = {key: bucket for key, bucket in self._buckets.items() if not bucket.idle}
+
+        if (bucket := self._buckets.get(host)) is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket.reserve()
+
+    async def acquire(self, host: str) -> None:
+        if delay := self.reserve(host):
+            await asyncio.sleep(delay)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
@@ -1,66 +1,77 @@
 import asyncio
-import ssl
+import time
+from collections.abc import (
+    Callable,
+    Collection,
+)
+from typing import TYPE_CHECKING
 
+from portfinder.dto import (
+    ProbeStatus,
+    Protocol,
+)
+from portfinder.utils.metrics import record_probe
+from portfinder.utils.payloads import PayloadRegistry
+from portfinder.utils.udp import (
+    UdpEngine,
+    get_udp_engine,
+)
 
-async def check_udp_port(host: str, port: int, timeout: float = 1.0) -> bool:
+
+if TYPE_CHECKING:
+    from portfinder.utils.connect import EpollConnectEngine
+    from portfinder.utils.tls import TlsProber
+
+
+STREAM_PROTOCOLS = frozenset({Protocol.TCP, Protocol.HTTP, Protocol.HTTPS})
+DEFAULT_REGISTRY = PayloadRegistry()
+HTTP_REQUEST = b"GET / HTTP/1.1\r\nHost: portfinder_scan\r\n\r\n"
+
+# called with probe outcome and seconds from send to outcome
+ProbeObserver = Callable[[ProbeStatus, float], None]
+
+
+async def check_udp_port(
+    host: str,
+    port: int,
+    timeout: float = 1.0,
+    engine: UdpEngine | None = None,
+    payloads: PayloadRegistry | None = None,
+    observe: ProbeObserver | None = None,
+) -> bool:
     """
     Asynchronously checks if a UDP port is open on a given host
-    with timeout.
+    with timeout. The probe payload is protocol-specific by port
+    and the reply must pass the payload validator.
     Args:
         host (str): The hostname or IP address to connect to.
         port (int): The UDP port number to check.
         timeout (int): The maximum time (in seconds) to wait for a connection.
+        engine (UdpEngine): Shared UDP engine, default engine of the running loop if None.
+        payloads (PayloadRegistry): Payloads by port, built-in payloads if None.
+        observe (ProbeObserver): Called with the probe outcome and its duration.
 
     Returns:
         bool: True if the port is open, False otherwise.
     """
-    loop = asyncio.get_running_loop()
-    result = False
-
-    class Protocol(asyncio.DatagramProtocol):
-        def __init__(self):
-            self.response_received = asyncio.Event()
-            self.transport = None
-
-        def connection_made(self, transport):
-            self.transport = transport
-            transport.sendto(b"\x00")
-
-        def datagram_received(self, data, addr):
-            nonlocal result
-            result = True
-            self.response_received.set()
-
-        def error_received(self, exc):
-            self.response_received.set()
-
-        def connection_lost(self, exc):
-            self.response_received.set()
-
+    engine = engine or get_udp_engine()
+    payload = (payloads or DEFAULT_REGISTRY).get(port)
+    started = time.monotonic()
+    response = None
     try:
-        transport, protocol = await loop.create_datagram_endpoint(Protocol, remote_addr=(host, port))
-
-        try:
-            await asyncio.wait_for(
-                protocol.response_received.wait(),
-                timeout,
-            )
-            return result
-        except (asyncio.TimeoutError, ConnectionRefusedError, OSError, ssl.SSLError):
-            return False
-        except ConnectionResetError:
-            return True
-        finally:
-            try:
-                transport.close()
-            except ConnectionResetError:
-                return True
-            except (ssl.SSLError, asyncio.TimeoutError):
-                pass
-
-    except (OSError, ConnectionRefusedError):
-        return False
-    return True
+        response = await engine.probe(host, port, payload.data, timeout)
+        status = ProbeStatus.OPEN
+    except asyncio.TimeoutError:
+        status = ProbeStatus.TIMEOUT
+    except ConnectionRefusedError:
+        status = ProbeStatus.REFUSED
+    except OSError:
+        status = ProbeStatus.ERROR
+    elapsed = time.monotonic() - started
+    record_probe(Protocol.UDP, status, elapsed)
+    if observe is not None:
+        observe(status, elapsed)
+    return response is not None and payload.matches(response)
 
 
 async def check_tcp_port(host, port, timeout=1) -> bool:
@@ -75,57 +86,101 @@ async def check_tcp_port(host, port, timeout=1) -> bool:
     Returns:
         bool: True if the port is open, False otherwise.
     """
-    writer = None
-    try:
-        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout)
-        return True
-    except (asyncio.TimeoutError, ConnectionRefusedError, OSError, ssl.SSLError):
+    writer = await _connect(host, port, timeout)
+    if writer is None:
         return False
-    except ConnectionResetError:
-        return True
-    finally:
-        if writer is not None:
-            try:
-                writer.close()
-                await writer.wait_closed()
-            except ConnectionResetError:
-                return True
-            except (ssl.SSLError, asyncio.TimeoutError):
-                pass
+    await _close_writer(writer)
     return True
 
 
+async def _connect(
+    host: str,
+    port: int,
+    timeout: float,
+    observe: ProbeObserver | None = None,
+    engine: "EpollConnectEngine | None" = None,
+) -> asyncio.StreamWriter | None:
+    """
+    Open TCP stream and report the connect outcome.
+    With engine the handshake runs on the engine and only
+    the connected socket is wrapped into a stream.
+    :return: connected writer or None
+    """
+    started = time.monotonic()
+    writer = None
+    if engine is not None:
+        status, sock = await engine.connect(host, port, timeout)
+        elapsed = time.monotonic() - started
+        record_probe(Protocol.TCP, status, elapsed)
+        if observe is not None:
+            observe(status, elapsed)
+        if sock is not None:
+            _, writer = await asyncio.open_connection(sock=sock)
+        return writer
+
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout)
+        status = ProbeStatus.OPEN
+    except asyncio.TimeoutError:
+        status = ProbeStatus.TIMEOUT
+    except ConnectionRefusedError:
+        status = ProbeStatus.REFUSED
+    except OSError:
+        status = ProbeStatus.ERROR
+    elapsed = time.monotonic() - started
+    record_probe(Protocol.TCP, status, elapsed)
+    if observe is not None:
+        observe(status, elapsed)
+    return writer
+
+
+async def _close_writer(writer: asyncio.StreamWriter) -> None:
+    """
+    Close stream and wait for it ignoring reset and TLS shutdown errors
+    """
+    try:
+        writer.close()
+        await writer.wait_closed()
+    except (asyncio.TimeoutError, OSError):
+        pass
+
+
+async def _send_http_request(writer: asyncio.StreamWriter, timeout: float) -> bool:
+    """
+    Write plain HTTP request into already connected stream
+    :param writer: connected stream writer
+    :param timeout: drain timeout
+    :return: True if the request was sent
+    """
+    started = time.monotonic()
+    try:
+        writer.write(HTTP_REQUEST)
+        await asyncio.wait_for(writer.drain(), timeout=timeout)
+        status = ProbeStatus.OPEN
+    except asyncio.TimeoutError:
+        status = ProbeStatus.TIMEOUT
+    except OSError:
+        status = ProbeStatus.ERROR
+    record_probe(Protocol.HTTP, status, time.monotonic() - started)
+    return status == ProbeStatus.OPEN
+
+
 async def check_http_port(host: str, port: int, timeout: float = 3.0) -> bool:
     """
     Asynchronously checks if a HTTP port is open on a given host
     :param host:
     :param port:
-    :param ssl:
     :param timeout:
     :return:
     """
-    writer = None
-    try:
-        reader, writer = await asyncio.wait_for(
-            asyncio.open_connection(host, port),
-            timeout=timeout,
-        )
-        writer.write(b"GET / HTTP/1.1\r\nHost: portfinder_scan\r\n\r\n")
-        await asyncio.wait_for(writer.drain(), timeout=timeout)
-    except (asyncio.TimeoutError, ConnectionRefusedError, OSError, ssl.SSLError):
+    writer = await _connect(host, port, timeout)
+    if writer is None:
         return False
-    except ConnectionResetError:
-        return True
+
+    try:
+        return await _send_http_request(writer, timeout)
     finally:
-        if writer is not None:
-            try:
-                writer.close()
-                await writer.wait_closed()
-            except ConnectionResetError:
-                return True
-            except (ssl.SSLError, asyncio.TimeoutError):
-                pass
-    return True
+        await _close_writer(writer)
 
 
 async def check_https_port(host: str, port: int, timeout: float = 3.0) -> bool:
@@ -136,31 +191,100 @@ async def check_https_port(host: str, port: int, timeout: float = 3.0) -> bool:
     :param timeout:
     :return:
     """
+    from portfinder.utils.tls import default_context
+
     writer = None
+    started = time.monotonic()
+    status = ProbeStatus.ERROR
     try:
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
         reader, writer = await asyncio.wait_for(
-            asyncio.open_connection(host, port, ssl=ssl_context),
+            asyncio.open_connection(host, port, ssl=default_context()),
             timeout=timeout,
         )
 
         writer.write(b"GET / HTTP/1.1\r\nHost: lol\r\n\r\n")
         await asyncio.wait_for(writer.drain(), timeout=timeout)
+        status = ProbeStatus.OPEN
         return True
 
-    except (asyncio.TimeoutError, ConnectionRefusedError, OSError, ssl.SSLError):
+    except asyncio.TimeoutError:
+        status = ProbeStatus.TIMEOUT
+        return False
+    except ConnectionRefusedError:
+        status = ProbeStatus.REFUSED
+        return False
+    except OSError:
         return False
-    except ConnectionResetError:
-        return True
     finally:
+        record_probe(Protocol.HTTPS, status, time.monotonic() - started)
         if writer is not None:
             try:
                 writer.close()
                 await writer.wait_closed()
             except ConnectionResetError:
                 return True
-            except (ssl.SSLError, asyncio.TimeoutError):
+            except (asyncio.TimeoutError, OSError):
                 pass
     return True
+
+
+async def check_stream_protocols(
+    host: str,
+    port: int,
+    protocols: Collection[Protocol],
+    timeout: float = 3.0,
+    connect_timeout: float | None = None,
+    observe: ProbeObserver | None = None,
+    engine: "EpollConnectEngine | None" = None,
+    tls: "TlsProber | None" = None,
+    server_hostname: str | None = None,
+) -> list[Protocol]:
+    """
+    Combined TCP probe pipeline: one TCP connect serves TCP and HTTP checks
+    on the same socket. Closed ports skip HTTP and HTTPS immediately,
+    HTTPS handshake is attempted only on open ports.
+    :param host:
+    :param port:
+    :param protocols: any from STREAM_PROTOCOLS, other items are ignored
+    :param timeout: HTTP and HTTPS timeout
+    :param connect_timeout: TCP connect timeout, timeout if None
+    :param observe: called with the first connect outcome and its duration
+    :param engine: connect engine, plain TCP checks then never allocate streams
+    :param tls: HTTPS prober with shared context, check_https_port if None
+    :param server_hostname: TLS SNI name for address hosts resolved from a domain
+    :return: found protocols
+    """
+    found: list[Protocol] = []
+    connect_timeout = timeout if connect_timeout is None else connect_timeout
+    if engine is not None and Protocol.TCP in protocols and Protocol.HTTP not in protocols:
+        status, elapsed = await engine.probe(host, port, connect_timeout)
+        record_probe(Protocol.TCP, status, elapsed)
+        if observe is not None:
+            observe(status, elapsed)
+        if status != ProbeStatus.OPEN:
+            return found
+        found.append(Protocol.TCP)
+    elif Protocol.TCP in protocols or Protocol.HTTP in protocols:
+        writer = await _connect(host, port, connect_timeout, observe, engine)
+        if writer is None:
+            return found
+
+        try:
+            if Protocol.TCP in protocols:
+                found.append(Protocol.TCP)
+            if Protocol.HTTP in protocols and await _send_http_request(writer, timeout):
+                found.append(Protocol.HTTP)
+        finally:
+            await _close_writer(writer)
+
+    if Protocol.HTTPS in protocols:
+        # without TCP and HTTP the TLS connect is the first one
+        first = Protocol.TCP not in protocols and Protocol.HTTP not in protocols
+        if await (
+            tls.check(host, port, timeout, server_hostname, connect_timeout, observe if first else None)
+            if tls is not None
+            else check_https_port(host, port, timeout)
+        ):
+            found.append(Protocol.HTTPS)
+
+    return found
@@ -0,0 +1,75 @@
+import asyncio
+import socket
+import time
+from collections.abc import Iterable
+
+
+class Resolver:
+    """
+    Caching resolver over loop.getaddrinfo: every name is looked up once
+    per ttl, concurrent lookups of one name share a single request.
+    getaddrinfo does not expose record TTLs, so ttl is fixed;
+    failed lookups are cached for negative_ttl.
+    """
+
+    def __init__(self, ttl: float = 300.0, negative_ttl: float = 30.0, concurrency: int = 64):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.concurrency = max(1, concurrency)
+        self._cache: dict[str, tuple[float, list[str]]] = {}
+        self._pending: dict[str, asyncio.Future[list[str]]] = {}
+        self.lookups = 0
+
+    async def _lookup(self, name: str) -> list[str]:
+        self.lookups += 1
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(name, None, type=socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError):
+            return []
+        return list(dict.fromkeys(str(sockaddr[0]) for *_, sockaddr in infos))
+
+    async def resolve(self, name: str) -> list[str]:
+        """
+        All A and AAAA addresses of name
+        :param name: domain name
+        :return: unique addresses, empty if the name does not resolve
+        """
+        if (cached := self._cache.get(name)) is not None and cached[0] > time.monotonic():
+            return cached[1]
+        if (future := self._pending.get(name)) is not None:
+            return await asyncio.shield(future)
+
+        future = self._pending[name] = asyncio.get_running_loop().create_future()
+        try:
+            addresses = await self._lookup(name)
+            ttl = self.ttl if addresses else self.negative_ttl
+            self._cache[name] = (time.monotonic() + ttl, addresses)
+            future.set_result(addresses)
+            return addresses
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        finally:
+            del self._pending[name]
+
+    async def resolve_all(self, names: Iterable[str]) -> dict[str, list[str]]:
+        """
+        Resolve names concurrently, `concurrency` lookups at once
+        :param names: domain names
+        :return: addresses by name
+        """
+        names = list(dict.fromkeys(names))
+        resolved: dict[str, list[str]] = {}
+        pending = iter(names)
+
+        async def work() -> None:
+            for name in pending:
+                resolved[name] = await self.resolve(name)
+
+        await asyncio.gather(*(work() for _ in range(min(self.concurrency, len(names)))))
+        return {name: resolved[name] for name in names}
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -0,0 +1,81 @@
+import ipaddress
+
+
+class RttEstimator:
+    """
+    Smoothed round-trip time and its variation as in TCP (RFC 6298),
+    the probe timeout is SRTT + K * RTTVAR clamped to [floor, ceiling]
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self, initial: float, floor: float, ceiling: float):
+        self.initial = initial
+        self.floor = floor
+        self.ceiling = ceiling
+        self.srtt: float | None = None
+        self.rttvar = 0.0
+        self.samples = 0
+
+    def sample(self, rtt: float) -> None:
+        """
+        Add measured round-trip time of one answered probe
+        :param rtt: seconds from send to answer
+        :return:
+        """
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.samples += 1
+
+    @property
+    def timeout(self) -> float:
+        if self.srtt is None:
+            return self.initial
+        return min(self.ceiling, max(self.floor, self.srtt + self.K * self.rttvar))
+
+
+class RttTable:
+    """
+    RTT estimators per network: /24 for IPv4, /64 for IPv6, the name
+    itself for domains. Hosts of one network share the path, so they
+    share samples. The oldest estimators are dropped over max_entries.
+    """
+
+    def __init__(self, initial: float, floor: float, ceiling: float, max_entries: int = 65536):
+        self.initial = initial
+        self.floor = floor
+        self.ceiling = ceiling
+        self.max_entries = max_entries
+        self._estimators: dict[str, RttEstimator] = {}
+
+    @staticmethod
+    def key(host: str) -> str:
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return host
+        prefix = 24 if address.version == 4 else 64
+        return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+    def estimator(self, host: str) -> RttEstimator:
+        key = self.key(host)
+        if (estimator := self._estimators.get(key)) is None:
+            if len(self._estimators) >= self.max_entries:
+                del self._estimators[next(iter(self._estimators))]
+            estimator = self._estimators[key] = RttEstimator(self.initial, self.floor, self.ceiling)
+        return estimator
+
+    def timeout(self, host: str) -> float:
+        return self.estimator(host).timeout
+
+    def observe(self, host: str, rtt: float) -> None:
+        self.estimator(host).sample(rtt)
+
+    def __len__(self) -> int:
+        return len(self._estimators)
@@ -0,0 +1,86 @@
+import asyncio
+from collections import deque
+from collections.abc import Hashable
+
+
+class FairScheduler:
+    """
+    Global concurrency slots shared by several jobs. A freed slot goes to
+    the next job in round-robin order among jobs with waiting probes,
+    so a job with a huge target space cannot starve small ones.
+    Use share(job) as the semaphore of the job.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = max(1, slots)
+        self.free = self.slots
+        self._waiters: dict[Hashable, deque[asyncio.Future[None]]] = {}
+        self._ring: deque[Hashable] = deque()
+
+    def share(self, job: Hashable) -> "JobSlots":
+        return JobSlots(self, job)
+
+    async def acquire(self, job: Hashable) -> None:
+        if self.free > 0 and not self._ring:
+            self.free -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        if (waiters := self._waiters.get(job)) is None:
+            waiters = self._waiters[job] = deque()
+            self._ring.append(job)
+        waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot was handed over right before cancellation
+                self.release()
+            else:
+                self._forget(job, future)
+            raise
+
+    def _forget(self, job: Hashable, future: asyncio.Future[None]) -> None:
+        if (waiters := self._waiters.get(job)) is None or future not in waiters:
+            return
+        waiters.remove(future)
+        if not waiters:
+            del self._waiters[job]
+            self._ring.remove(job)
+
+    def release(self) -> None:
+        """
+        Hand the slot to the first waiter of the next job, free it if nobody waits
+        """
+        while self._ring:
+            job = self._ring.popleft()
+            waiters = self._waiters[job]
+            future = waiters.popleft()
+            if waiters:
+                self._ring.append(job)
+            else:
+                del self._waiters[job]
+            # skip waiters cancelled but not yet resumed
+            if not future.done():
+                future.set_result(None)
+                return
+        self.free += 1
+
+    def waiting(self, job: Hashable) -> int:
+        return len(self._waiters.get(job, ()))
+
+
+class JobSlots:
+    """
+    Semaphore-like view of FairScheduler for one job
+    """
+
+    def __init__(self, scheduler: FairScheduler, job: Hashable):
+        self.scheduler = scheduler
+        self.job = job
+
+    async def __aenter__(self) -> None:
+        await self.scheduler.acquire(self.job)
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.scheduler.release()
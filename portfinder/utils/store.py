@@ -0,0 +1,71 @@
+from array import array
+from collections.abc import Iterator
+
+from portfinder.dto import Result
+
+
+class ResultStore:
+    """
+    Columnar in-memory results: parallel arrays of host id, port and
+    flags with interned packed hosts, a few bytes per row instead of
+    one object per result. Rows with optional fields (tls, hostname,
+    service, banner) keep their Result aside.
+    """
+
+    def __init__(self):
+        self._hosts: list[int | str] = []
+        # packed ints of IPv4 and IPv6 addresses overlap, the family is part of the key
+        self._host_ids: dict[tuple[int | str, bool], int] = {}
+        self._host_flags = array("B")
+        self._rows_host = array("I")
+        self._rows_port = array("H")
+        self._rows_flags = array("B")
+        self._extras: dict[int, Result] = {}
+
+    def append(self, result: Result) -> None:
+        key = (result.packed_host, result.packed_ipv6)
+        if (host_id := self._host_ids.get(key)) is None:
+            host_id = self._host_ids[key] = len(self._hosts)
+            self._hosts.append(result.packed_host)
+            self._host_flags.append(result.flags)
+        row = len(self._rows_port)
+        self._rows_host.append(host_id)
+        self._rows_port.append(result.port)
+        self._rows_flags.append(result.flags)
+        if result.tls is not None or result.hostname or result.service or result.banner:
+            self._extras[row] = result
+
+    def row(self, index: int) -> Result:
+        if (result := self._extras.get(index)) is not None:
+            return result
+        return Result.packed(self._hosts[self._rows_host[index]], self._rows_port[index], self._rows_flags[index])
+
+    def group_by_host(self) -> Iterator[tuple[str, list[Result]]]:
+        """
+        Results grouped by host in order of the first result of every host
+        :return: Iterator (host, results)
+        """
+        rows: dict[int, array] = {}
+        for index, host_id in enumerate(self._rows_host):
+            if (host_rows := rows.get(host_id)) is None:
+                host_rows = rows[host_id] = array("I")
+            host_rows.append(index)
+        for host_rows in rows.values():
+            results = [self.row(index) for index in host_rows]
+            yield results[0].host, results
+
+    def count_by_host(self) -> dict[str, int]:
+        counts = [0] * len(self._hosts)
+        for host_id in self._rows_host:
+            counts[host_id] += 1
+        return {
+            Result.packed(host, 0, flags).host: count
+            for host, flags, count in zip(self._hosts, self._host_flags, counts, strict=True)
+        }
+
+    def __len__(self) -> int:
+        return len(self._rows_port)
+
+    def __iter__(self) -> Iterator[Result]:
+        for index in range(len(self)):
+            yield self.row(index)
@@ -0,0 +1,199 @@
+import bisect
+import ipaddress
+from collections.abc import (
+    Iterable,
+    Iterator,
+)
+from typing import NamedTuple
+
+from portfinder.dto import IpVersion
+
+
+class AddressRange(NamedTuple):
+    """
+    Inclusive range of IP addresses stored as integers
+    """
+
+    version: IpVersion
+    start: int
+    end: int
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start + 1
+
+    def address(self, offset: int) -> str:
+        """
+        Address string by offset from the range start
+        :param offset: zero-based offset inside the range
+        :return:
+        """
+        if self.version == IpVersion.IPV4:
+            return str(ipaddress.IPv4Address(self.start + offset))
+        return str(ipaddress.IPv6Address(self.start + offset))
+
+    def hosts(self) -> Iterator[str]:
+        for offset in range(self.size):
+            yield self.address(offset)
+
+
+def _ip_version(address: ipaddress.IPv4Address | ipaddress.IPv6Address) -> IpVersion:
+    return IpVersion.IPV4 if address.version == 4 else IpVersion.IPV6
+
+
+def _network_range(target: str) -> AddressRange | None:
+    """
+    CIDR to hosts range with the same bounds as ip_network(...).hosts()
+    """
+    try:
+        network = ipaddress.ip_network(target, strict=False)
+    except ValueError:
+        return None
+
+    start, end = int(network.network_address), int(network.broadcast_address)
+    if network.version == 4 and network.prefixlen < 31:
+        start, end = start + 1, end - 1
+    elif network.version == 6 and network.prefixlen < 127:
+        start += 1
+    return AddressRange(_ip_version(network.network_address), start, end)
+
+
+def _address_range(target: str) -> AddressRange | None:
+    """
+    'a.b.c.d-e.f.g.h' or single address to range
+    :raises ValueError: range bounds of different IP versions or in reverse order
+    """
+    first, _, last = target.partition("-")
+    try:
+        start = ipaddress.ip_address(first)
+        end = ipaddress.ip_address(last) if last else start
+    except ValueError:
+        return None
+
+    if start.version != end.version:
+        raise ValueError(f"Invalid target range {target}: bounds are of different IP versions")
+    if int(end) < int(start):
+        raise ValueError(f"Invalid target range {target}: end is before start")
+    return AddressRange(_ip_version(start), int(start), int(end))
+
+
+def parse_target(target: str) -> AddressRange | str | None:
+    """
+    Parse one target item into an address range or a domain name.
+    :param target: IP, CIDR, 'a.b.c.d-e.f.g.h' range or domain
+    :return: AddressRange, lowercase domain or None for empty or invalid CIDR
+    :raises ValueError: invalid address range, see _address_range
+    """
+    target = target.strip()
+    if not target:
+        return None
+    if "/" in target:
+        return _network_range(target)
+    return _address_range(target) or target.lower()
+
+
+def merge_ranges(ranges: Iterable[AddressRange]) -> list[AddressRange]:
+    """
+    Merge overlapping and adjacent ranges of the same IP version
+    :param ranges: any AddressRange items
+    :return: sorted list of disjoint ranges
+    """
+    merged: list[AddressRange] = []
+    for item in sorted(ranges):
+        if merged and merged[-1].version == item.version and item.start <= merged[-1].end + 1:
+            if item.end > merged[-1].end:
+                merged[-1] = merged[-1]._replace(end=item.end)
+        else:
+            merged.append(item)
+    return merged
+
+
+class TargetSet:
+    """
+    Deduplicated targets as disjoint integer address ranges plus domains.
+    Hosts are addressable by index, so the set never expands into memory.
+    """
+
+    def __init__(self, ranges: Iterable[AddressRange] = (), domains: Iterable[str] = ()):
+        self.ranges = merge_ranges(ranges)
+        self.domains = list(dict.fromkeys(domains))
+        self._domains = set(self.domains)
+        self._offsets: list[int] = []
+        total = 0
+        for item in self.ranges:
+            self._offsets.append(total)
+            total += item.size
+        self._addresses = total
+
+    @classmethod
+    def from_targets(cls, targets: Iterable[str]) -> "TargetSet":
+        """
+        Build target set from raw target items
+        :param targets: IP, CIDR, range or domain strings
+        :return:
+        """
+        ranges: list[AddressRange] = []
+        domains: list[str] = []
+        for target in targets:
+            match parse_target(target):
+                case AddressRange() as item:
+                    ranges.append(item)
+                case str() as domain:
+                    domains.append(domain)
+        return cls(ranges, domains)
+
+    def targets(self) -> list[str]:
+        """
+        Compact target items, from_targets of them gives the same set
+        :return: list of IP, 'a.b.c.d-e.f.g.h' range or domain strings
+        """
+        items = [
+            item.address(0) if item.size == 1 else f"{item.address(0)}-{item.address(item.size - 1)}"
+            for item in self.ranges
+        ]
+        items.extend(self.domains)
+        return items
+
+    @property
+    def size(self) -> int:
+        """
+        Hosts count (addresses and domains)
+        """
+        return self._addresses + len(self.domains)
+
+    def host(self, index: int) -> str:
+        """
+        Host by zero-based index: addresses in ascending order, then domains
+        :param index: host index lower than size
+        :return:
+        """
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        if index >= self._addresses:
+            return self.domains[index - self._addresses]
+        position = bisect.bisect_right(self._offsets, index) - 1
+        return self.ranges[position].address(index - self._offsets[position])
+
+    def __contains__(self, host: object) -> bool:
+        """
+        Membership of an address or domain, O(log ranges)
+        """
+        if not isinstance(host, str):
+            return False
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return host.lower() in self._domains
+        version, value = _ip_version(address), int(address)
+        position = bisect.bisect_right(self.ranges, (version, value), key=lambda item: (item.version, item.start))
+        if position and (item := self.ranges[position - 1]).version == version:
+            return item.start <= value <= item.end
+        return False
+
+    def __iter__(self) -> Iterator[str]:
+        for item in self.ranges:
+            yield from item.hosts()
+        yield from self.domains
+
+    def __bool__(self) -> bool:
+        return self.size > 0
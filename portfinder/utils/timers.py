@@ -0,0 +1,55 @@
+import asyncio
+import math
+from collections.abc import Callable
+
+
+class TimerWheel:
+    """
+    Coarse timer wheel: deadlines are grouped into buckets of `resolution`
+    seconds and swept by a single loop timer, so thousands of pending
+    probes cost one dict entry each instead of one loop timer each.
+    """
+
+    def __init__(self, resolution: float = 0.05):
+        self.resolution = resolution
+        self._buckets: dict[int, list[Callable[[], None]]] = {}
+        self._cursor = 0
+        self._handle: asyncio.TimerHandle | None = None
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> None:
+        """
+        Call callback after delay (rounded up to the wheel resolution)
+        :param delay: seconds
+        :param callback: called once from the event loop
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        if self._handle is None:
+            self._cursor = math.floor(loop.time() / self.resolution)
+            self._handle = loop.call_later(self.resolution, self._sweep)
+        tick = max(math.ceil((loop.time() + delay) / self.resolution), self._cursor)
+        self._buckets.setdefault(tick, []).append(callback)
+
+    def _sweep(self) -> None:
+        loop = asyncio.get_running_loop()
+        now = math.floor(loop.time() / self.resolution)
+        due = [self._buckets.pop(tick, ()) for tick in range(self._cursor, now + 1)]
+        self._cursor = now + 1
+        self._handle = None
+        for bucket in due:
+            for callback in bucket:
+                callback()
+        if self._buckets and self._handle is None:
+            self._handle = loop.call_later(self.resolution, self._sweep)
+
+    def close(self) -> None:
+        """
+        Drop all scheduled callbacks without calling them
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._buckets.clear()
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets.values())
@@ -0,0 +1,250 @@
+import asyncio
+import ipaddress
+import ssl
+import time
+from contextvars import ContextVar
+from functools import cache
+
+from portfinder.dto import (
+    ProbeStatus,
+    Protocol,
+    TlsInfo,
+)
+from portfinder.utils.metrics import record_probe
+from portfinder.utils.request import ProbeObserver
+
+
+HTTPS_REQUEST = b"GET / HTTP/1.1\r\nHost: lol\r\n\r\n"
+
+# DER encoded OIDs of X.520 name attributes
+_COMMON_NAME = b"\x55\x04\x03"
+_ORGANIZATION = b"\x55\x04\x0a"
+
+_session_key: ContextVar[tuple[str, int] | None] = ContextVar("tls_session_key", default=None)
+
+
+def _is_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def _der_item(data: bytes, offset: int) -> tuple[int, int, int]:
+    """
+    DER TLV at offset
+    :return: tag, value start, value end
+    """
+    tag, length = data[offset], data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[offset : offset + size], "big")
+        offset += size
+    if offset + length > len(data):
+        raise ValueError("DER value out of bounds")
+    return tag, offset, offset + length
+
+
+def _der_children(data: bytes, start: int, end: int) -> list[tuple[int, int, int]]:
+    children = []
+    while start < end:
+        item = _der_item(data, start)
+        children.append(item)
+        start = item[2]
+    return children
+
+
+def _der_name(data: bytes, start: int, end: int) -> str | None:
+    """
+    Common name of X.501 Name, organization if there is none
+    """
+    values: dict[bytes, str] = {}
+    for _, set_start, set_end in _der_children(data, start, end):
+        for _, attr_start, attr_end in _der_children(data, set_start, set_end):
+            (_, oid_start, oid_end), (_, value_start, value_end) = _der_children(data, attr_start, attr_end)[:2]
+            values[data[oid_start:oid_end]] = data[value_start:value_end].decode("utf-8", "replace")
+    return values.get(_COMMON_NAME) or values.get(_ORGANIZATION)
+
+
+def _der_time(data: bytes, tag: int, start: int, end: int) -> str:
+    """
+    UTCTime or GeneralizedTime to ISO 8601
+    """
+    value = data[start:end].decode("ascii").rstrip("Z")
+    if tag == 0x17:
+        year = int(value[:2])
+        value = f"{1900 + year if year >= 50 else 2000 + year}{value[2:]}"
+    return f"{value[:4]}-{value[4:6]}-{value[6:8]}T{value[8:10]}:{value[10:12]}:{value[12:14]}Z"
+
+
+def parse_certificate(der: bytes) -> tuple[str | None, str | None, str | None]:
+    """
+    Minimal X.509 reader for unverified peer certificates,
+    getpeercert() returns nothing without verification
+    :param der: DER encoded certificate
+    :return: subject name, issuer name, notAfter, Nones for malformed data
+    """
+    try:
+        _, cert_start, cert_end = _der_item(der, 0)
+        _, tbs_start, tbs_end = _der_item(der, cert_start)
+        fields = _der_children(der, tbs_start, tbs_end)
+        if fields[0][0] == 0xA0:
+            fields = fields[1:]
+        # serialNumber, signature, issuer, validity, subject
+        issuer, validity, subject = fields[2], fields[3], fields[4]
+        not_after = _der_children(der, validity[1], validity[2])[1]
+        return (
+            _der_name(der, subject[1], subject[2]),
+            _der_name(der, issuer[1], issuer[2]),
+            _der_time(der, *not_after),
+        )
+    except (IndexError, ValueError):
+        return None, None, None
+
+
+class SessionContext(ssl.SSLContext):
+    """
+    Client context without verification which resumes TLS sessions
+    per (host, port) of the calling task, see TlsProber
+    """
+
+    max_sessions = 65536
+
+    def __new__(cls, protocol: int = ssl.PROTOCOL_TLS_CLIENT) -> "SessionContext":
+        return super().__new__(cls, protocol)
+
+    def __init__(self, protocol: int = ssl.PROTOCOL_TLS_CLIENT):
+        self.check_hostname = False
+        self.verify_mode = ssl.CERT_NONE
+        self.sessions: dict[tuple[str, int], ssl.SSLSession] = {}
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and (key := _session_key.get()) is not None:
+            session = self.sessions.get(key)
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+    def remember(self, key: tuple[str, int], session: ssl.SSLSession) -> None:
+        if key not in self.sessions and len(self.sessions) >= self.max_sessions:
+            del self.sessions[next(iter(self.sessions))]
+        self.sessions[key] = session
+
+
+@cache
+def default_context() -> ssl.SSLContext:
+    """
+    Shared client context without verification, the CA store is never loaded
+    """
+    return SessionContext()
+
+
+class TlsProber:
+    """
+    HTTPS checks over one shared client context, resuming sessions
+    per (host, port) and optionally capturing TLS metadata once
+    per (host, port).
+    """
+
+    def __init__(self, capture: bool = False, session_reuse: bool = True, max_entries: int = 65536):
+        self.capture = capture
+        self.session_reuse = session_reuse
+        self.max_entries = max_entries
+        self.context = SessionContext()
+        self._info: dict[tuple[str, int], TlsInfo] = {}
+
+    def info(self, host: str, port: int) -> TlsInfo | None:
+        return self._info.get((host, port))
+
+    def _capture(self, key: tuple[str, int], ssl_object: ssl.SSLObject, sni: str | None) -> None:
+        if key in self._info:
+            return
+        if len(self._info) >= self.max_entries:
+            del self._info[next(iter(self._info))]
+        cipher = ssl_object.cipher()
+        # no certificate, e.g. anonymous cipher suites
+        der = ssl_object.getpeercert(True)
+        certificate = parse_certificate(der) if der is not None else (None, None, None)
+        self._info[key] = TlsInfo(ssl_object.version(), cipher[0] if cipher else None, sni, *certificate)
+
+    @staticmethod
+    async def _open(host: str, port: int, timeout: float, observe: ProbeObserver | None) -> asyncio.StreamWriter:
+        """
+        Plain TCP connect, reported to observe: the handshake runs after it,
+        so the observed duration is one round trip
+        :raises asyncio.TimeoutError, OSError: connect failed
+        """
+        started = time.monotonic()
+        status = ProbeStatus.ERROR
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout)
+            status = ProbeStatus.OPEN
+            return writer
+        except asyncio.TimeoutError:
+            status = ProbeStatus.TIMEOUT
+            raise
+        except ConnectionRefusedError:
+            status = ProbeStatus.REFUSED
+            raise
+        finally:
+            if observe is not None:
+                observe(status, time.monotonic() - started)
+
+    async def check(
+        self,
+        host: str,
+        port: int,
+        timeout: float = 3.0,
+        server_hostname: str | None = None,
+        connect_timeout: float | None = None,
+        observe: ProbeObserver | None = None,
+    ) -> bool:
+        """
+        Asynchronously checks if a HTTPS port is open on a given host
+        :param host:
+        :param port:
+        :param timeout: TLS handshake and request timeout
+        :param server_hostname: SNI name, host itself for domains if None
+        :param connect_timeout: TCP connect timeout, timeout if None
+        :param observe: called with the TCP connect outcome and its duration
+        :return:
+        """
+        key = (host, port)
+        sni = server_hostname or (None if _is_address(host) else host)
+        token = _session_key.set(key) if self.session_reuse else None
+        writer = None
+        started = time.monotonic()
+        status = ProbeStatus.ERROR
+        try:
+            writer = await self._open(host, port, timeout if connect_timeout is None else connect_timeout, observe)
+            await asyncio.wait_for(writer.start_tls(self.context, server_hostname=sni), timeout=timeout)
+            ssl_object = writer.get_extra_info("ssl_object")
+            if ssl_object is not None:
+                if self.session_reuse and ssl_object.session is not None:
+                    self.context.remember(key, ssl_object.session)
+                if self.capture:
+                    self._capture(key, ssl_object, sni)
+
+            writer.write(HTTPS_REQUEST)
+            await asyncio.wait_for(writer.drain(), timeout=timeout)
+            status = ProbeStatus.OPEN
+            return True
+
+        except asyncio.TimeoutError:
+            status = ProbeStatus.TIMEOUT
+            return False
+        except ConnectionRefusedError:
+            status = ProbeStatus.REFUSED
+            return False
+        except (OSError, ssl.SSLError):
+            return False
+        finally:
+            record_probe(Protocol.HTTPS, status, time.monotonic() - started)
+            if token is not None:
+                _session_key.reset(token)
+            if writer is not None:
+                try:
+                    writer.close()
+                    await writer.wait_closed()
+                except (ConnectionResetError, ssl.SSLError, asyncio.TimeoutError, OSError):
+                    pass
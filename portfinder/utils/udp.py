@@ -0,0 +1,160 @@
+import asyncio
+import ipaddress
+import os
+import socket
+import struct
+import sys
+import weakref
+
+from portfinder.utils.timers import TimerWheel
+
+
+# Linux values, not exported by the socket module
+IP_RECVERR = getattr(socket, "IP_RECVERR", 11)
+IPV6_RECVERR = getattr(socket, "IPV6_RECVERR", 25)
+_EXTENDED_ERR = struct.Struct("=I")
+
+_default_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, UdpEngine]" = weakref.WeakKeyDictionary()
+
+
+class UdpEngine:
+    """
+    Shared UDP probe engine: one unconnected socket per address family
+    sends probes to any (host, port) and matches replies and ICMP errors
+    back to pending probes by address.
+    Per-probe cost is one sendto, one dict entry and one timer wheel slot.
+    """
+
+    def __init__(self, resolution: float = 0.05):
+        self._sockets: dict[int, socket.socket] = {}
+        self._pending: dict[tuple[str, int], asyncio.Future[bytes]] = {}
+        self._wheel = TimerWheel(resolution)
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _socket(self, family: int) -> socket.socket:
+        if (sock := self._sockets.get(family)) is not None:
+            return sock
+
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        if sys.platform == "linux":
+            # report ICMP errors of the unconnected socket through MSG_ERRQUEUE
+            if family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_IP, IP_RECVERR, 1)
+            else:
+                sock.setsockopt(socket.IPPROTO_IPV6, IPV6_RECVERR, 1)
+        sock.bind(("0.0.0.0", 0) if family == socket.AF_INET else ("::", 0))
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._on_readable, sock)
+        self._sockets[family] = sock
+        return sock
+
+    def _on_readable(self, sock: socket.socket) -> None:
+        while True:
+            try:
+                data, addr = sock.recvfrom(65535)
+            except BlockingIOError:
+                break
+            except OSError:
+                # pending ICMP error, details are in the error queue
+                if not self._read_error(sock):
+                    break
+                continue
+            self._resolve((addr[0], addr[1]), data)
+
+        while self._read_error(sock):
+            pass
+
+    def _read_error(self, sock: socket.socket) -> bool:
+        """
+        Match one queued ICMP error to its probe by original destination
+        """
+        if sys.platform != "linux":
+            return False
+        try:
+            _, ancdata, _, addr = sock.recvmsg(1, 512, socket.MSG_ERRQUEUE)
+        except OSError:
+            return False
+
+        errno = _EXTENDED_ERR.unpack_from(ancdata[0][2])[0] if ancdata else 0
+        self._resolve((addr[0], addr[1]), OSError(errno, os.strerror(errno)) if errno else OSError("ICMP error"))
+        return True
+
+    def _resolve(self, key: tuple[str, int], outcome: bytes | OSError) -> None:
+        future = self._pending.pop(key, None)
+        if future is None or future.done():
+            return
+        if isinstance(outcome, OSError):
+            future.set_exception(outcome)
+        else:
+            future.set_result(outcome)
+
+    def _expire(self, key: tuple[str, int], future: asyncio.Future[bytes]) -> None:
+        if self._pending.get(key) is future:
+            del self._pending[key]
+        if not future.done():
+            future.set_exception(asyncio.TimeoutError())
+
+    async def _address(self, host: str, port: int) -> tuple[int, str]:
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            loop = asyncio.get_running_loop()
+            info = await loop.getaddrinfo(host, port, type=socket.SOCK_DGRAM)
+            family, *_, sockaddr = info[0]
+            return family, str(sockaddr[0])
+        return (socket.AF_INET if address.version == 4 else socket.AF_INET6), str(address)
+
+    async def probe(self, host: str, port: int, payload: bytes = b"\x00", timeout: float = 1.0) -> bytes:
+        """
+        Send one datagram and wait for the first reply from (host, port)
+        :param host: IP address or hostname
+        :param port: UDP port
+        :param payload: datagram payload
+        :param timeout: seconds to wait for reply
+        :return: reply payload
+        :raises asyncio.TimeoutError: no reply in time
+        :raises OSError: ICMP error (e.g. ConnectionRefusedError) or send failure
+        """
+        family, address = await self._address(host, port)
+        key = (address, port)
+        if (future := self._pending.get(key)) is not None:
+            return await asyncio.shield(future)
+
+        sock = self._socket(family)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            sock.sendto(payload, key)
+            self._wheel.schedule(timeout, lambda: self._expire(key, future))
+            return await future
+        finally:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if not future.done():
+                future.cancel()
+
+    def close(self) -> None:
+        """
+        Close sockets and fail pending probes
+        """
+        self._wheel.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        for sock in self._sockets.values():
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(sock.fileno())
+            sock.close()
+        self._sockets.clear()
+
+
+def get_udp_engine() -> UdpEngine:
+    """
+    Shared default UdpEngine of the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    if (engine := _default_engines.get(loop)) is None:
+        engine = _default_engines[loop] = UdpEngine()
+    return engine
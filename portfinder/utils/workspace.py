@@ -0,0 +1,118 @@
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from portfinder.dto import ScanOrder
+from portfinder.utils.permutation import IndexPermutation
+from portfinder.utils.targets import TargetSet
+
+
+class Shard(NamedTuple):
+    """
+    Zero-based shard number of total shards
+    """
+
+    number: int
+    total: int
+
+    @classmethod
+    def parse(cls, value: str) -> "Shard":
+        """
+        Parse one-based 'i/N' shard notation
+        :param value: e.g. '1/4' for the first of four shards
+        :return:
+        """
+        try:
+            number, total = map(int, value.split("/"))
+        except ValueError:
+            raise ValueError(f"Invalid shard: {value}, expected i/N") from None
+        if not 1 <= number <= total:
+            raise ValueError(f"Invalid shard: {value}, i must be in 1..N")
+        return cls(number - 1, total)
+
+    def __str__(self) -> str:
+        return f"{self.number + 1}/{self.total}"
+
+
+# the whole scan space, default of unsharded scans
+SINGLE_SHARD = Shard(0, 1)
+
+
+class WorkSpace:
+    """
+    Host x port index space of one scan, walked by position.
+    SEQUENTIAL order takes hosts in blocks of `width`; inside a block the
+    order is port-major, so consecutive work items rotate over `width`
+    hosts instead of hammering one host with every port (width=1 is the
+    plain host-major order).
+    RANDOM order maps positions through a seeded IndexPermutation of the
+    whole space, O(1) memory, same seed gives the same sequence.
+    A shard owns every shard.total-th position starting at shard.number,
+    so shards are disjoint and balanced without coordination.
+    """
+
+    def __init__(
+        self,
+        targets: TargetSet,
+        ports: list[int],
+        width: int = 1,
+        order: ScanOrder = ScanOrder.SEQUENTIAL,
+        seed: int | None = None,
+        shard: Shard = SINGLE_SHARD,
+    ):
+        self.targets = targets
+        self.ports = ports
+        self.width = max(1, width)
+        self.order = ScanOrder(order)
+        self.size = targets.size * len(ports)
+        self.shard = shard
+        self._permutation = IndexPermutation(self.size, seed) if self.order == ScanOrder.RANDOM else None
+
+    def index(self, position: int) -> int:
+        """
+        Work item index at position of the scan sequence
+        """
+        return self._permutation[position] if self._permutation is not None else position
+
+    def pair(self, index: int) -> tuple[str, int]:
+        """
+        (host, port) pair by index
+        :param index: zero-based index lower than size
+        :return:
+        """
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        if self._permutation is not None:
+            host_index, port_index = divmod(index, len(self.ports))
+            return self.targets.host(host_index), self.ports[port_index]
+
+        block, offset = divmod(index, self.width * len(self.ports))
+        first = block * self.width
+        width = min(self.width, self.targets.size - first)
+        port_index, host_offset = divmod(offset, width)
+        return self.targets.host(first + host_offset), self.ports[port_index]
+
+    def walk(self, start: int = 0) -> Iterator[tuple[int, str, int]]:
+        """
+        Walk scan sequence of the shard from position
+        :param start: first position, e.g. to resume
+        :return: Iterator (position, host, port)
+        """
+        number, total = self.shard
+        first = start + (number - start) % total
+        for position in range(first, self.size, total):
+            yield position, *self.pair(self.index(position))
+
+    @property
+    def shard_size(self) -> int:
+        """
+        Work items of the shard
+        """
+        number, total = self.shard
+        return max(0, (self.size - number + total - 1) // total)
+
+    def __iter__(self) -> Iterator[tuple[str, int]]:
+        for _, host, port in self.walk():
+            yield host, port
+
+    def __bool__(self) -> bool:
+        return self.size > 0
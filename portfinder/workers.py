@@ -0,0 +1,174 @@
+import asyncio
+import math
+import multiprocessing
+import queue
+from collections.abc import AsyncGenerator
+from typing import (
+    TYPE_CHECKING,
+    Any,
+)
+
+from portfinder.dto import Result
+from portfinder.logs import get_logger
+from portfinder.utils import (
+    ScanMetrics,
+    Shard,
+    TargetSet,
+)
+
+
+if TYPE_CHECKING:
+    from portfinder.scanner import Scanner
+
+
+logger = get_logger()
+
+POLL_INTERVAL = 0.2
+METRICS_INTERVAL = 1.0
+
+
+class WorkerError(Exception):
+    """
+    Worker process failed or exited without finishing its partition.
+    Not a RuntimeError, which the CLI treats as a normal stop.
+    """
+
+
+def worker_options(options: dict[str, Any], shard: Shard, workers: int, index: int) -> dict[str, Any]:
+    """
+    Scanner options of one worker process: the worker owns sub-shard
+    `index` of `workers` inside `shard`, global budgets are split evenly.
+    :param options: parent Scanner options
+    :param shard: parent shard
+    :param workers: worker processes count
+    :param index: zero-based worker index
+    :return:
+    """
+    child = dict(options)
+    child.update(
+        shard=Shard(shard.number + shard.total * index, shard.total * workers),
+        workers=1,
+        quiet=True,
+        concurrency=max(1, options["concurrency"] // workers),
+        progress=0,
+        stats=None,
+        metrics_port=None,
+    )
+    if options.get("banner_concurrency"):
+        child["banner_concurrency"] = max(1, options["banner_concurrency"] // workers)
+    if options.get("host_concurrency"):
+        child["host_concurrency"] = max(1, math.ceil(options["host_concurrency"] / workers))
+    for key in ("rate", "host_rate", "sweep_rate"):
+        if options.get(key):
+            child[key] = options[key] / workers
+    return child
+
+
+def _worker_main(index: int, options: dict[str, Any], results: "multiprocessing.Queue[tuple[str, Any]]") -> None:
+    """
+    Worker process entry: run own event loop and stream results
+    and periodic metrics states to parent.
+    options may carry `hostnames` (address -> domain) of targets
+    resolved by the parent, for SNI and result hostnames.
+    """
+    from portfinder.scanner import Scanner
+
+    hostnames = options.pop("hostnames", {})
+
+    async def report(scanner: Scanner) -> None:
+        while True:
+            await asyncio.sleep(METRICS_INTERVAL)
+            results.put(("metrics", (index, scanner.metrics.state())))
+
+    async def scan() -> None:
+        scanner = Scanner(**options)
+        scanner.hostnames.update(hostnames)
+        reporter = asyncio.create_task(report(scanner))
+        try:
+            async for result in scanner.stream():
+                results.put(("result", result.to_dict()))
+        finally:
+            reporter.cancel()
+            results.put(("metrics", (index, scanner.metrics.state())))
+
+    try:
+        asyncio.run(scan())
+    except KeyboardInterrupt:
+        pass
+    except BaseException as exc:
+        results.put(("error", f"{type(exc).__name__}: {exc}"))
+    finally:
+        results.put(("done", None))
+
+
+def _poll(results: "multiprocessing.Queue[tuple[str, Any]]") -> tuple[str, Any] | None:
+    try:
+        return results.get(timeout=POLL_INTERVAL)
+    except queue.Empty:
+        return None
+
+
+async def stream_workers(scanner: "Scanner", targets: TargetSet | None = None) -> AsyncGenerator[Result, None]:
+    """
+    Run scanner partition in `scanner.workers` processes, each with its own
+    event loop, and yield results streamed back over a shared queue.
+    Worker metrics states are merged into scanner.metrics.
+    :param scanner: parent Scanner
+    :param targets: targets already prepared by the parent (resolved domains, discovered alive hosts)
+    :return: AsyncGenerator Result
+    """
+    options = {**scanner.options, "seed": scanner.seed}
+    if targets is not None:
+        # workers get literal IPs only, domains of the addresses travel with them
+        options.update(
+            target=",".join(targets.targets()), file=None, discovery=False, hostnames=dict(scanner.hostnames)
+        )
+    context = multiprocessing.get_context("spawn")
+    results: multiprocessing.Queue[tuple[str, Any]] = context.Queue()
+    processes = [
+        context.Process(
+            target=_worker_main,
+            args=(index, worker_options(options, scanner.shard, scanner.workers, index), results),
+            daemon=True,
+        )
+        for index in range(scanner.workers)
+    ]
+    for process in processes:
+        process.start()
+
+    loop = asyncio.get_running_loop()
+    running = len(processes)
+    errors: list[str] = []
+    states: dict[int, dict[str, Any]] = {}
+    started = scanner.metrics.started
+    try:
+        while running:
+            message = await loop.run_in_executor(None, _poll, results)
+            if message is None:
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    errors.append(f"{running} worker(s) exited without finishing")
+                    break
+                continue
+
+            kind, payload = message
+            if kind == "result":
+                yield Result.from_dict(payload)
+            elif kind == "metrics":
+                index, state = payload
+                states[index] = state
+                scanner.metrics = ScanMetrics.combined(list(states.values()), started)
+            elif kind == "error":
+                errors.append(payload)
+                await logger.aerror("Worker failed: %s", payload)
+            else:
+                running -= 1
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+        results.close()
+
+    if errors:
+        raise WorkerError(f"Worker failed: {'; '.join(errors)}")
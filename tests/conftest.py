@@ -0,0 +1,17 @@
+import ssl
+from pathlib import Path
+
+import pytest
+
+
+DATA = Path(__file__).parent / "data"
+
+
+@pytest.fixture
+def tls_context() -> ssl.SSLContext:
+    """
+    Server context with the self-signed test certificate (O=portfinder, CN=portfinder-test)
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(DATA / "cert.pem", DATA / "key.pem")
+    return context
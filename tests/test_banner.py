@@ -0,0 +1,107 @@
+import asyncio
+
+from portfinder.dto import Protocol
+from portfinder.scanner import Scanner
+from portfinder.utils.banner import (
+    BannerGrabber,
+    banner_text,
+    match_service,
+)
+
+
+def test_match_service():
+    assert match_service(b"SSH-2.0-OpenSSH_9.6\r\n") == ("ssh", "OpenSSH_9.6")
+    assert match_service(b"HTTP/1.1 200 OK\r\nServer: nginx/1.25\r\n\r\n") == ("http", "nginx/1.25")
+    assert match_service(b"220 mail.example.com ESMTP Postfix\r\n") == ("smtp", "ESMTP Postfix")
+    assert match_service(b"\x00\x01unknown") == (None, None)
+
+
+def test_banner_text_is_first_printable_line():
+    assert banner_text(b"SSH-2.0-OpenSSH\x07\r\nmore") == "SSH-2.0-OpenSSH."
+    assert banner_text(b"\r\n") is None
+
+
+def test_only_plaintext_ports_are_grabbed():
+    assert BannerGrabber.wants([Protocol.TCP, Protocol.HTTPS])
+    assert BannerGrabber.wants([Protocol.HTTP])
+    assert not BannerGrabber.wants([Protocol.HTTPS])
+    assert not BannerGrabber.wants([Protocol.UDP])
+
+
+def test_grab_sends_probe_to_silent_port():
+    async def answer(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.0 404 Not Found\r\nServer: test/1.0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    async def main():
+        server = await asyncio.start_server(answer, "127.0.0.1", 0)
+        async with server:
+            return await BannerGrabber(timeout=0.2).grab("127.0.0.1", server.sockets[0].getsockname()[1])
+
+    assert asyncio.run(main()) == ("http (test/1.0)", "HTTP/1.0 404 Not Found")
+
+
+def test_grabs_do_not_hold_probe_slots():
+    async def main():
+        connected = [asyncio.Event(), asyncio.Event()]
+
+        def handler(index: int):
+            async def greet(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+                # each port talks only once the other one was probed
+                connected[index].set()
+                try:
+                    await asyncio.wait_for(connected[1 - index].wait(), 5)
+                    writer.write(b"SSH-2.0-test\r\n")
+                    await writer.drain()
+                except OSError:
+                    pass
+                finally:
+                    writer.close()
+
+            return greet
+
+        servers = [await asyncio.start_server(handler(index), "127.0.0.1", 0) for index in range(2)]
+        ports = [server.sockets[0].getsockname()[1] for server in servers]
+        scanner = Scanner(
+            target="127.0.0.1",
+            ports=",".join(map(str, ports)),
+            protocol="tcp",
+            timeout=1.0,
+            concurrency=1,
+            banners=True,
+            banner_timeout=2.0,
+            quiet=True,
+            uvloop_disable=True,
+        )
+        async with servers[0], servers[1]:
+            return await scanner.run()
+
+    results = asyncio.run(main())
+    assert [(result.service, result.banner) for result in results] == [("ssh (test)", "SSH-2.0-test")] * 2
+
+
+def test_https_only_results_are_not_grabbed(tls_context):
+    async def main():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0, ssl=tls_context)
+        port = server.sockets[0].getsockname()[1]
+        scanner = Scanner(
+            target="127.0.0.1",
+            ports=str(port),
+            protocol="https",
+            timeout=1.0,
+            banners=True,
+            quiet=True,
+            uvloop_disable=True,
+        )
+
+        async def fail(host, port):
+            raise AssertionError("HTTPS-only port grabbed")
+
+        scanner.banner_grabber.grab = fail
+        async with server:
+            return await scanner.run()
+
+    results = asyncio.run(main())
+    assert [(result.protocols, result.service) for result in results] == [([Protocol.HTTPS], None)]
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from portfinder.dto import (
+    IpVersion,
+    Protocol,
+    Result,
+)
+from portfinder.utils.checkpoint import (
+    ScanProgress,
+    ScanState,
+    scan_fingerprint,
+)
+
+
+def _result(port: int) -> Result:
+    return Result("10.0.0.1", port, IpVersion.IPV4, [Protocol.TCP])
+
+
+def test_watermark_is_lowest_pending_position():
+    progress = ScanProgress(ScanState("fp", 1), stride=2)
+    for position in (0, 2, 4, 6):
+        assert progress.dispatch(position)
+    assert progress.watermark == 0
+    progress.complete(2, None)
+    progress.complete(6, None)
+    assert progress.watermark == 0
+    progress.complete(0, None)
+    assert progress.watermark == 4
+
+    state = progress.snapshot()
+    assert (state.position, state.done) == (4, [6])
+    progress.complete(4, None)
+    assert progress.watermark == 8
+    assert progress.snapshot().done == []
+
+
+def test_resume_skips_done_positions_and_restores_results():
+    progress = ScanProgress(ScanState("fp", 1), stride=1, keep_results=True)
+    for position in range(6):
+        progress.dispatch(position)
+    for position in (0, 1, 3, 5):
+        progress.complete(position, _result(position) if position in (1, 5) else None)
+    state = progress.snapshot()
+    assert (state.position, state.done) == (2, [3, 5])
+
+    resumed = ScanProgress(state, stride=1, keep_results=True)
+    assert resumed.restored == [_result(1), _result(5)]
+    probed = [position for position in range(state.position, 8) if resumed.dispatch(position)]
+    assert probed == [2, 4, 6, 7]
+    for position in probed:
+        resumed.complete(position, None)
+    final = resumed.snapshot()
+    assert (final.position, final.done) == (8, [])
+    assert len(final.results) == 2
+
+
+def test_state_save_and_load(tmp_path):
+    path = tmp_path / "scan.checkpoint"
+    state = ScanState("fp", 42, position=10, done=[12], results=[_result(80).to_dict()])
+    asyncio.run(state.save(path))
+    assert asyncio.run(ScanState.load(path)) == state
+    assert not path.with_name(path.name + ".tmp").exists()
+
+
+def test_state_load_errors(tmp_path):
+    with pytest.raises(ValueError, match="not found"):
+        asyncio.run(ScanState.load(tmp_path / "missing"))
+    (path := tmp_path / "broken").write_text("{")
+    with pytest.raises(ValueError, match="Invalid checkpoint"):
+        asyncio.run(ScanState.load(path))
+
+
+def test_fingerprint_is_order_independent():
+    assert scan_fingerprint(ports=[80], seed=1) == scan_fingerprint(seed=1, ports=[80])
+    assert scan_fingerprint(ports=[80], seed=1) != scan_fingerprint(ports=[80], seed=2)
@@ -0,0 +1,79 @@
+import asyncio
+import errno
+import select
+import socket
+
+import pytest
+
+from portfinder.dto import ProbeStatus
+from portfinder.utils.connect import EpollConnectEngine
+
+
+pytestmark = pytest.mark.skipif(not hasattr(select, "epoll"), reason="epoll is available on Linux only")
+
+
+def _probe(host: str, port: int, timeout: float = 1.0) -> ProbeStatus:
+    async def main():
+        engine = EpollConnectEngine(linger=True)
+        try:
+            return (await engine.probe(host, port, timeout))[0]
+        finally:
+            engine.close()
+
+    return asyncio.run(main())
+
+
+def test_open_port():
+    async def main():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        engine = EpollConnectEngine()
+        async with server:
+            status, sock = await engine.connect("127.0.0.1", port)
+        assert sock is not None
+        engine.release(sock)
+        engine.close()
+        return status
+
+    assert asyncio.run(main()) == ProbeStatus.OPEN
+
+
+def test_refused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    assert _probe("127.0.0.1", port) == ProbeStatus.REFUSED
+
+
+def test_timeout_on_full_backlog():
+    async def main():
+        with socket.socket() as server:
+            server.bind(("127.0.0.1", 0))
+            server.listen(0)
+            port = server.getsockname()[1]
+            engine = EpollConnectEngine()
+            # the first connection fills the accept queue, later handshakes are dropped
+            first, sock = await engine.connect("127.0.0.1", port)
+            status, _ = await engine.probe("127.0.0.1", port, 0.2)
+            if sock is not None:
+                engine.release(sock)
+            engine.close()
+            return first, status
+
+    assert asyncio.run(main()) == (ProbeStatus.OPEN, ProbeStatus.TIMEOUT)
+
+
+def test_socket_error_is_probe_error(monkeypatch):
+    def exhausted(*args):
+        raise OSError(errno.EMFILE, "Too many open files")
+
+    async def main():
+        engine = EpollConnectEngine()
+        # patched inside the running loop, the loop itself needs sockets
+        with monkeypatch.context() as patch:
+            patch.setattr(socket, "socket", exhausted)
+            status, sock = await engine.connect("127.0.0.1", 9)
+        engine.close()
+        return status, sock
+
+    assert asyncio.run(main()) == (ProbeStatus.ERROR, None)
@@ -0,0 +1,119 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from portfinder.dto import (
+    ChangeKind,
+    IpVersion,
+    Protocol,
+    Result,
+)
+from portfinder.utils.database import (
+    ResultQuery,
+    SqliteSink,
+)
+
+
+def _result(host: str, port: int, *protocols: Protocol, hostname: str | None = None) -> Result:
+    return Result(host, port, IpVersion.IPV6 if ":" in host else IpVersion.IPV4, list(protocols), hostname=hostname)
+
+
+OLD = [
+    _result("10.0.0.1", 22, Protocol.TCP),
+    _result("10.0.0.1", 80, Protocol.TCP, Protocol.HTTP),
+    _result("10.0.0.1", 53, Protocol.UDP),
+    _result("10.0.0.2", 443, Protocol.TCP, Protocol.HTTPS),
+    _result("10.0.1.1", 22, Protocol.TCP),
+    _result("93.184.216.34", 443, Protocol.TCP, hostname="example.com"),
+]
+NEW = [
+    _result("10.0.0.1", 22, Protocol.TCP),
+    _result("10.0.0.1", 8080, Protocol.TCP),
+    _result("2001:db8::1", 22, Protocol.TCP),
+]
+
+
+def _save(path, scans: list[tuple[dict, list[Result]]]) -> None:
+    async def main():
+        for options, results in scans:
+            async with SqliteSink(path, buffer_size=2, scan=options) as sink:
+                for result in results:
+                    await sink.write(result)
+
+    asyncio.run(main())
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "scans.sqlite"
+    _save(
+        path,
+        [
+            ({"target": "10.0.0.0/16,example.com", "ports": "1-1024", "protocol": "tcp"}, OLD),
+            ({"target": "10.0.0.0/24,2001:db8::1", "ports": "1-100,8080", "protocol": "tcp"}, NEW),
+        ],
+    )
+    return path
+
+
+def _pairs(query: ResultQuery) -> list[tuple[str, int]]:
+    return [(result.host, result.port) for _, result in query.results()]
+
+
+def test_sink_merges_protocol_rows(database):
+    query = ResultQuery(database)
+    assert [scan["results"] for scan in query.scan_list()] == [len(OLD), len(NEW)]
+    assert [result for _, result in query.results(1)] == sorted(OLD, key=lambda result: (result.host, result.port))
+    assert query.last_scan() == 2
+
+
+def test_filters(database):
+    assert _pairs(ResultQuery(database).scans([1]).hosts(["10.0.0.0/24"]).ports("1-100")) == [
+        ("10.0.0.1", 22),
+        ("10.0.0.1", 53),
+        ("10.0.0.1", 80),
+    ]
+    assert _pairs(ResultQuery(database).hosts(["2001:db8::/32", "93.184.216.34"])) == [
+        ("93.184.216.34", 443),
+        ("2001:db8::1", 22),
+    ]
+    assert _pairs(ResultQuery(database).scans([1]).protocol("https")) == [("10.0.0.2", 443)]
+    assert _pairs(ResultQuery(database).scans([1]).ports("22").without_ports("80")) == [("10.0.1.1", 22)]
+
+
+def test_aggregates(database):
+    rows = ResultQuery(database).scans([1]).by_host()
+    assert [(row["host"], row["port_list"]) for row in rows][0] == ("10.0.0.1", [22, 53, 80])
+    ports = {row["port"]: (row["hosts"], sorted(row["protocols"])) for row in ResultQuery(database).by_port()}
+    assert ports[22] == (3, ["tcp"])
+    assert ports[443] == (2, ["https", "tcp"])
+
+
+def test_changes_stay_in_new_scan_scope(database):
+    changes = {(change.kind, change.host, change.port) for change in ResultQuery(database).changes(1, 2)}
+    # 10.0.0.1:53 was UDP, 10.0.1.1 and example.com are outside, port 443 was not scanned
+    assert changes == {
+        (ChangeKind.OPENED, "10.0.0.1", 8080),
+        (ChangeKind.OPENED, "2001:db8::1", 22),
+        (ChangeKind.CLOSED, "10.0.0.1", 80),
+    }
+
+
+def test_changes_of_sharded_scan_report_no_closed(tmp_path):
+    path = tmp_path / "scans.sqlite"
+    _save(path, [({"target": "10.0.0.0/24"}, OLD[:2]), ({"target": "10.0.0.0/24", "shard": "1/2"}, [])])
+    assert ResultQuery(path).changes(1, 2) == []
+    with pytest.raises(ValueError, match="Scan not found: 3"):
+        ResultQuery(path).changes(1, 3)
+
+
+def test_query_is_read_only(database):
+    query = ResultQuery(database)
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        query.connection.execute("DELETE FROM scans")
+    # domain filters are served by the host name index
+    plan = query.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM results r WHERE r.host = ? AND r.port = ?", ("example.com", 443)
+    ).fetchall()
+    assert "results_name" in " ".join(row[-1] for row in plan)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import socket
+
+from portfinder.dto import (
+    ChangeKind,
+    IpVersion,
+    Protocol,
+    Result,
+)
+from portfinder.scanner import Scanner
+from portfinder.utils.diff import ResultDiff
+
+
+def _result(host: str, port: int, *protocols: Protocol) -> Result:
+    return Result(host, port, IpVersion.IPV4, list(protocols))
+
+
+BASELINE = {
+    ("10.0.0.1", 22): _result("10.0.0.1", 22, Protocol.TCP),
+    ("10.0.0.1", 443): _result("10.0.0.1", 443, Protocol.TCP, Protocol.HTTPS),
+    ("10.0.0.1", 53): _result("10.0.0.1", 53, Protocol.UDP),
+    ("10.0.0.2", 80): _result("10.0.0.2", 80, Protocol.TCP, Protocol.HTTP),
+}
+
+
+def test_opened_changed_closed():
+    diff = ResultDiff(BASELINE)
+    assert diff.observe(_result("10.0.0.1", 22, Protocol.TCP)) is None
+    opened = diff.observe(_result("10.0.0.1", 8080, Protocol.TCP))
+    assert (opened.kind, opened.previous) == (ChangeKind.OPENED, [])
+    changed = diff.observe(_result("10.0.0.1", 443, Protocol.TCP))
+    assert (changed.kind, changed.protocols, changed.previous) == (
+        ChangeKind.CHANGED,
+        [Protocol.TCP],
+        [Protocol.TCP, Protocol.HTTPS],
+    )
+    assert {(change.host, change.port) for change in diff.closed()} == {("10.0.0.1", 53), ("10.0.0.2", 80)}
+
+
+def test_protocols_not_scanned_are_ignored():
+    diff = ResultDiff(BASELINE, protocols=[Protocol.TCP])
+    assert diff.observe(_result("10.0.0.1", 443, Protocol.TCP)) is None
+    assert diff.observe(_result("10.0.0.2", 80, Protocol.TCP)) is None
+    # only UDP was open on 53, the TCP rescan does not cover it
+    assert [(change.host, change.port, change.previous) for change in diff.closed()] == [
+        ("10.0.0.1", 22, [Protocol.TCP])
+    ]
+
+
+def test_closed_only_within_covered_pairs():
+    diff = ResultDiff(BASELINE, covered=lambda host, port: host == "10.0.0.1" and port < 100)
+    assert [(change.host, change.port) for change in diff.closed()] == [("10.0.0.1", 22), ("10.0.0.1", 53)]
+
+
+async def _accept(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    writer.close()
+
+
+def test_baseline_rescan_stays_in_scope(tmp_path):
+    async def main():
+        server = await asyncio.start_server(_accept, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        baseline = tmp_path / "baseline.jsonl"
+        baseline.write_text(
+            "".join(
+                json.dumps(result.to_dict()) + "\n"
+                for result in [
+                    _result("127.0.0.1", port, Protocol.TCP, Protocol.HTTP),
+                    _result("127.0.0.1", port + 1 if port < 65535 else port - 1, Protocol.TCP),
+                    _result("127.0.0.9", port, Protocol.TCP),
+                ]
+            )
+        )
+        scanner = Scanner(
+            target="127.0.0.1",
+            ports=str(port),
+            protocol="tcp",
+            timeout=1.0,
+            baseline=str(baseline),
+            outfile=str(tmp_path / "rescan"),
+            jsl=True,
+            quiet=True,
+            uvloop_disable=True,
+        )
+        async with server:
+            await scanner.cmd_run()
+        return port, scanner.metrics.ports
+
+    port, probed = asyncio.run(main())
+    # only 127.0.0.1:port is in scope, it is still open on TCP and HTTP is not compared
+    assert probed == 1
+    assert (tmp_path / "rescan.diff.jsonl").read_text() == ""
+    assert [json.loads(line)["port"] for line in (tmp_path / "rescan.jsonl").read_text().splitlines()] == [port]
+
+
+def test_sharded_rescan_probes_every_pair_once(tmp_path):
+    async def main():
+        servers = [await asyncio.start_server(_accept, "127.0.0.1", 0) for _ in range(3)]
+        open_ports = [server.sockets[0].getsockname()[1] for server in servers]
+        sockets = [socket.socket() for _ in range(3)]
+        for sock in sockets:
+            sock.bind(("127.0.0.1", 0))
+        closed_ports = [sock.getsockname()[1] for sock in sockets]
+        for sock in sockets:
+            sock.close()
+        baseline = tmp_path / "baseline.jsonl"
+        baseline.write_text(
+            "".join(json.dumps(_result("127.0.0.1", port, Protocol.TCP).to_dict()) + "\n" for port in open_ports)
+        )
+        probed = 0
+        for shard in ("1/2", "2/2"):
+            scanner = Scanner(
+                target="127.0.0.1",
+                ports=",".join(map(str, open_ports + closed_ports)),
+                protocol="tcp",
+                timeout=1.0,
+                shard=shard,
+                baseline=str(baseline),
+                outfile=str(tmp_path / f"rescan{shard[0]}"),
+                jsl=True,
+                quiet=True,
+                uvloop_disable=True,
+            )
+            await scanner.cmd_run()
+            probed += scanner.metrics.ports
+        for server in servers:
+            server.close()
+        return open_ports, probed
+
+    open_ports, probed = asyncio.run(main())
+    found = [
+        json.loads(line)["port"]
+        for number in (1, 2)
+        for line in (tmp_path / f"rescan{number}.jsonl").read_text().splitlines()
+    ]
+    # baseline pairs of one shard are skipped by the sweep of the other
+    assert probed == 6
+    assert sorted(found) == sorted(open_ports)
+    assert (tmp_path / "rescan1.diff.jsonl").read_text() == (tmp_path / "rescan2.diff.jsonl").read_text() == ""
+
+
+def test_sweep_rate_is_capped_by_rate():
+    async def main():
+        scanner = Scanner(
+            target="127.0.0.1",
+            ports="9",
+            protocol="tcp",
+            timeout=0.5,
+            rate=10,
+            sweep_rate=1000,
+            baseline="baseline.jsonl",
+            quiet=True,
+            uvloop_disable=True,
+        )
+        scanner._baseline = {("127.0.0.1", 9): _result("127.0.0.1", 9, Protocol.TCP)}
+        await scanner.run()
+        return scanner.rate_limiter.rate
+
+    assert asyncio.run(main()) == 10
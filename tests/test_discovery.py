@@ -0,0 +1,76 @@
+import asyncio
+import errno
+import socket
+
+import pytest
+
+from portfinder.utils import discovery
+from portfinder.utils.discovery import (
+    HostDiscovery,
+    _checksum,
+    tcp_alive,
+)
+from portfinder.utils.targets import TargetSet
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_checksum():
+    # RFC 1071 example
+    assert _checksum(bytes.fromhex("0001f203f4f5f6f7")) == 0x220D
+    assert _checksum(b"\x01") == 0xFEFF
+
+
+def test_tcp_alive_on_open_and_refused_ports():
+    async def main():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await tcp_alive("127.0.0.1", [port], 1.0), await tcp_alive("127.0.0.1", [_closed_port()], 1.0)
+
+    assert asyncio.run(main()) == (True, True)
+
+
+def test_tcp_alive_reraises_resource_errors(monkeypatch):
+    async def exhausted(host, port):
+        raise OSError(errno.EMFILE, "Too many open files")
+
+    monkeypatch.setattr(discovery.asyncio, "open_connection", exhausted)
+    with pytest.raises(OSError) as error:
+        asyncio.run(tcp_alive("127.0.0.1", [80, 443], 1.0))
+    assert error.value.errno == errno.EMFILE
+
+
+def test_tcp_alive_unreachable_is_dead(monkeypatch):
+    async def unreachable(host, port):
+        raise OSError(errno.EHOSTUNREACH, "No route to host")
+
+    monkeypatch.setattr(discovery.asyncio, "open_connection", unreachable)
+    assert asyncio.run(tcp_alive("127.0.0.1", [80, 443], 1.0)) is False
+
+
+def test_discovery_bounds_connects_over_all_hosts(monkeypatch):
+    in_flight = peak = 0
+
+    async def silent(host, port):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            raise TimeoutError
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(discovery.asyncio, "open_connection", silent)
+    targets = TargetSet.from_targets(["10.0.0.0/28"])
+    host_discovery = HostDiscovery([22, 80, 443, 445, 3389], timeout=1.0, concurrency=4, icmp=False)
+    alive = asyncio.run(host_discovery.discover(targets))
+
+    assert not alive
+    assert host_discovery.stats.probed == targets.size
+    assert peak == 4
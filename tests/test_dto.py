@@ -0,0 +1,56 @@
+import pytest
+
+from portfinder.dto import (
+    IpVersion,
+    Protocol,
+    Result,
+    TlsInfo,
+    pack_host,
+    unpack_host,
+)
+
+
+@pytest.mark.parametrize(
+    "host, packed_type",
+    [("10.0.0.1", int), ("2001:db8::1", int), ("example.com", str), ("fe80::1%eth0", str)],
+)
+def test_host_packing_round_trip(host, packed_type):
+    packed, ipv6 = pack_host(host)
+    assert type(packed) is packed_type
+    assert unpack_host(packed, ipv6) == host
+    assert Result(host, 80, IpVersion.IPV4, [Protocol.TCP]).host == host
+
+
+def test_flags_keep_protocols_and_ip_version_apart():
+    result = Result("2001:db8::1", 443, IpVersion.IPV6, [Protocol.HTTPS, Protocol.TCP])
+    # protocols are reported in Protocol order
+    assert result.protocols == [Protocol.TCP, Protocol.HTTPS]
+    assert result.ip_version == IpVersion.IPV6
+    result.protocols = [Protocol.UDP]
+    assert (result.protocols, result.ip_version, result.host) == ([Protocol.UDP], IpVersion.IPV6, "2001:db8::1")
+    result.ip_version = IpVersion.IPV4
+    result.host = "10.0.0.1"
+    assert (result.protocols, result.ip_version, result.host) == ([Protocol.UDP], IpVersion.IPV4, "10.0.0.1")
+
+
+def test_packed_result_equals_constructed():
+    result = Result("10.0.0.1", 22, IpVersion.IPV4, [Protocol.TCP])
+    assert Result.packed(result.packed_host, result.port, result.flags) == result
+    assert result != Result("10.0.0.1", 22, IpVersion.IPV4, [Protocol.TCP], service="ssh")
+
+
+def test_dict_round_trip():
+    result = Result(
+        "10.0.0.1",
+        443,
+        IpVersion.IPV4,
+        [Protocol.TCP, Protocol.HTTPS],
+        tls=TlsInfo("TLSv1.3", "TLS_AES_128_GCM_SHA256", subject="example.com"),
+        hostname="example.com",
+    )
+    data = result.to_dict()
+    assert data["protocols"] == [[Protocol.TCP, Protocol.HTTPS]]
+    assert "service" not in data
+    assert Result.from_dict(data) == result
+    # flat and duplicated protocol lists are accepted
+    assert Result.from_dict({**data, "protocols": ["https", ["tcp", "https"]]}) == result
@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+import pytest
+
+from portfinder.dto import (
+    IpVersion,
+    Protocol,
+    Result,
+)
+from portfinder.utils.file import (
+    JsonArraySink,
+    JsonlSink,
+    ResultSink,
+    TxtSink,
+    merge_results,
+    read_results,
+)
+
+
+def _result(host: str, port: int, *protocols: Protocol) -> Result:
+    return Result(host, port, IpVersion.IPV4, list(protocols))
+
+
+def _read(path) -> list[Result]:
+    async def main():
+        return [result async for result in read_results(path)]
+
+    return asyncio.run(main())
+
+
+def _jsonl(path, *results: Result):
+    path.write_text("".join(json.dumps(result.to_dict()) + "\n" for result in results) + "\n")
+    return path
+
+
+def test_read_jsonl_and_json_array(tmp_path):
+    results = [_result("10.0.0.1", 22, Protocol.TCP), _result("10.0.0.2", 443, Protocol.TCP, Protocol.HTTPS)]
+    assert _read(_jsonl(tmp_path / "a.jsonl", *results)) == results
+    (array := tmp_path / "a.json").write_text(json.dumps([result.to_dict() for result in results]))
+    assert _read(array) == results
+
+
+def test_merge_unions_protocols_per_pair(tmp_path):
+    first = _jsonl(
+        tmp_path / "1.jsonl", _result("10.0.0.1", 443, Protocol.HTTPS), _result("10.0.0.1", 22, Protocol.TCP)
+    )
+    second = _jsonl(tmp_path / "2.jsonl", _result("10.0.0.1", 443, Protocol.TCP), _result("10.0.0.2", 53, Protocol.UDP))
+    merged = asyncio.run(merge_results([first, second]))
+    assert [(result.host, result.port, result.protocols) for result in merged] == [
+        ("10.0.0.1", 443, [Protocol.TCP, Protocol.HTTPS]),
+        ("10.0.0.1", 22, [Protocol.TCP]),
+        ("10.0.0.2", 53, [Protocol.UDP]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "name, content, message",
+    [
+        ("bad.jsonl", '{"host": "10.0.0.1", "port": 22, "ip_version": "ipv4", "protocols": [["tcp"]]}\n{"host"', ":2"),
+        ("bad.jsonl", '{"host": "10.0.0.1"}\n', "Invalid result at .*:1"),
+        ("bad.jsonl", '{"host": "10.0.0.1", "port": 1, "ip_version": "ipv4", "protocols": ["ftp"]}\n', ":1"),
+        ("bad.json", '{"host": "10.0.0.1"}', "JSON array expected"),
+        ("bad.json", "[", "Invalid JSON"),
+    ],
+)
+def test_malformed_results_are_rejected(tmp_path, name, content, message):
+    (path := tmp_path / name).write_text(content)
+    with pytest.raises(ValueError, match=message):
+        asyncio.run(merge_results([path]))
+
+
+def test_sink_buffers_until_full_or_flush_interval(tmp_path):
+    results = [_result("10.0.0.1", port, Protocol.TCP) for port in (21, 22, 23)]
+
+    async def main():
+        lines = []
+        sink = TxtSink(tmp_path / "out", buffer_size=2, flush_interval=0.05)
+        async with sink:
+            for result in results:
+                await sink.write(result)
+                lines.append(sink.path.read_text().splitlines())
+            await asyncio.sleep(0.2)
+            lines.append(sink.path.read_text().splitlines())
+        return lines, sink.path.read_text().splitlines()
+
+    lines, written = asyncio.run(main())
+    # the full buffer is written at once, the rest on the flush interval
+    assert [len(item) for item in lines] == [0, 2, 2, 3]
+    assert written == [str(result) for result in results]
+
+
+def test_jsonl_sink_writes_one_line_per_result(tmp_path):
+    results = [_result("10.0.0.1", 22, Protocol.TCP), _result("10.0.0.2", 443, Protocol.TCP, Protocol.HTTPS)]
+
+    async def main():
+        async with JsonlSink(tmp_path / "out", buffer_size=1) as sink:
+            for result in results:
+                await sink.write(result)
+        return sink.path
+
+    path = asyncio.run(main())
+    assert path.suffix == ".jsonl"
+    assert [json.loads(line) for line in path.read_text().splitlines()] == [result.to_dict() for result in results]
+    assert _read(path) == results
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_json_array_sink_is_valid_json(tmp_path, count):
+    results = [_result("10.0.0.1", port, Protocol.TCP) for port in range(1, count + 1)]
+
+    async def main():
+        async with JsonArraySink(tmp_path / "out", buffer_size=2) as sink:
+            for result in results:
+                await sink.write(result)
+        return sink.path
+
+    path = asyncio.run(main())
+    assert json.loads(path.read_text()) == [result.to_dict() for result in results]
+    assert _read(path) == results
+
+
+def test_periodic_flush_error_is_raised_on_close(tmp_path):
+    class FailingSink(TxtSink):
+        async def _write_items(self, items: list[str]) -> None:
+            raise OSError("disk full")
+
+    async def main():
+        sink = FailingSink(tmp_path / "out", flush_interval=0.01)
+        with pytest.raises(OSError, match="disk full"):
+            async with sink:
+                await sink.write(_result("10.0.0.1", 22, Protocol.TCP))
+                await asyncio.sleep(0.1)
+        return sink
+
+    sink = asyncio.run(main())
+    assert sink._file is None
+
+
+def test_result_sink_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        ResultSink(tmp_path / "out")  # type: ignore[abstract]
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from portfinder.dto import (
+    ProbeStatus,
+    Protocol,
+)
+from portfinder.utils.metrics import (
+    BUCKETS,
+    ScanMetrics,
+)
+
+
+def _metrics() -> ScanMetrics:
+    metrics = ScanMetrics(total=10)
+    metrics.observe(Protocol.TCP, ProbeStatus.OPEN, 0.0004)
+    metrics.observe(Protocol.TCP, ProbeStatus.OPEN, 0.002)
+    metrics.observe(Protocol.TCP, ProbeStatus.TIMEOUT, 2.0)
+    metrics.observe(Protocol.HTTP, ProbeStatus.OPEN, 0.02)
+    for found in (True, False, False, True, False):
+        metrics.port_started()
+        metrics.port_done(found)
+    return metrics
+
+
+def test_observe_counts_into_latency_buckets():
+    row = _metrics().outcomes[(Protocol.TCP, ProbeStatus.OPEN)]
+    assert row[:2] == [2, pytest.approx(0.0024)]
+    buckets = dict(zip(BUCKETS, row[2:], strict=True))
+    assert buckets[0.0005] == buckets[0.0025] == 1
+    assert sum(row[2:]) == 2
+
+
+def test_quantile_is_a_bucket_bound():
+    metrics = _metrics()
+    assert ScanMetrics().quantile(0.5) is None
+    assert metrics.quantile(0.25) == 0.0005
+    assert metrics.quantile(0.5) == 0.0025
+    assert metrics.quantile(0.99) == 2.5
+    assert metrics.probes == 4
+
+
+def test_combined_sums_worker_states():
+    first, second = _metrics(), _metrics()
+    second.port_started()
+    combined = ScanMetrics.combined([first.state(), second.state()], started=1.0)
+    assert combined.started == 1.0
+    assert (combined.total, combined.ports, combined.found, combined.in_flight) == (20, 10, 4, 1)
+    assert combined.outcomes[(Protocol.TCP, ProbeStatus.OPEN)][:2] == [4, pytest.approx(0.0048)]
+    assert combined.probes == 8
+    # rows of the states are copied, not shared
+    assert first.outcomes[(Protocol.HTTP, ProbeStatus.OPEN)][0] == 1
+
+
+def test_prometheus_exposition():
+    lines = _metrics().prometheus().splitlines()
+    assert "# TYPE portfinder_ports_planned gauge" in lines
+    assert "portfinder_ports_planned 10" in lines
+    assert "portfinder_ports_done_total 5" in lines
+    assert "portfinder_results_total 2" in lines
+    labels = 'protocol="tcp",outcome="open"'
+    # buckets are cumulative up to +Inf
+    assert f'portfinder_probe_seconds_bucket{{{labels},le="0.0005"}} 1' in lines
+    assert f'portfinder_probe_seconds_bucket{{{labels},le="0.0025"}} 2' in lines
+    assert f'portfinder_probe_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f"portfinder_probe_seconds_count{{{labels}}} 2" in lines
+    assert not any(line.startswith("portfinder_ports_total") for line in lines)
+
+
+def test_progress_line():
+    metrics = _metrics()
+    metrics.started = time.monotonic() - 10
+    line = metrics.progress_line()
+    assert line.startswith("50.0% 5/10 ports, 0.5 ports/s")
+    assert "in flight 0, found 2, timeouts 25.0%" in line
+    assert line.endswith("ETA 0:00:10")
+    assert ScanMetrics().progress_line().startswith("0/? ports")
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from portfinder.utils.payloads import (
+    DNS_PAYLOAD,
+    GENERIC_PAYLOAD,
+    MEMCACHED_PAYLOAD,
+    NTP_PAYLOAD,
+    SNMP_PAYLOAD,
+    SSDP_PAYLOAD,
+    TFTP_PAYLOAD,
+    PayloadRegistry,
+)
+
+
+def test_dns_validator():
+    reply = DNS_PAYLOAD.data[:2] + b"\x81\x80" + b"\x00" * 8
+    assert DNS_PAYLOAD.matches(reply)
+    # another transaction id, or a query echoed back
+    assert not DNS_PAYLOAD.matches(b"\x00\x01\x81\x80" + b"\x00" * 8)
+    assert not DNS_PAYLOAD.matches(DNS_PAYLOAD.data)
+    assert not DNS_PAYLOAD.matches(DNS_PAYLOAD.data[:4])
+
+
+def test_ntp_validator():
+    assert NTP_PAYLOAD.matches(b"\x1c" + b"\x00" * 47)
+    assert not NTP_PAYLOAD.matches(NTP_PAYLOAD.data)
+    assert not NTP_PAYLOAD.matches(b"\x1c")
+
+
+def test_snmp_validator():
+    assert SNMP_PAYLOAD.matches(b"\x30\x29\x02\x01\x00\x04\x06public\xa2\x1c")
+    assert not SNMP_PAYLOAD.matches(SNMP_PAYLOAD.data)
+
+
+def test_ssdp_memcached_tftp_validators():
+    assert SSDP_PAYLOAD.matches(b"HTTP/1.1 200 OK\r\n")
+    assert not SSDP_PAYLOAD.matches(SSDP_PAYLOAD.data)
+    assert MEMCACHED_PAYLOAD.matches(MEMCACHED_PAYLOAD.data[:8] + b"STAT pid 1\r\n")
+    assert not MEMCACHED_PAYLOAD.matches(b"\x00\x00" + MEMCACHED_PAYLOAD.data[2:8] + b"STAT pid 1\r\n")
+    assert TFTP_PAYLOAD.matches(b"\x00\x05\x00\x01File not found\x00")
+    assert not TFTP_PAYLOAD.matches(TFTP_PAYLOAD.data)
+
+
+def test_registry_defaults():
+    registry = PayloadRegistry()
+    assert registry.get(53) is DNS_PAYLOAD
+    assert registry.get(9999) is GENERIC_PAYLOAD
+    assert GENERIC_PAYLOAD.matches(b"anything")
+    assert 53 in registry and 9999 not in registry
+
+
+def test_registry_load_file(tmp_path):
+    path = tmp_path / "payloads.txt"
+    path.write_text("# game servers\n\n27015-27016 source ffffffff54 ffffffff49\n9999 echo 00\n")
+    registry = PayloadRegistry()
+    asyncio.run(registry.load_file(path))
+
+    source = registry.get(27016)
+    assert source.name == "source" and source.data == b"\xff\xff\xff\xff\x54"
+    assert source.matches(b"\xff\xff\xff\xff\x49rest")
+    assert not source.matches(b"\xff\xff\xff\xff\x00")
+    assert registry.get(9999).matches(b"")
+
+
+def test_registry_load_file_invalid(tmp_path):
+    path = tmp_path / "payloads.txt"
+    path.write_text("9999 broken zz\n")
+    with pytest.raises(ValueError, match="Invalid UDP payload line"):
+        asyncio.run(PayloadRegistry().load_file(path))
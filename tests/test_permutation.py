@@ -0,0 +1,43 @@
+import pytest
+
+from portfinder.dto import ScanOrder
+from portfinder.utils.permutation import IndexPermutation
+from portfinder.utils.targets import TargetSet
+from portfinder.utils.workspace import WorkSpace
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 17, 100, 1000, 4097])
+def test_permutation_is_bijective(size):
+    permutation = IndexPermutation(size, seed=7)
+    assert sorted(permutation[position] for position in range(size)) == list(range(size))
+
+
+def test_permutation_cycle_walks_into_range():
+    # 1000 needs a 1024 domain, values 1000..1023 are walked back into range
+    permutation = IndexPermutation(1000, seed=1)
+    assert all(0 <= permutation[position] < 1000 for position in range(1000))
+
+
+def test_permutation_is_seeded():
+    first = [IndexPermutation(500, seed=42)[position] for position in range(500)]
+    assert first == [IndexPermutation(500, seed=42)[position] for position in range(500)]
+    assert first != [IndexPermutation(500, seed=43)[position] for position in range(500)]
+    assert first != list(range(500))
+
+
+def test_permutation_bounds():
+    permutation = IndexPermutation(10, seed=0)
+    with pytest.raises(IndexError):
+        permutation[10]
+    with pytest.raises(IndexError):
+        permutation[-1]
+
+
+def test_random_workspace_covers_every_pair():
+    targets = TargetSet.from_targets(["10.0.0.0/29", "example.com"])
+    ports = [22, 80, 443]
+    workspace = WorkSpace(targets, ports, order=ScanOrder.RANDOM, seed=3)
+    pairs = list(workspace)
+    assert len(pairs) == targets.size * len(ports)
+    assert set(pairs) == {(host, port) for host in targets for port in ports}
+    assert pairs != list(WorkSpace(targets, ports))
@@ -0,0 +1,64 @@
+import pytest
+
+from portfinder.utils import ratelimit
+from portfinder.utils.ratelimit import (
+    HostRateLimiter,
+    TokenBucket,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def test_token_bucket_burst_then_rate(clock):
+    bucket = TokenBucket(10, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # tokens are borrowed from the future, waiters queue up in arrival order
+    assert bucket.reserve() == pytest.approx(0.1)
+    assert bucket.reserve() == pytest.approx(0.2)
+    clock.now += 0.2
+    assert bucket.reserve() == pytest.approx(0.1)
+
+
+def test_token_bucket_refill_is_capped(clock):
+    bucket = TokenBucket(100, burst=5)
+    assert bucket.idle
+    assert bucket.reserve() == 0
+    assert not bucket.idle
+    clock.now += 60
+    assert bucket.idle
+    assert [bucket.reserve() for _ in range(5)] == [0] * 5
+    assert bucket.reserve() > 0
+
+
+def test_token_bucket_default_burst():
+    assert TokenBucket(1000).burst == 50
+    assert TokenBucket(5).burst == 1
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_host_rate_limiter(clock, monkeypatch):
+    monkeypatch.setattr(HostRateLimiter, "PRUNE_EVERY", 4)
+    limiter = HostRateLimiter(10, burst=1)
+    assert limiter.reserve("a") == 0
+    assert limiter.reserve("b") == 0
+    assert limiter.reserve("a") == pytest.approx(0.1)
+    assert len(limiter) == 2
+    # every 4th reserve drops buckets that are full again
+    clock.now += 10
+    assert limiter.reserve("c") == 0
+    assert len(limiter) == 1
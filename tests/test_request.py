@@ -0,0 +1,86 @@
+import asyncio
+import socket
+
+from portfinder.dto import (
+    ProbeStatus,
+    Protocol,
+)
+from portfinder.utils.request import check_stream_protocols
+from portfinder.utils.tls import TlsProber
+
+
+STREAM = [Protocol.TCP, Protocol.HTTP, Protocol.HTTPS]
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _probe(ssl_context=None, protocols=STREAM) -> tuple[list[Protocol], int, list[ProbeStatus]]:
+    async def main():
+        connections = 0
+
+        async def accept(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            nonlocal connections
+            connections += 1
+            await reader.read(1024)
+            writer.close()
+
+        server = await asyncio.start_server(accept, "127.0.0.1", 0, ssl=ssl_context)
+        statuses: list[ProbeStatus] = []
+        async with server:
+            found = await check_stream_protocols(
+                "127.0.0.1",
+                server.sockets[0].getsockname()[1],
+                protocols,
+                1.0,
+                observe=lambda status, elapsed: statuses.append(status),
+                tls=TlsProber(),
+            )
+            # let the handler of the last connection run
+            await asyncio.sleep(0.05)
+        return found, connections, statuses
+
+    return asyncio.run(main())
+
+
+def test_plain_port_shares_one_connection_for_tcp_and_http():
+    found, connections, statuses = _probe()
+    assert found == [Protocol.TCP, Protocol.HTTP]
+    # TCP and HTTP on one connection, one failed TLS handshake
+    assert connections == 2
+    assert statuses == [ProbeStatus.OPEN]
+
+
+def test_tls_port_is_found_on_every_protocol(tls_context):
+    found, connections, statuses = _probe(tls_context)
+    assert found == STREAM
+    # the plain TCP and HTTP connection never completes a handshake
+    assert connections == 1
+    assert statuses == [ProbeStatus.OPEN]
+
+
+def test_https_only_reports_the_tls_connect(tls_context):
+    found, connections, statuses = _probe(tls_context, [Protocol.HTTPS])
+    assert (found, connections, statuses) == ([Protocol.HTTPS], 1, [ProbeStatus.OPEN])
+
+
+def test_closed_port_skips_http_and_https():
+    class NoTls(TlsProber):
+        async def check(self, *args, **kwargs):
+            raise AssertionError("TLS probed on a closed port")
+
+    statuses: list[ProbeStatus] = []
+    found = asyncio.run(
+        check_stream_protocols(
+            "127.0.0.1",
+            _closed_port(),
+            STREAM,
+            1.0,
+            observe=lambda status, elapsed: statuses.append(status),
+            tls=NoTls(),
+        )
+    )
+    assert (found, statuses) == ([], [ProbeStatus.REFUSED])
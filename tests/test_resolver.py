@@ -0,0 +1,53 @@
+import asyncio
+
+from portfinder.utils.resolver import Resolver
+
+
+class CountingResolver(Resolver):
+    def __init__(self, answers: dict[str, list[str]], **kwargs):
+        super().__init__(**kwargs)
+        self.answers = answers
+        self.requested: list[str] = []
+
+    async def _lookup(self, name: str) -> list[str]:
+        self.requested.append(name)
+        await asyncio.sleep(0.01)
+        return self.answers.get(name, [])
+
+
+def test_concurrent_lookups_share_one_request():
+    resolver = CountingResolver({"example.com": ["93.184.215.14"]})
+
+    async def main():
+        return await asyncio.gather(*(resolver.resolve("example.com") for _ in range(10)))
+
+    assert asyncio.run(main()) == [["93.184.215.14"]] * 10
+    assert resolver.requested == ["example.com"]
+
+
+def test_cache_ttl_and_negative_ttl():
+    resolver = CountingResolver({"example.com": ["93.184.215.14"]}, ttl=60, negative_ttl=0)
+
+    async def main():
+        for _ in range(3):
+            await resolver.resolve("example.com")
+            await resolver.resolve("missing.example")
+
+    asyncio.run(main())
+    assert resolver.requested.count("example.com") == 1
+    assert resolver.requested.count("missing.example") == 3
+
+
+def test_resolve_all_keeps_order_and_failures():
+    resolver = CountingResolver({"a.example": ["10.0.0.1", "::1"], "b.example": ["10.0.0.2"]}, concurrency=2)
+    resolved = asyncio.run(resolver.resolve_all(["b.example", "a.example", "c.example", "a.example"]))
+    assert list(resolved.items()) == [
+        ("b.example", ["10.0.0.2"]),
+        ("a.example", ["10.0.0.1", "::1"]),
+        ("c.example", []),
+    ]
+
+
+def test_localhost_lookup():
+    addresses = asyncio.run(Resolver().resolve("localhost"))
+    assert "127.0.0.1" in addresses and all(isinstance(address, str) for address in addresses)
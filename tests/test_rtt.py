@@ -0,0 +1,100 @@
+import asyncio
+import socket
+
+import pytest
+
+from portfinder.dto import (
+    ProbeStatus,
+    Protocol,
+)
+from portfinder.scanner import Scanner
+from portfinder.utils import tls as tls_module
+from portfinder.utils.request import check_stream_protocols
+from portfinder.utils.rtt import (
+    RttEstimator,
+    RttTable,
+)
+from portfinder.utils.tls import TlsProber
+
+
+async def _respond(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        await reader.read(1024)
+    except OSError:
+        pass
+    writer.close()
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_rtt_estimator():
+    estimator = RttEstimator(initial=3.0, floor=0.1, ceiling=3.0)
+    assert estimator.timeout == 3.0
+    estimator.sample(0.2)
+    # SRTT + 4 * RTTVAR with RTTVAR = RTT / 2 after the first sample
+    assert estimator.timeout == pytest.approx(0.2 + 4 * 0.1)
+    for _ in range(50):
+        estimator.sample(0.01)
+    assert estimator.timeout == pytest.approx(0.1)
+
+
+def test_rtt_table_shares_networks():
+    table = RttTable(3.0, 0.1, 3.0)
+    table.observe("10.0.0.1", 0.5)
+    assert table.estimator("10.0.0.200").samples == 1
+    assert table.estimator("10.0.1.1").samples == 0
+    assert table.key("2001:db8::1") == "2001:db8::/64"
+    assert table.key("example.com") == "example.com"
+
+
+def test_https_only_probe_feeds_observer(tls_context):
+    async def main():
+        server = await asyncio.start_server(_respond, "127.0.0.1", 0, ssl=tls_context)
+        port = server.sockets[0].getsockname()[1]
+        prober = TlsProber(capture=True)
+        observed: list[ProbeStatus] = []
+
+        def observe(status: ProbeStatus, elapsed: float) -> None:
+            observed.append(status)
+
+        async with server:
+            found = await check_stream_protocols(
+                "127.0.0.1", port, [Protocol.HTTPS], 2.0, connect_timeout=1.0, observe=observe, tls=prober
+            )
+            closed = await check_stream_protocols(
+                "127.0.0.1", _closed_port(), [Protocol.HTTPS], 2.0, connect_timeout=1.0, observe=observe, tls=prober
+            )
+        return found, closed, observed, prober.info("127.0.0.1", port)
+
+    found, closed, observed, info = asyncio.run(main())
+    assert (found, closed) == ([Protocol.HTTPS], [])
+    assert observed == [ProbeStatus.OPEN, ProbeStatus.REFUSED]
+    assert info.subject == "portfinder-test"
+
+
+def test_https_only_scan_adapts_and_retries(monkeypatch):
+    attempts: list[int] = []
+
+    async def blackhole(host, port):
+        attempts.append(port)
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(tls_module.asyncio, "open_connection", blackhole)
+    scanner = Scanner(
+        target="127.0.0.1",
+        ports="443",
+        protocol=Protocol.HTTPS,
+        timeout=0.2,
+        adaptive_timeout=True,
+        min_timeout=0.05,
+        retries=2,
+        quiet=True,
+        uvloop_disable=True,
+    )
+    assert asyncio.run(scanner.run()) == []
+    # timed out connects are retried like TCP and UDP probes
+    assert len(attempts) == 3
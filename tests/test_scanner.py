@@ -0,0 +1,109 @@
+import asyncio
+import socket
+from collections import Counter
+
+from portfinder.dto import Protocol
+from portfinder.scanner import Scanner
+
+
+def _free_ports(count: int) -> list[int]:
+    sockets = [socket.socket() for _ in range(count)]
+    try:
+        for sock in sockets:
+            sock.bind(("127.0.0.1", 0))
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+async def _accept(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    writer.close()
+
+
+def _track(scanner: Scanner, delay: float = 0.01) -> dict[str, Counter]:
+    """
+    Wrap scan_service to record in-flight probes, overall and per host
+    """
+    stats: dict[str, Counter] = {"now": Counter(), "peak": Counter()}
+    probe = scanner.scan_service
+
+    async def tracked(host, port, protocols, ip_version):
+        for key in (host, "*"):
+            stats["now"][key] += 1
+            stats["peak"][key] = max(stats["peak"][key], stats["now"][key])
+        try:
+            await asyncio.sleep(delay)
+            return await probe(host, port, protocols, ip_version)
+        finally:
+            for key in (host, "*"):
+                stats["now"][key] -= 1
+
+    scanner.scan_service = tracked
+    return stats
+
+
+def test_pool_streams_results_with_bounded_probes():
+    async def main():
+        servers = [await asyncio.start_server(_accept, "127.0.0.1", 0) for _ in range(3)]
+        open_ports = [server.sockets[0].getsockname()[1] for server in servers]
+        ports = sorted({*open_ports, *_free_ports(37)})
+        scanner = Scanner(
+            target="127.0.0.1",
+            ports=",".join(map(str, ports)),
+            protocol="tcp",
+            timeout=1.0,
+            concurrency=4,
+            quiet=True,
+            uvloop_disable=True,
+        )
+        stats = _track(scanner)
+        results = [result async for result in scanner.stream()]
+        for server in servers:
+            server.close()
+        return results, open_ports, ports, scanner, stats
+
+    results, open_ports, ports, scanner, stats = asyncio.run(main())
+    assert sorted(result.port for result in results) == sorted(open_ports)
+    assert all(result.protocols == [Protocol.TCP] for result in results)
+    assert stats["peak"]["*"] == 4
+    assert (scanner.metrics.ports, scanner.metrics.found, scanner.metrics.in_flight) == (len(ports), 3, 0)
+
+
+def test_scan_of_all_protocols_uses_the_stream_pipeline(tls_context):
+    async def main():
+        server = await asyncio.start_server(_accept, "127.0.0.1", 0, ssl=tls_context)
+        port = server.sockets[0].getsockname()[1]
+        scanner = Scanner(target="127.0.0.1", ports=str(port), timeout=0.5, quiet=True, uvloop_disable=True)
+        async with server:
+            return await scanner.run(), scanner
+
+    results, scanner = asyncio.run(main())
+    assert [result.protocols for result in results] == [[Protocol.TCP, Protocol.HTTP, Protocol.HTTPS]]
+    # one TCP connect for TCP and HTTP, one TLS connect
+    assert scanner.metrics.snapshot()["protocols"]["tcp"]["open"]["count"] == 1
+
+
+def test_host_concurrency_caps_every_host_and_interleaves():
+    async def main():
+        scanner = Scanner(
+            target="127.0.0.1-127.0.0.4",
+            ports=",".join(map(str, _free_ports(10))),
+            protocol="tcp",
+            timeout=1.0,
+            concurrency=8,
+            host_concurrency=2,
+            quiet=True,
+            uvloop_disable=True,
+        )
+        stats = _track(scanner, delay=0.02)
+        await scanner.run()
+        return scanner, stats
+
+    scanner, stats = asyncio.run(main())
+    assert scanner.interleave_width == 4
+    assert max(count for host, count in stats["peak"].items() if host != "*") == 2
+    # hosts are interleaved, so the global slots are used beyond one host cap
+    assert stats["peak"]["*"] > 2
+    assert scanner.metrics.ports == 40
+    assert not scanner._host_slots
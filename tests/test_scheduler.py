@@ -0,0 +1,57 @@
+import asyncio
+
+from portfinder.utils.scheduler import FairScheduler
+
+
+def test_freed_slots_go_round_robin_between_jobs():
+    async def main():
+        scheduler = FairScheduler(1)
+        order: list[str] = []
+
+        async def probe(job: str, name: str) -> None:
+            async with scheduler.share(job):
+                order.append(name)
+                await asyncio.sleep(0)
+
+        await scheduler.acquire("a")
+        tasks = [asyncio.create_task(probe("a", f"a{index}")) for index in range(3)]
+        tasks.append(asyncio.create_task(probe("b", "b0")))
+        await asyncio.sleep(0)
+        assert (scheduler.waiting("a"), scheduler.waiting("b")) == (3, 1)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return order, scheduler.free
+
+    order, free = asyncio.run(main())
+    assert order == ["a0", "b0", "a1", "a2"]
+    assert free == 1
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def main():
+        scheduler = FairScheduler(1)
+        await scheduler.acquire("a")
+        waiter = asyncio.create_task(scheduler.acquire("b"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert scheduler.waiting("b") == 0
+        scheduler.release()
+        return scheduler.free
+
+    assert asyncio.run(main()) == 1
+
+
+def test_slot_handed_over_before_cancel_is_released():
+    async def main():
+        scheduler = FairScheduler(1)
+        await scheduler.acquire("a")
+        waiter = asyncio.create_task(scheduler.acquire("b"))
+        await asyncio.sleep(0)
+        # the slot goes to the waiter, which is cancelled before it resumes
+        scheduler.release()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return scheduler.free
+
+    assert asyncio.run(main()) == 1
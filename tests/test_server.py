@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import pytest
+
+from portfinder import scanner as scanner_module
+from portfinder.scanner import Scanner
+from portfinder.server import (
+    ScanServer,
+    check_job_options,
+)
+from portfinder.utils import tls as tls_module
+
+
+def test_check_job_options():
+    check_job_options({"target": "10.0.0.1", "timeout": 1, "min_timeout": 0.5, "seed": None, "shard": "1/2"})
+    for options, message in [
+        ({"outfile": "x"}, "Unsupported job options: outfile"),
+        ({"shard": 5}, "Invalid job option shard: expected str or null, got 5"),
+        ({"timeout": True}, "Invalid job option timeout: expected int or float, got true"),
+        ({"concurrency": 1.5}, "Invalid job option concurrency"),
+        ({"shard": "3/2"}, "Invalid shard"),
+    ]:
+        with pytest.raises(ValueError, match=message):
+            check_job_options(options)
+
+
+async def _request(port: int, method: str, path: str, body: object = None) -> tuple[int, list]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = []
+    while line := await reader.readline():
+        lines.append(json.loads(line))
+    writer.close()
+    return int(head.split(b" ", 2)[1]), lines
+
+
+def test_invalid_job_option_is_bad_request():
+    async def main():
+        server = ScanServer(quiet=True)
+        http = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        async with http:
+            return await _request(http.sockets[0].getsockname()[1], "POST", "/jobs", {"target": "x", "shard": 5})
+
+    status, body = asyncio.run(main())
+    assert status == 400
+    assert body == [{"error": "Invalid job option shard: expected str or null, got 5"}]
+
+
+def test_cancelled_job_does_not_count_unfinished_ports(monkeypatch):
+    probing = asyncio.Event()
+
+    async def stall(self, host, port, protocols, ip_version):
+        probing.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(Scanner, "scan_service", stall)
+
+    async def main():
+        server = ScanServer(quiet=True)
+        http = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = http.sockets[0].getsockname()[1]
+        async with http:
+            job = asyncio.create_task(_request(port, "POST", "/jobs", {"target": "127.0.0.1", "ports": "80"}))
+            await asyncio.wait_for(probing.wait(), 5)
+            cancel = await _request(port, "DELETE", f"/jobs/{next(iter(server.jobs))}")
+            return cancel, await asyncio.wait_for(job, 5)
+
+    (cancel_status, cancel_body), (status, lines) = asyncio.run(main())
+    assert cancel_status == status == 200
+    assert cancel_body[0]["state"] == "cancelling"
+    final = lines[-1]
+    assert final["state"] == "cancelled"
+    assert (final["stats"]["ports_done"], final["stats"]["in_flight"]) == (0, 0)
+
+
+def test_jobs_use_the_shared_engines_of_the_server(monkeypatch):
+    server = ScanServer(quiet=True)
+    tls = server.tls
+
+    def per_job(*args, **kwargs):
+        raise AssertionError("engine created per job")
+
+    for name in ("UdpEngine", "Resolver"):
+        monkeypatch.setattr(scanner_module, name, per_job)
+    monkeypatch.setattr(tls_module, "TlsProber", per_job)
+    https = server.create_job({"target": "127.0.0.1", "ports": "443"}).scanner
+    tcp = server.create_job({"target": "127.0.0.1", "ports": "22", "protocol": "tcp"}).scanner
+    assert https.tls is tls and tcp.tls is None
+    for scanner in (https, tcp):
+        assert scanner.udp_engine is server.udp_engine
+        assert scanner.resolver is server.resolver
+        assert scanner.connect_engine is server.connect_engine
@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import pytest
+
+import portfinder
+import portfinder.utils
+from benchmarks.startup import (
+    DEFERRED,
+    deferred_imported,
+)
+
+
+@pytest.mark.parametrize("module", [portfinder, portfinder.utils])
+def test_all_lists_every_lazy_export(module):
+    assert module.__all__ == list(module._EXPORTS)
+    for name in module.__all__:
+        assert getattr(module, name) is not None
+
+
+def test_cli_defers_optional_modules():
+    assert deferred_imported() == []
+
+
+def test_deferred_modules_load_on_use():
+    code = (
+        "import sys; from portfinder.scanner import Scanner; "
+        "Scanner(target='127.0.0.1', ports='1', protocol='tcp', engine='epoll', discovery=True, quiet=True); "
+        f"print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    )
+    stdout = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert stdout.split() == ["portfinder.utils.connect,portfinder.utils.discovery"]
@@ -0,0 +1,56 @@
+from portfinder.dto import (
+    IpVersion,
+    Protocol,
+    Result,
+)
+from portfinder.utils.store import ResultStore
+
+
+RESULTS = [
+    Result("10.0.0.1", 22, IpVersion.IPV4, [Protocol.TCP]),
+    Result("2001:db8::1", 443, IpVersion.IPV6, [Protocol.TCP, Protocol.HTTPS]),
+    Result("10.0.0.1", 80, IpVersion.IPV4, [Protocol.TCP, Protocol.HTTP], service="http (nginx)", banner="HTTP/1.1"),
+    Result("example.com", 53, IpVersion.IPV4, [Protocol.UDP]),
+    Result("10.0.0.1", 65535, IpVersion.IPV4, [Protocol.TCP], hostname="gateway"),
+]
+
+
+def _store() -> ResultStore:
+    store = ResultStore()
+    for result in RESULTS:
+        store.append(result)
+    return store
+
+
+def test_rows_round_trip():
+    store = _store()
+    assert len(store) == len(RESULTS)
+    assert list(store) == RESULTS
+    # rows without optional fields are rebuilt from the arrays
+    assert store.row(1) is not RESULTS[1]
+    assert store.row(2) is RESULTS[2]
+
+
+def test_hosts_are_interned():
+    store = _store()
+    assert store.count_by_host() == {"10.0.0.1": 3, "2001:db8::1": 1, "example.com": 1}
+
+
+def test_group_by_host_keeps_first_seen_order():
+    groups = [(host, [result.port for result in results]) for host, results in _store().group_by_host()]
+    assert groups == [("10.0.0.1", [22, 80, 65535]), ("2001:db8::1", [443]), ("example.com", [53])]
+
+
+def test_ipv4_and_ipv6_hosts_with_the_same_packed_int_stay_apart():
+    store = ResultStore()
+    results = [
+        Result("10.0.0.1", 22, IpVersion.IPV4, [Protocol.TCP]),
+        Result("::a00:1", 22, IpVersion.IPV6, [Protocol.TCP]),
+        Result("10.0.0.1", 80, IpVersion.IPV4, [Protocol.TCP]),
+    ]
+    for result in results:
+        store.append(result)
+    assert results[0].packed_host == results[1].packed_host
+    assert list(store) == results
+    assert store.count_by_host() == {"10.0.0.1": 2, "::a00:1": 1}
+    assert [host for host, _ in store.group_by_host()] == ["10.0.0.1", "::a00:1"]
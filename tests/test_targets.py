@@ -0,0 +1,77 @@
+import pytest
+
+from portfinder.dto import IpVersion
+from portfinder.utils.targets import (
+    AddressRange,
+    TargetSet,
+    merge_ranges,
+    parse_target,
+)
+
+
+def test_parse_target():
+    assert parse_target("10.0.0.1") == AddressRange(IpVersion.IPV4, 0x0A000001, 0x0A000001)
+    assert parse_target("10.0.0.1-10.0.0.3").size == 3
+    assert parse_target("10.0.0.0/30").size == 2
+    assert parse_target("10.0.0.0/31").size == 2
+    assert parse_target("2001:db8::/126").size == 3
+    assert parse_target(" Example.COM ") == "example.com"
+    assert parse_target("") is None
+    assert parse_target("10.0.0.0/33") is None
+
+
+def test_parse_target_invalid_range():
+    with pytest.raises(ValueError, match="different IP versions"):
+        parse_target("10.0.0.1-::1")
+    with pytest.raises(ValueError, match="end is before start"):
+        parse_target("10.0.0.3-10.0.0.1")
+    with pytest.raises(ValueError, match="end is before start"):
+        TargetSet.from_targets(["10.0.0.1", "::5-::1"])
+    # a dash in a domain name is not a range
+    assert parse_target("my-host.example.com") == "my-host.example.com"
+
+
+def test_merge_ranges():
+    ranges = [
+        AddressRange(IpVersion.IPV4, 10, 20),
+        AddressRange(IpVersion.IPV6, 5, 6),
+        AddressRange(IpVersion.IPV4, 21, 25),
+        AddressRange(IpVersion.IPV4, 12, 14),
+        AddressRange(IpVersion.IPV4, 30, 30),
+        AddressRange(IpVersion.IPV6, 7, 7),
+    ]
+    assert merge_ranges(ranges) == [
+        AddressRange(IpVersion.IPV4, 10, 25),
+        AddressRange(IpVersion.IPV4, 30, 30),
+        AddressRange(IpVersion.IPV6, 5, 7),
+    ]
+
+
+def test_target_set_deduplicates():
+    targets = TargetSet.from_targets(
+        ["10.0.0.1", "10.0.0.0/30", "10.0.0.2-10.0.0.4", "::1", "example.com", "EXAMPLE.com"]
+    )
+    assert list(targets) == ["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4", "::1", "example.com"]
+    assert targets.size == 6
+    assert [targets.host(index) for index in range(targets.size)] == list(targets)
+
+
+def test_target_set_compact_targets_round_trip():
+    targets = TargetSet.from_targets(["192.168.0.0/24", "192.168.1.1", "::1", "example.com"])
+    assert targets.targets() == ["192.168.0.1-192.168.0.254", "192.168.1.1", "::1", "example.com"]
+    assert list(TargetSet.from_targets(targets.targets())) == list(targets)
+
+
+def test_target_set_host_out_of_range():
+    targets = TargetSet.from_targets(["10.0.0.1"])
+    with pytest.raises(IndexError):
+        targets.host(1)
+    assert not TargetSet()
+
+
+def test_target_set_membership():
+    targets = TargetSet.from_targets(["10.0.0.0/24", "10.0.2.5", "::1", "Example.com"])
+    assert "10.0.0.1" in targets and "10.0.0.254" in targets and "10.0.2.5" in targets
+    assert "10.0.0.0" not in targets and "10.0.0.255" not in targets and "10.0.2.6" not in targets
+    assert "::1" in targets and "::2" not in targets and "0.0.0.1" not in targets
+    assert "example.COM" in targets and "example.org" not in targets
@@ -0,0 +1,70 @@
+import asyncio
+import ssl
+import warnings
+from pathlib import Path
+
+from portfinder.utils.tls import (
+    SessionContext,
+    TlsProber,
+    _der_time,
+    parse_certificate,
+)
+
+
+CERTIFICATE = ssl.PEM_cert_to_DER_cert((Path(__file__).parent / "data" / "cert.pem").read_text())
+
+
+class FakeSslObject:
+    def version(self):
+        return "TLSv1.2"
+
+    def cipher(self):
+        return ("ADH-AES128-SHA", "TLSv1.2", 128)
+
+    def getpeercert(self, binary_form=False):
+        return None
+
+
+def test_parse_certificate():
+    assert parse_certificate(CERTIFICATE) == ("portfinder-test", "portfinder-test", "2126-09-24T05:35:36Z")
+
+
+def test_parse_certificate_malformed():
+    assert parse_certificate(b"") == (None, None, None)
+    assert parse_certificate(CERTIFICATE[:100]) == (None, None, None)
+    assert parse_certificate(b"\x30\x03\x02\x01\x00") == (None, None, None)
+
+
+def test_der_time():
+    assert _der_time(b"491231235959Z", 0x17, 0, 13) == "2049-12-31T23:59:59Z"
+    assert _der_time(b"500101000000Z", 0x17, 0, 13) == "1950-01-01T00:00:00Z"
+    assert _der_time(b"21260924053536Z", 0x18, 0, 15) == "2126-09-24T05:35:36Z"
+
+
+def test_session_context_is_an_unverified_client_context():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        context = SessionContext()
+    assert context.protocol == ssl.PROTOCOL_TLS_CLIENT
+    assert (context.check_hostname, context.verify_mode) == (False, ssl.CERT_NONE)
+
+
+def test_capture_without_peer_certificate():
+    prober = TlsProber(capture=True)
+    prober._capture(("127.0.0.1", 443), FakeSslObject(), None)
+    info = prober.info("127.0.0.1", 443)
+    assert (info.version, info.cipher, info.subject, info.not_after) == ("TLSv1.2", "ADH-AES128-SHA", None, None)
+
+
+def test_check_captures_tls_info(tls_context):
+    async def main():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0, ssl=tls_context)
+        port = server.sockets[0].getsockname()[1]
+        prober = TlsProber(capture=True)
+        async with server:
+            return await prober.check("127.0.0.1", port, 2.0, "example.com"), prober.info("127.0.0.1", port)
+
+    found, info = asyncio.run(main())
+    assert found
+    assert (info.sni, info.subject, info.issuer) == ("example.com", "portfinder-test", "portfinder-test")
+    assert info.version.startswith("TLS")
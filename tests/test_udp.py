@@ -0,0 +1,92 @@
+import asyncio
+import socket
+
+import pytest
+
+from portfinder.utils.timers import TimerWheel
+from portfinder.utils.udp import UdpEngine
+
+
+class Echo(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.transport.sendto(data.upper(), addr)
+
+
+def _free_udp_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_timer_wheel_fires_in_deadline_order():
+    async def main():
+        wheel = TimerWheel(0.01)
+        fired = []
+        wheel.schedule(0.05, lambda: fired.append("late"))
+        wheel.schedule(0.01, lambda: fired.append("early"))
+        assert len(wheel) == 2
+        await asyncio.sleep(0.1)
+        return fired, len(wheel)
+
+    assert asyncio.run(main()) == (["early", "late"], 0)
+
+
+def test_timer_wheel_close_drops_callbacks():
+    async def main():
+        wheel = TimerWheel(0.01)
+        fired = []
+        wheel.schedule(0.01, lambda: fired.append(1))
+        wheel.close()
+        await asyncio.sleep(0.05)
+        return fired
+
+    assert asyncio.run(main()) == []
+
+
+def test_udp_engine_reply():
+    async def main():
+        transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(Echo, local_addr=("127.0.0.1", 0))
+        port = transport.get_extra_info("sockname")[1]
+        engine = UdpEngine()
+        try:
+            return await asyncio.gather(
+                engine.probe("127.0.0.1", port, b"ping", timeout=1.0),
+                engine.probe("127.0.0.1", port, b"ping", timeout=1.0),
+            )
+        finally:
+            engine.close()
+            transport.close()
+
+    # concurrent probes of one address share the pending reply
+    assert asyncio.run(main()) == [b"PING", b"PING"]
+
+
+def test_udp_engine_timeout():
+    async def main():
+        silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        silent.bind(("127.0.0.1", 0))
+        engine = UdpEngine(0.01)
+        try:
+            await engine.probe("127.0.0.1", silent.getsockname()[1], timeout=0.05)
+        finally:
+            engine.close()
+            silent.close()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(main())
+
+
+@pytest.mark.skipif(not hasattr(socket, "MSG_ERRQUEUE"), reason="ICMP errors are read from the Linux error queue")
+def test_udp_engine_refused():
+    async def main():
+        engine = UdpEngine()
+        try:
+            await engine.probe("127.0.0.1", _free_udp_port(), timeout=1.0)
+        finally:
+            engine.close()
+
+    with pytest.raises(ConnectionRefusedError):
+        asyncio.run(main())
@@ -0,0 +1,67 @@
+import asyncio
+import queue
+
+import pytest
+
+from portfinder import workers
+from portfinder.scanner import Scanner
+from portfinder.workers import (
+    WorkerError,
+    _worker_main,
+    worker_options,
+)
+
+
+async def _accept(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    writer.close()
+
+
+def test_workers_keep_hostnames():
+    async def main():
+        server = await asyncio.start_server(_accept, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        scanner = Scanner(
+            target="localhost", ports=str(port), protocol="tcp", timeout=1.0, workers=2, quiet=True, uvloop_disable=True
+        )
+        async with server:
+            return [result async for result in scanner.stream()], port
+
+    results, port = asyncio.run(main())
+    found = [result for result in results if result.host == "127.0.0.1"]
+    assert [(result.port, result.hostname) for result in found] == [(port, "localhost")]
+
+
+def test_worker_uses_parent_hostnames():
+    async def serve(messages: queue.Queue):
+        server = await asyncio.start_server(_accept, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        options = {
+            "target": "127.0.0.1",
+            "ports": str(port),
+            "protocol": "tcp",
+            "timeout": 1.0,
+            "quiet": True,
+            "uvloop_disable": True,
+            "hostnames": {"127.0.0.1": "localhost"},
+        }
+        async with server:
+            # the worker runs its own event loop
+            await asyncio.to_thread(_worker_main, 0, options, messages)
+
+    messages: queue.Queue = queue.Queue()
+    asyncio.run(serve(messages))
+    results = [payload for kind, payload in iter(messages.get_nowait, ("done", None)) if kind == "result"]
+    assert [result["hostname"] for result in results] == ["localhost"]
+
+
+def test_worker_failure_propagates_from_cmd_run(monkeypatch):
+    def failing_options(options, shard, workers, index):
+        options = worker_options(options, shard, workers, index)
+        return {**options, "ports": "not-a-port"} if index == 1 else options
+
+    monkeypatch.setattr(workers, "worker_options", failing_options)
+    scanner = Scanner(
+        target="127.0.0.1", ports="9", protocol="tcp", timeout=0.5, workers=2, quiet=True, uvloop_disable=True
+    )
+    with pytest.raises(WorkerError, match="Worker failed"):
+        asyncio.run(scanner.cmd_run())
@@ -0,0 +1,73 @@
+import pytest
+
+from portfinder.dto import ScanOrder
+from portfinder.utils.diff import pair_in_shard
+from portfinder.utils.targets import TargetSet
+from portfinder.utils.workspace import (
+    SINGLE_SHARD,
+    Shard,
+    WorkSpace,
+)
+from portfinder.workers import worker_options
+
+
+TARGETS = TargetSet.from_targets(["10.0.0.0/28", "::1", "example.com"])
+PORTS = [22, 53, 80, 443, 8080]
+
+
+def test_shard_parse():
+    assert Shard.parse("1/4") == Shard(0, 4)
+    assert str(Shard.parse("4/4")) == "4/4"
+    assert SINGLE_SHARD == Shard.parse("1/1")
+    for value in ("0/4", "5/4", "a/b", "1"):
+        with pytest.raises(ValueError, match="Invalid shard"):
+            Shard.parse(value)
+
+
+@pytest.mark.parametrize("order", list(ScanOrder))
+@pytest.mark.parametrize("total", [1, 2, 3, 7])
+def test_shards_are_disjoint_and_cover_the_space(order, total):
+    shards = [
+        list(WorkSpace(TARGETS, PORTS, width=2, order=order, seed=5, shard=Shard(number, total)))
+        for number in range(total)
+    ]
+    pairs = [pair for shard in shards for pair in shard]
+    assert len(pairs) == len(set(pairs)) == TARGETS.size * len(PORTS)
+    assert set(pairs) == set(WorkSpace(TARGETS, PORTS, width=2, order=order, seed=5))
+    # balanced within one item
+    assert max(map(len, shards)) - min(map(len, shards)) <= 1
+    for number, shard in enumerate(shards):
+        assert len(shard) == WorkSpace(TARGETS, PORTS, order=order, seed=5, shard=Shard(number, total)).shard_size
+
+
+def test_walk_resumes_from_position():
+    workspace = WorkSpace(TARGETS, PORTS, order=ScanOrder.RANDOM, seed=1, shard=Shard(1, 3))
+    items = list(workspace.walk())
+    assert all(position % 3 == 1 for position, _, _ in items)
+    assert list(workspace.walk(10)) == [item for item in items if item[0] >= 10]
+
+
+def test_interleaved_order_rotates_hosts():
+    workspace = WorkSpace(TargetSet.from_targets(["10.0.0.1-10.0.0.3"]), [1, 2], width=2)
+    assert list(workspace) == [
+        ("10.0.0.1", 1),
+        ("10.0.0.2", 1),
+        ("10.0.0.1", 2),
+        ("10.0.0.2", 2),
+        ("10.0.0.3", 1),
+        ("10.0.0.3", 2),
+    ]
+
+
+def test_worker_sub_shards_partition_the_shard():
+    options = {"concurrency": 100, "banner_concurrency": None}
+    parent = Shard(1, 3)
+    children = [worker_options(options, parent, 4, index)["shard"] for index in range(4)]
+    parent_pairs = set(WorkSpace(TARGETS, PORTS, shard=parent))
+    child_pairs = [pair for child in children for pair in WorkSpace(TARGETS, PORTS, shard=child)]
+    assert len(child_pairs) == len(set(child_pairs))
+    assert set(child_pairs) == parent_pairs
+    # pairs outside of the sequence keep the parent shard assignment
+    for host in TARGETS:
+        for port in PORTS:
+            assert pair_in_shard(host, port, parent) == any(pair_in_shard(host, port, child) for child in children)